@@ -0,0 +1,137 @@
+from functools import cache
+
+from google.genai import types
+from prompts import system_prompt
+from config import HISTORY_TOKEN_BUDGET, MAX_PARALLEL_TOOLS, MAX_TURNS, MODEL_NAME
+from functions.call_function import tool_cache
+from functions.registry import get_tool
+from functions.dispatch import dispatch_function_calls
+from history import ConversationHistory
+import tracing
+
+
+@cache
+def generate_config():
+    # Built once, every session sends the same tools and system prompt
+    return types.GenerateContentConfig(
+        tools=[get_tool()], system_instruction=system_prompt
+    )
+
+
+def trace_usage(span, usage_metadata):
+    if usage_metadata is not None:
+        span.set(
+            prompt_tokens=usage_metadata.prompt_token_count,
+            response_tokens=usage_metadata.candidates_token_count,
+        )
+
+
+def print_usage(turn, usage_metadata):
+    if usage_metadata is not None:
+        print(f"Turn {turn + 1}: Prompt tokens: {usage_metadata.prompt_token_count}")
+        print(
+            f"Turn {turn + 1}: Response tokens: {usage_metadata.candidates_token_count}"
+        )
+    else:
+        print("Warning: No usage metadata found in response.")
+
+
+def run_agent(
+    client,
+    messages,
+    verbose=False,
+    max_parallel_tools=MAX_PARALLEL_TOOLS,
+    max_turns=MAX_TURNS,
+    token_budget=HISTORY_TOKEN_BUDGET,
+    summarizer=None,
+    working_directory=None,
+    cache=None,
+    log=None,
+):
+    # Batch sessions bring their own working directory and tool cache
+    if cache is None:
+        cache = tool_cache
+    config = generate_config()
+    history = ConversationHistory(
+        messages,
+        token_budget=token_budget,
+        summarizer=summarizer,
+        cache=cache,
+        log=log,
+    )
+
+    for turn in range(max_turns):
+        try:
+            with tracing.span("model.request", turn=turn + 1) as span:
+                if tracing.enabled():
+                    span.set(request_bytes=tracing.content_bytes(messages))
+                response = client.models.generate_content(
+                    model=MODEL_NAME,
+                    contents=messages,
+                    config=config,
+                )
+                trace_usage(span, response.usage_metadata)
+        except Exception as e:
+            print(f"Error generating content: {e}")
+            break
+
+        try:
+            if verbose:
+                print_usage(turn, response.usage_metadata)
+        except Exception as e:
+            if verbose:
+                print(f"Error processing usage metadata: {e}")
+
+        # Compact older turns once the prompt outgrows the token budget
+        try:
+            report = history.record_usage(response.usage_metadata)
+            if report is not None and verbose:
+                print(report)
+        except Exception as e:
+            print(f"Error compacting history: {e}")
+
+        # Add each candidate's content to the conversation history
+        try:
+            if response.candidates:  # Check if candidates is not None or empty
+                for candidate in response.candidates:
+                    if candidate.content is not None:
+                        history.append(candidate.content)
+            else:
+                print("No candidates returned in the response.")
+        except Exception as e:
+            print(f"Error processing candidates: {e}")
+            break
+
+        # Check if the model is finished (no function calls and has text response)
+        try:
+            if not response.function_calls and response.text:
+                print(response.text)
+                break
+        except Exception as e:
+            print(f"Error checking response completion: {e}")
+            break
+
+        # Process function calls if present
+        try:
+            if response.function_calls:
+                # Independent calls run concurrently, responses keep the call order
+                with tracing.span(
+                    "tools", turn=turn + 1, calls=len(response.function_calls)
+                ):
+                    contents = dispatch_function_calls(
+                        response.function_calls,
+                        verbose=verbose,
+                        max_workers=max_parallel_tools,
+                        cache=cache,
+                        working_directory=working_directory,
+                    )
+                for content in contents:
+                    history.append(content)
+            else:
+                # No function calls and no text - break to avoid infinite loop
+                break
+        except Exception as e:
+            print(f"Error processing function calls: {e}")
+            break
+
+    return messages
@@ -0,0 +1,156 @@
+import time
+import asyncio
+
+from google.genai import types
+from config import HISTORY_TOKEN_BUDGET, MAX_PARALLEL_TOOLS, MAX_TURNS, MODEL_NAME
+from functions.call_function import tool_cache
+from functions.dispatch import ToolDispatcher
+from functions.registry import READ_ONLY_FUNCTIONS
+from functions.shaping import shape_turn
+from agent import generate_config, print_usage, trace_usage
+from history import ConversationHistory
+import tracing
+
+
+def _merge_parts(parts):
+    # Streamed text arrives in many small parts, join neighbours back together
+    merged = []
+    for part in parts:
+        if (
+            merged
+            and part.text is not None
+            and merged[-1].text is not None
+            and part.thought == merged[-1].thought
+        ):
+            merged[-1] = types.Part(
+                text=merged[-1].text + part.text, thought=part.thought
+            )
+        else:
+            merged.append(part)
+    return merged
+
+
+async def run_agent_async(
+    client,
+    messages,
+    verbose=False,
+    max_parallel_tools=MAX_PARALLEL_TOOLS,
+    max_turns=MAX_TURNS,
+    token_budget=HISTORY_TOKEN_BUDGET,
+    summarizer=None,
+    working_directory=None,
+    cache=None,
+    log=None,
+):
+    # Batch sessions bring their own working directory and tool cache
+    if cache is None:
+        cache = tool_cache
+    config = generate_config()
+    history = ConversationHistory(
+        messages,
+        token_budget=token_budget,
+        summarizer=summarizer,
+        cache=cache,
+        log=log,
+    )
+
+    for turn in range(max_turns):
+        parts = []
+        usage_metadata = None
+        printed_text = False
+
+        # Tools start as soon as their part arrives, while the stream continues
+        with (
+            tracing.span("model.request", turn=turn + 1) as span,
+            ToolDispatcher(
+                verbose=verbose,
+                max_workers=max_parallel_tools,
+                cache=cache,
+                working_directory=working_directory,
+            ) as dispatcher,
+        ):
+            if tracing.enabled():
+                span.set(request_bytes=tracing.content_bytes(messages))
+            stream_start = time.perf_counter()
+            tool_futures = []
+            # Calls that change files or run code wait for the end of the
+            # stream, a stream error discards the turn. Later calls wait too,
+            # so every call is still submitted in order.
+            held = []
+            try:
+                stream = await client.aio.models.generate_content_stream(
+                    model=MODEL_NAME,
+                    contents=messages,
+                    config=config,
+                )
+                async for chunk in stream:
+                    if chunk.usage_metadata is not None:
+                        usage_metadata = chunk.usage_metadata
+                    if not chunk.candidates:
+                        continue
+                    content = chunk.candidates[0].content
+                    if content is None or not content.parts:
+                        continue
+                    for part in content.parts:
+                        parts.append(part)
+                        if part.text and not part.thought:
+                            print(part.text, end="", flush=True)
+                            printed_text = True
+                        if part.function_call is not None:
+                            if printed_text:
+                                print()
+                                printed_text = False
+                            call = part.function_call
+                            if held or call.name not in READ_ONLY_FUNCTIONS:
+                                held.append(call)
+                                continue
+                            future = dispatcher.submit(call)
+                            tool_futures.append(asyncio.wrap_future(future))
+            except Exception as e:
+                if printed_text:
+                    print()
+                print(f"Error generating content: {e}")
+                # Read-only calls already running finish in the background
+                dispatcher.cancel()
+                break
+
+            for call in held:
+                tool_futures.append(asyncio.wrap_future(dispatcher.submit(call)))
+
+            # The span also covers tools still running after the stream ends
+            span.set(
+                stream_ms=round((time.perf_counter() - stream_start) * 1000, 3),
+                calls=len(tool_futures),
+            )
+            trace_usage(span, usage_metadata)
+            tool_contents = await asyncio.gather(*tool_futures)
+
+        if printed_text:
+            print()
+
+        if verbose:
+            print_usage(turn, usage_metadata)
+
+        # Compact older turns once the prompt outgrows the token budget,
+        # before this turn is added, like run_agent
+        try:
+            report = history.record_usage(usage_metadata)
+            if report is not None and verbose:
+                print(report)
+        except Exception as e:
+            print(f"Error compacting history: {e}")
+
+        if not parts:
+            print("No candidates returned in the response.")
+            break
+
+        history.append(types.Content(role="model", parts=_merge_parts(parts)))
+
+        if not tool_contents:
+            # Text was already printed while streaming, the model is done
+            break
+
+        # Responses keep the original call order, within the turn's budget
+        history.extend(shape_turn(tool_contents, cache=cache))
+
+    return messages
@@ -0,0 +1,219 @@
+import os
+import sys
+import json
+import time
+import threading
+import contextlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from google.genai import types
+from config import (
+    BATCH_CONCURRENCY,
+    BATCH_REQUESTS_PER_MINUTE,
+    BATCH_TOKENS_PER_MINUTE,
+    HISTORY_TOKEN_BUDGET,
+    MAX_PARALLEL_TOOLS,
+    WORKING_DIRECTORY,
+)
+from agent import run_agent
+from functions.call_function import new_tool_cache
+from history import model_summarizer
+import tracing
+
+# Runs many independent sessions over one shared client. Each task is a JSON
+# line {"id": ..., "prompt": ..., "working_directory": ...}; id and
+# working_directory are optional. Sessions run on their own threads with
+# their own tool cache, and one result line is written as each one finishes.
+
+
+class RateLimiter:
+    # Requests and tokens per minute over a sliding window, shared by sessions.
+    # Tokens are only known after a response, so the limit is enforced on
+    # what was already used and can be overshot by the requests in flight.
+    def __init__(self, requests_per_minute=0, tokens_per_minute=0, window=60.0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.window = window
+        self.requests = deque()
+        # (time, tokens) for every response in the window
+        self.tokens = deque()
+        self.token_total = 0
+        self.waited = 0.0
+        self.condition = threading.Condition()
+
+    def _expire(self, now):
+        while self.requests and now - self.requests[0] >= self.window:
+            self.requests.popleft()
+        while self.tokens and now - self.tokens[0][0] >= self.window:
+            self.token_total -= self.tokens.popleft()[1]
+
+    def acquire(self):
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                self._expire(now)
+                delay = 0.0
+                if (
+                    self.requests_per_minute
+                    and len(self.requests) >= self.requests_per_minute
+                ):
+                    delay = self.window - (now - self.requests[0])
+                if (
+                    self.tokens_per_minute
+                    and self.token_total >= self.tokens_per_minute
+                ):
+                    delay = max(delay, self.window - (now - self.tokens[0][0]))
+                if delay <= 0:
+                    break
+                self.waited += delay
+                self.condition.wait(delay)
+            self.requests.append(now)
+
+    def record(self, tokens):
+        if not tokens:
+            return
+        with self.condition:
+            self.tokens.append((time.monotonic(), tokens))
+            self.token_total += tokens
+
+
+class _SessionModels:
+    def __init__(self, session):
+        self.session = session
+
+    def generate_content(self, **kwargs):
+        session = self.session
+        session.limiter.acquire()
+        response = session.client.models.generate_content(**kwargs)
+        session.requests += 1
+        usage = response.usage_metadata
+        if usage is not None:
+            session.prompt_tokens += usage.prompt_token_count or 0
+            session.response_tokens += usage.candidates_token_count or 0
+            session.limiter.record(usage.total_token_count or 0)
+        return response
+
+
+class SessionClient:
+    # Stands in for the client in one session: shares the connection pool and
+    # the rate limiter, and keeps that session's own usage
+    def __init__(self, client, limiter):
+        self.client = client
+        self.limiter = limiter
+        self.models = _SessionModels(self)
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+
+
+def load_tasks(path):
+    tasks = []
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                task = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{number}: invalid JSON: {e}")
+            if not isinstance(task, dict) or not task.get("prompt"):
+                raise ValueError(f"{path}:{number}: a task needs a prompt")
+            task.setdefault("id", number)
+            task.setdefault("working_directory", WORKING_DIRECTORY)
+            tasks.append(task)
+    return tasks
+
+
+def _final_text(messages):
+    last = messages[-1]
+    if last.role != "model" or not last.parts:
+        return None
+    if any(part.function_call is not None for part in last.parts):
+        return None
+    return "".join(part.text for part in last.parts if part.text and not part.thought)
+
+
+def run_task(client, limiter, task, max_parallel_tools, token_budget, summarize):
+    session = SessionClient(client, limiter)
+    messages = [types.Content(role="user", parts=[types.Part(text=task["prompt"])])]
+    result = {"id": task["id"], "working_directory": task["working_directory"]}
+    start = time.perf_counter()
+    try:
+        with tracing.span("batch.task", task=task["id"]):
+            run_agent(
+                session,
+                messages,
+                max_parallel_tools=max_parallel_tools,
+                token_budget=token_budget,
+                summarizer=model_summarizer(session) if summarize else None,
+                working_directory=task["working_directory"],
+                cache=new_tool_cache(),
+            )
+        text = _final_text(messages)
+        # No final answer means the loop stopped on an error or max_turns
+        result["status"] = "ok" if text else "incomplete"
+        result["response"] = text
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = str(e)
+    result["turns"] = session.requests
+    result["prompt_tokens"] = session.prompt_tokens
+    result["response_tokens"] = session.response_tokens
+    result["elapsed_s"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def run_batch(
+    client,
+    tasks,
+    output,
+    concurrency=BATCH_CONCURRENCY,
+    requests_per_minute=BATCH_REQUESTS_PER_MINUTE,
+    tokens_per_minute=BATCH_TOKENS_PER_MINUTE,
+    max_parallel_tools=MAX_PARALLEL_TOOLS,
+    token_budget=HISTORY_TOKEN_BUDGET,
+    summarize=False,
+):
+    # Writes one JSON line per task to output as soon as it finishes and
+    # returns the number of tasks that did not end with a final answer
+    limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+    failed = 0
+    start = time.perf_counter()
+    # Sessions print their tool calls and answers, keep stdout for results
+    with contextlib.redirect_stdout(open(os.devnull, "w")) as devnull:
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+                futures = [
+                    executor.submit(
+                        run_task,
+                        client,
+                        limiter,
+                        task,
+                        max_parallel_tools,
+                        token_budget,
+                        summarize,
+                    )
+                    for task in tasks
+                ]
+                for done, future in enumerate(as_completed(futures), 1):
+                    result = future.result()
+                    output.write(json.dumps(result) + "\n")
+                    output.flush()
+                    if result["status"] != "ok":
+                        failed += 1
+                    print(
+                        f"[{done}/{len(tasks)}] {result['id']}: {result['status']} "
+                        f"in {result['elapsed_s']:.1f}s",
+                        file=sys.stderr,
+                    )
+        finally:
+            devnull.close()
+    print(
+        f"Batch finished: {len(tasks) - failed}/{len(tasks)} ok in "
+        f"{time.perf_counter() - start:.1f}s, sessions waited {limiter.waited:.1f}s "
+        "on the rate limit",
+        file=sys.stderr,
+    )
+    return failed
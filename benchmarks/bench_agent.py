@@ -0,0 +1,300 @@
+import os
+import io
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+
+# Offline benchmark of the agent loop. A scripted FakeClient stands in for
+# genai.Client, every tool call goes through the real loop, dispatcher and
+# call_function against a scratch workspace.
+# Usage: python benchmarks/bench_agent.py [--scenario NAME] [--transcript FILE]
+#        [--stream] [--output results.json] [--compare previous.json]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from google.genai import types
+from fake_client import FakeClient, call_part, text_part
+from agent import run_agent
+from async_agent import run_agent_async
+import functions.dispatch as dispatch
+from functions.call_function import tool_cache
+
+
+def make_workspace(root, files=40, large_files=4, large_size=400_000):
+    rng = random.Random(0)
+    for i in range(files):
+        directory = os.path.join(root, f"pkg{i % 5}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"module{i}.py"), "w") as f:
+            for j in range(rng.randint(20, 200)):
+                f.write(f"def function_{i}_{j}(value):\n    return value * {j}\n")
+    os.makedirs(os.path.join(root, "data"), exist_ok=True)
+    for i in range(large_files):
+        with open(os.path.join(root, "data", f"large{i}.txt"), "w") as f:
+            line = f"record {i} " + "x" * 70 + "\n"
+            f.write(line * (large_size // len(line)))
+    with open(os.path.join(root, "script.py"), "w") as f:
+        f.write("import sys\nprint('ran with', sys.argv[1:])\n")
+
+
+def _call(workspace, name, **args):
+    # The scripted model passes the scratch workspace as its working directory
+    return call_part(name, working_directory=workspace, **args)
+
+
+def scenario_many_tool_calls(workspace):
+    turns = []
+    for turn in range(6):
+        chunk = [_call(workspace, "get_files_info", directory=f"pkg{turn % 5}")]
+        for i in range(7):
+            chunk.append(
+                _call(
+                    workspace,
+                    "get_file_content",
+                    file_path=f"pkg{i % 5}/module{(turn * 7 + i) % 40}.py",
+                )
+            )
+        turns.append([chunk])
+    turns.append([[text_part("Read everything.")]])
+    return turns
+
+
+def scenario_large_files(workspace):
+    turns = []
+    for i in range(4):
+        turns.append(
+            [[_call(workspace, "get_file_content", file_path=f"data/large{i}.txt")]]
+        )
+        turns.append(
+            [
+                [
+                    _call(
+                        workspace,
+                        "get_file_content",
+                        file_path=f"data/large{i}.txt",
+                        start_line=2000,
+                        end_line=2100,
+                    )
+                ]
+            ]
+        )
+    turns.append([[text_part("Large files inspected.")]])
+    return turns
+
+
+def scenario_long_session(workspace):
+    rng = random.Random(1)
+    turns = []
+    for turn in range(19):
+        kind = turn % 4
+        if kind == 0:
+            part = _call(workspace, "get_files_info", directory=".", max_depth=3)
+        elif kind == 1:
+            part = _call(
+                workspace,
+                "get_file_content",
+                file_path=f"pkg{turn % 5}/module{turn}.py",
+            )
+        elif kind == 2:
+            part = _call(
+                workspace,
+                "write_file",
+                file_path=f"notes/turn{turn}.txt",
+                content="note " * rng.randint(10, 500),
+            )
+        else:
+            part = _call(
+                workspace, "run_python_file", file_path="script.py", args=[str(turn)]
+            )
+        turns.append([[text_part(f"Step {turn}. "), part]])
+    turns.append([[text_part("Session finished.")]])
+    return turns
+
+
+SCENARIOS = {
+    "many_tool_calls": scenario_many_tool_calls,
+    "large_files": scenario_large_files,
+    "long_session": scenario_long_session,
+}
+
+
+def load_transcript(path):
+    # {"turns": [[[part, ...], ...], ...]} with parts in the types.Part JSON form
+    with open(path) as f:
+        data = json.load(f)
+    return [
+        [[types.Part.model_validate(part) for part in chunk] for chunk in turn]
+        for turn in data["turns"]
+    ]
+
+
+class TimingClient(FakeClient):
+    # Records when each request starts, sizes are measured after the run
+    def __init__(self, script, **kwargs):
+        super().__init__(script, **kwargs)
+        self.request_times = []
+
+    def _next_turn(self, contents):
+        self.request_times.append(time.perf_counter())
+        return super()._next_turn(contents)
+
+
+def transcript_bytes(contents):
+    return sum(len(content.model_dump_json(exclude_none=True)) for content in contents)
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+def summarize(values):
+    return {
+        "count": len(values),
+        "p50": percentile(values, 0.5),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+        "max": max(values, default=0.0),
+        "total": sum(values),
+    }
+
+
+def run_scenario(name, script, stream=False, latency=0.0):
+    client = TimingClient(script, latency=latency)
+    # Every scenario starts cold
+    tool_cache.clear()
+    messages = [types.Content(role="user", parts=[types.Part(text=f"Run {name}")])]
+
+    tool_times = {}
+    original_call = dispatch.call_function
+
+    def timed_call(function_call, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original_call(function_call, **kwargs)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            tool_times.setdefault(function_call.name, []).append(elapsed)
+
+    dispatch.call_function = timed_call
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        # Tool progress lines are noise here
+        with contextlib.redirect_stdout(io.StringIO()):
+            if stream:
+                asyncio.run(run_agent_async(client, messages))
+            else:
+                run_agent(client, messages)
+    finally:
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        dispatch.call_function = original_call
+
+    marks = client.request_times + [start + elapsed]
+    turn_ms = [(b - a) * 1000 for a, b in zip(marks, marks[1:])]
+    all_tools = [t for times in tool_times.values() for t in times]
+    request_bytes = [transcript_bytes(contents) for contents in client.requests]
+    return {
+        "scenario": name,
+        "mode": "stream" if stream else "sync",
+        "turns": len(client.request_times),
+        "wall_ms": elapsed * 1000,
+        "turn_ms": turn_ms,
+        "turn_ms_summary": summarize(turn_ms),
+        "tool_ms": summarize(all_tools),
+        "tool_ms_by_name": {
+            name: summarize(t) for name, t in sorted(tool_times.items())
+        },
+        "transcript_bytes": request_bytes[-1] if request_bytes else 0,
+        "bytes_sent_total": sum(request_bytes),
+        "peak_memory_bytes": peak,
+    }
+
+
+def print_result(result, previous=None):
+    def delta(key, value):
+        if not previous or key not in previous or not previous[key]:
+            return ""
+        return f" ({(value / previous[key] - 1) * 100:+.1f}%)"
+
+    tools = result["tool_ms"]
+    print(f"{result['scenario']} [{result['mode']}]")
+    print(f"  turns              {result['turns']}")
+    print(
+        f"  wall time          {result['wall_ms']:.1f} ms{delta('wall_ms', result['wall_ms'])}"
+    )
+    print(
+        f"  turn time          p50={result['turn_ms_summary']['p50']:.1f} ms "
+        f"p95={result['turn_ms_summary']['p95']:.1f} ms"
+    )
+    print(
+        f"  tool latency       n={tools['count']} p50={tools['p50']:.2f} ms "
+        f"p95={tools['p95']:.2f} ms p99={tools['p99']:.2f} ms max={tools['max']:.2f} ms"
+    )
+    print(
+        f"  transcript bytes   {result['transcript_bytes']:,} final, "
+        f"{result['bytes_sent_total']:,} sent in total"
+        f"{delta('bytes_sent_total', result['bytes_sent_total'])}"
+    )
+    print(
+        f"  peak memory        {result['peak_memory_bytes'] / 1024:,.0f} KB"
+        f"{delta('peak_memory_bytes', result['peak_memory_bytes'])}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline agent loop benchmark")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append")
+    parser.add_argument("--transcript", help="Replay a recorded transcript JSON file")
+    parser.add_argument("--stream", action="store_true", help="Use the async loop")
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Simulated model latency in seconds"
+    )
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    args = parser.parse_args()
+
+    previous = {}
+    if args.compare:
+        with open(args.compare) as f:
+            for result in json.load(f)["results"]:
+                previous[(result["scenario"], result["mode"])] = result
+
+    results = []
+    with tempfile.TemporaryDirectory() as workspace:
+        make_workspace(workspace)
+        runs = []
+        if args.transcript:
+            runs.append(
+                (os.path.basename(args.transcript), load_transcript(args.transcript))
+            )
+        for name in args.scenario or ([] if args.transcript else sorted(SCENARIOS)):
+            runs.append((name, SCENARIOS[name](workspace)))
+
+        for name, script in runs:
+            result = run_scenario(
+                name, script, stream=args.stream, latency=args.latency
+            )
+            print_result(result, previous.get((result["scenario"], result["mode"])))
+            results.append(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"created": time.time(), "results": results}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import os
+import sys
+import time
+import random
+
+# Throughput of Calculator.evaluate before and after compiled programs.
+# Usage: python benchmarks/bench_calculator.py [expressions]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "calculator"))
+
+from pkg.calculator import Calculator
+
+
+class LegacyCalculator:
+    # The original split + shunting-yard evaluate, run from scratch every call
+    def __init__(self):
+        self.operators = {
+            "+": lambda a, b: a + b,
+            "-": lambda a, b: a - b,
+            "*": lambda a, b: a * b,
+            "/": lambda a, b: a / b,
+        }
+        self.precedence = {"+": 1, "-": 1, "*": 2, "/": 2}
+
+    def evaluate(self, expression):
+        values = []
+        operators = []
+        for token in expression.strip().split():
+            if token in self.operators:
+                while (
+                    operators
+                    and self.precedence[operators[-1]] >= self.precedence[token]
+                ):
+                    self._apply(operators, values)
+                operators.append(token)
+            else:
+                values.append(float(token))
+        while operators:
+            self._apply(operators, values)
+        return values[0]
+
+    def _apply(self, operators, values):
+        operator = operators.pop()
+        b = values.pop()
+        a = values.pop()
+        values.append(self.operators[operator](a, b))
+
+
+def make_expressions(count, distinct, rng):
+    pool = []
+    for _ in range(distinct):
+        terms = [str(rng.randint(1, 99)) for _ in range(rng.randint(3, 12))]
+        expression = terms[0]
+        for term in terms[1:]:
+            expression += f" {rng.choice('+-*')} {term}"
+        pool.append(expression)
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def rate(label, count, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {count / elapsed:12,.0f} evals/s")
+    return elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rng = random.Random(0)
+    repeated = make_expressions(count, 200, rng)
+    unique = make_expressions(count, count, rng)
+
+    legacy = LegacyCalculator()
+    print(f"{count} expressions\n")
+    for name, expressions in (("200 distinct", repeated), ("all distinct", unique)):
+        calculator = Calculator()
+        rate(
+            f"legacy evaluate ({name})",
+            count,
+            lambda es=expressions: [legacy.evaluate(e) for e in es],
+        )
+        rate(
+            f"evaluate ({name})",
+            count,
+            lambda c=calculator, es=expressions: [c.evaluate(e) for e in es],
+        )
+        rate(
+            f"evaluate_expressions ({name})",
+            count,
+            lambda c=calculator, es=expressions: list(c.evaluate_expressions(es)),
+        )
+        print()
+
+    # One formula over many rows of variable bindings
+    calculator = Calculator()
+    expression = "x * 3 + y / 2 - x * y + 7"
+    xs = [rng.random() for _ in range(count)]
+    ys = [rng.random() + 1 for _ in range(count)]
+    rate(
+        "evaluate per row",
+        count,
+        lambda: [
+            calculator.evaluate(expression, {"x": x, "y": y}) for x, y in zip(xs, ys)
+        ],
+    )
+    rate(
+        "evaluate_many",
+        count,
+        lambda: calculator.evaluate_many(expression, {"x": xs, "y": ys}),
+    )
+
+
+if __name__ == "__main__":
+    main()
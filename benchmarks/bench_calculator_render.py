@@ -0,0 +1,87 @@
+import io
+import os
+import json
+import sys
+import time
+import random
+
+# Records per second rendering bulk calculator results: format_json_output
+# per result (pretty and compact) versus the streaming NDJSONWriter, with the
+# stdlib string encoder and with orjson when it is installed.
+# Usage: python benchmarks/bench_calculator_render.py [results]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "calculator"))
+
+from pkg.calculator import Calculator
+from pkg.render import (
+    NDJSONWriter,
+    _encode_string_stdlib,
+    format_json_output,
+    orjson,
+)
+
+
+def make_expressions(count, rng):
+    expressions = []
+    for _ in range(count):
+        terms = [str(rng.randint(1, 99)) for _ in range(rng.randint(3, 12))]
+        expression = terms[0]
+        for term in terms[1:]:
+            expression += f" {rng.choice('+-*/')} {term}"
+        expressions.append(expression)
+    return expressions
+
+
+def per_result(results, indent):
+    # The way a caller had to do it before: one dict and dumps per record
+    stream = io.BytesIO()
+    for expression, result, error in results:
+        if error is None:
+            text = format_json_output(expression, result, indent)
+        else:
+            text = json.dumps({"expression": expression, "error": error}, indent=indent)
+        stream.write(text.encode() + b"\n")
+    return stream.getbuffer().nbytes
+
+
+def streaming(results, encode):
+    stream = io.BufferedWriter(io.BytesIO())
+    writer = NDJSONWriter(stream, encode)
+    writer.write_results(results)
+    writer.flush()
+    return stream.raw.getbuffer().nbytes
+
+
+def rate(label, count, func):
+    start = time.perf_counter()
+    size = func()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<36} {count / elapsed:12,.0f} records/s {size / count:6.1f} bytes each"
+    )
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    expressions = make_expressions(count, random.Random(0))
+    results = list(Calculator().evaluate_expressions(expressions))
+    # Division by zero shows up as error records
+    count = len(results)
+    print(f"{count} results\n")
+
+    rate("format_json_output indent=2", count, lambda: per_result(results, 2))
+    rate("format_json_output compact", count, lambda: per_result(results, None))
+    rate(
+        "NDJSONWriter (stdlib)",
+        count,
+        lambda: streaming(results, _encode_string_stdlib),
+    )
+    if orjson is not None:
+        rate("NDJSONWriter (orjson)", count, lambda: streaming(results, orjson.dumps))
+    else:
+        print("NDJSONWriter (orjson)                not installed")
+
+
+if __name__ == "__main__":
+    main()
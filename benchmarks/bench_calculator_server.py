@@ -0,0 +1,128 @@
+import os
+import sys
+import time
+import random
+import socket
+import tempfile
+import threading
+import subprocess
+
+# Expressions per second through calculator/main.py: one process per
+# expression versus one --serve process fed over a pipe and a Unix socket,
+# with all requests pipelined.
+# Usage: python benchmarks/bench_calculator_server.py [expressions] [processes]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CALCULATOR = os.path.join(ROOT, "calculator")
+MAIN = os.path.join(CALCULATOR, "main.py")
+
+
+def make_expressions(count, rng):
+    expressions = []
+    for _ in range(count):
+        terms = [str(rng.randint(1, 99)) for _ in range(rng.randint(3, 12))]
+        expression = terms[0]
+        for term in terms[1:]:
+            expression += f" {rng.choice('+-*/')} {term}"
+        expressions.append(expression)
+    return expressions
+
+
+def per_process(expressions):
+    for expression in expressions:
+        subprocess.run(
+            [sys.executable, MAIN, expression],
+            cwd=CALCULATOR,
+            stdout=subprocess.DEVNULL,
+            check=True,
+        )
+
+
+def over_pipe(expressions):
+    data = "".join(expression + "\n" for expression in expressions).encode()
+    process = subprocess.run(
+        [sys.executable, MAIN, "--serve"],
+        cwd=CALCULATOR,
+        input=data,
+        capture_output=True,
+        check=True,
+    )
+    return process.stdout.count(b"\n")
+
+
+def over_socket(expressions, path):
+    data = "".join(expression + "\n" for expression in expressions).encode()
+    with socket.socket(socket.AF_UNIX) as sock:
+        sock.connect(path)
+
+        def send():
+            sock.sendall(data)
+            sock.shutdown(socket.SHUT_WR)
+
+        # Send from another thread, replies have to be read while sending
+        sender = threading.Thread(target=send)
+        sender.start()
+        replies = 0
+        while True:
+            chunk = sock.recv(1 << 16)
+            if not chunk:
+                break
+            replies += chunk.count(b"\n")
+        sender.join()
+    return replies
+
+
+def start_server(path):
+    server = subprocess.Popen(
+        [sys.executable, MAIN, "--serve", "--socket", path], cwd=CALCULATOR
+    )
+    deadline = time.monotonic() + 10
+    while not os.path.exists(path):
+        if time.monotonic() > deadline:
+            raise RuntimeError("calculator server did not start")
+        time.sleep(0.01)
+    return server
+
+
+def rate(label, count, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    if result is not None and result != count:
+        raise RuntimeError(f"{label}: {result} replies for {count} expressions")
+    print(f"{label:<36} {count / elapsed:12,.0f} expressions/s")
+    return count / elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    expressions = make_expressions(count, random.Random(0))
+
+    baseline = rate(
+        "one process per expression",
+        processes,
+        lambda: per_process(expressions[:processes]),
+    )
+    # Includes starting the server process once
+    piped = rate("--serve over stdin", count, lambda: over_pipe(expressions))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "calculator.sock")
+        server = start_server(path)
+        try:
+            socketed = rate(
+                "--serve --socket", count, lambda: over_socket(expressions, path)
+            )
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(
+        f"\nspeedup: {piped / baseline:,.0f}x over stdin, "
+        f"{socketed / baseline:,.0f}x over the socket"
+    )
+
+
+if __name__ == "__main__":
+    main()
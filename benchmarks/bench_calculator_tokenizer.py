@@ -0,0 +1,65 @@
+import os
+import sys
+import time
+import random
+import tracemalloc
+
+# Tokens/sec of the original split-based evaluate against the single-pass
+# tokenizer and parser, without the compile cache.
+# Usage: python benchmarks/bench_calculator_tokenizer.py
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "calculator"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pkg.calculator import Calculator, tokenize
+from bench_calculator import LegacyCalculator
+
+
+def make_expression(tokens, rng):
+    # Space separated so the legacy tokenizer can read it too
+    parts = [str(rng.randint(1, 99))]
+    while len(parts) < tokens:
+        parts.append(rng.choice("+-*"))
+        parts.append(str(rng.randint(1, 99)))
+    return " ".join(parts)
+
+
+def measure(func, expression, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(expression)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(expression)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    rng = random.Random(0)
+    legacy = LegacyCalculator()
+    calculator = Calculator()
+
+    cases = [
+        ("legacy split + evaluate", legacy.evaluate),
+        ("tokenize only", lambda e: sum(1 for _ in tokenize(e))),
+        ("tokenize + compile + run", lambda e: calculator._compile(e).run()),
+    ]
+
+    print(f"{'tokens':>7}  {'case':<26} {'tokens/s':>14} {'peak memory':>12}")
+    for tokens in (11, 1001, 10001, 100001):
+        expression = make_expression(tokens, rng)
+        repeat = max(1, 200000 // tokens)
+        for label, func in cases:
+            elapsed, peak = measure(func, expression, repeat)
+            print(
+                f"{tokens:>7}  {label:<26} {tokens * repeat / elapsed:14,.0f} "
+                f"{peak / 1024:10.1f}KB"
+            )
+        print()
+
+
+if __name__ == "__main__":
+    main()
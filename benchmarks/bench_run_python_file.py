@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+import subprocess
+
+# Compares a cold "python file.py" spawn with the warm run_python_file pool
+# Usage: python benchmarks/bench_run_python_file.py [runs]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from functions.python_pool import WarmPythonPool
+
+CALCULATOR = os.path.join(ROOT, "calculator")
+CASES = [
+    ("main.py", ["3 + 5"]),
+    ("tests.py", []),
+]
+
+
+def cold_run(target_file, args):
+    result = subprocess.run(
+        ["python", target_file] + args,
+        cwd=CALCULATOR,
+        capture_output=True,
+        timeout=30,
+    )
+    return result.returncode
+
+
+def warm_run(pool, target_file, args):
+    return pool.run(target_file, args, CALCULATOR, timeout=30).returncode
+
+
+def measure(label, runs, func):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    mean = sum(timings) / len(timings)
+    print(
+        f"{label:<24} mean={mean * 1000:8.2f} ms  "
+        f"p50={timings[len(timings) // 2] * 1000:8.2f} ms  "
+        f"min={timings[0] * 1000:8.2f} ms"
+    )
+    return mean
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    pool = WarmPythonPool(size=1, max_runs=runs * len(CASES) + 1)
+    pool.warm_up()
+    try:
+        for file_name, args in CASES:
+            target_file = os.path.join(CALCULATOR, file_name)
+            print(f"{file_name} {' '.join(args)} ({runs} runs)")
+            cold = measure(
+                "cold spawn", runs, lambda f=target_file, a=args: cold_run(f, a)
+            )
+            warm = measure(
+                "warm pool", runs, lambda f=target_file, a=args: warm_run(pool, f, a)
+            )
+            print(f"{'speedup':<24} {cold / warm:.1f}x\n")
+    finally:
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import os
+import re
+import sys
+import time
+import random
+import tempfile
+
+# Compares search_files (trigram index) with a naive scan of every file
+# on a synthetic tree. Usage: python benchmarks/bench_search_files.py [files]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from functions.search_files import search_files
+
+WORDS = [
+    "value",
+    "result",
+    "parser",
+    "token",
+    "render",
+    "config",
+    "client",
+    "request",
+    "buffer",
+    "index",
+    "stream",
+    "handler",
+    "session",
+    "cache",
+]
+QUERIES = [
+    ("def handle_request_42", False),
+    ("class SessionCache17", False),
+    (r"def parse_\w+_99\(", True),
+    ("not present anywhere", False),
+]
+
+
+def make_tree(root, files):
+    rng = random.Random(0)
+    for i in range(files):
+        directory = os.path.join(root, f"pkg{i % 40}", f"mod{i % 7}")
+        os.makedirs(directory, exist_ok=True)
+        lines = []
+        for j in range(120):
+            a, b = rng.choice(WORDS), rng.choice(WORDS)
+            lines.append(f"    {a}_{b} = compute_{b}({a}, {j})")
+        lines.append(f"def handle_request_{i}(session):")
+        lines.append(f"class SessionCache{i}:")
+        lines.append(f"def parse_{rng.choice(WORDS)}_{i}(text):")
+        with open(os.path.join(directory, f"file{i}.py"), "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+def naive_search(root, pattern, regex):
+    matcher = re.compile(pattern if regex else re.escape(pattern))
+    matches = []
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(directory, name)
+            with open(path, encoding="utf-8", errors="replace") as f:
+                for number, line in enumerate(f, 1):
+                    if matcher.search(line):
+                        matches.append((path, number))
+    return matches
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    with tempfile.TemporaryDirectory() as root:
+        make_tree(root, files)
+        print(f"{files} files\n")
+
+        build = timed(lambda: search_files(root, "warm up the index"))
+        print(f"index build (first search): {build:8.1f} ms\n")
+
+        print(f"{'query':<28} {'naive':>10} {'indexed':>10} {'speedup':>8}")
+        for pattern, regex in QUERIES:
+            naive = timed(lambda p=pattern, r=regex: naive_search(root, p, r))
+            indexed = timed(lambda p=pattern, r=regex: search_files(root, p, regex=r))
+            print(
+                f"{pattern:<28} {naive:8.1f}ms {indexed:8.1f}ms {naive / indexed:7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
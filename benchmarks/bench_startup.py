@@ -0,0 +1,102 @@
+import os
+import sys
+import time
+import statistics
+import subprocess
+
+# Startup cost of the CLI and of the modules a session needs. Each case runs
+# in a fresh interpreter; the slowest imports come from "python -X importtime".
+# Usage: python benchmarks/bench_startup.py [runs]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CASES = [
+    ("interpreter", ["-c", "pass"]),
+    ("main.py --help", ["main.py", "--help"]),
+    ("import main", ["-c", "import main"]),
+    ("import agent", ["-c", "import agent"]),
+    ("tool schema", ["-c", "from agent import generate_config; generate_config()"]),
+    (
+        "first tool call",
+        [
+            "-c",
+            "from functions.registry import get_function; "
+            "get_function('get_files_info')('calculator')",
+        ],
+    ),
+]
+
+
+def wall_time(args, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable] + args, cwd=ROOT, capture_output=True, check=True
+        )
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), min(timings)
+
+
+def slowest_imports(code, count=10):
+    # importtime lines: "import time: self [us] | cumulative | package"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        rows.append((int(self_us), int(cumulative_us), name.strip()))
+    total = sum(self_us for self_us, _, _ in rows)
+    rows.sort(reverse=True)
+    return total, rows[:count]
+
+
+def resolve_per_call(runs=100_000):
+    # The old per-call __import__ + getattr against a registry lookup
+    from functions.registry import FUNCTION_MAP, get_function
+
+    module_path, function_name = FUNCTION_MAP["get_file_content"]
+    start = time.perf_counter()
+    for _ in range(runs):
+        getattr(__import__(module_path, fromlist=[function_name]), function_name)
+    dynamic = (time.perf_counter() - start) / runs * 1e9
+
+    get_function("get_file_content")
+    start = time.perf_counter()
+    for _ in range(runs):
+        get_function("get_file_content")
+    registry = (time.perf_counter() - start) / runs * 1e9
+    return dynamic, registry
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    print(f"Wall time in a fresh interpreter, {runs} runs each")
+    for label, args in CASES:
+        median, best = wall_time(args, runs)
+        print(f"  {label:<20} median {median:7.1f} ms   best {best:7.1f} ms")
+
+    for code in ("import main", "import agent"):
+        total, top = slowest_imports(code)
+        print(f"\n-X importtime for {code!r}: {total / 1000:.1f} ms of imports")
+        for self_us, cumulative_us, name in top:
+            print(
+                f"  {self_us / 1000:8.1f} ms self {cumulative_us / 1000:8.1f} ms total  {name}"
+            )
+
+    dynamic, registry = resolve_per_call()
+    print("\nTool lookup per call")
+    print(f"  __import__ + getattr {dynamic:8.0f} ns")
+    print(f"  registry             {registry:8.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
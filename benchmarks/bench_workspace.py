@@ -0,0 +1,74 @@
+import os
+import sys
+import time
+import tempfile
+
+# Per-call cost of resolving a tool's path: the lexical checks every tool
+# used to repeat versus the shared Workspace, and whole get_file_content /
+# get_files_info calls on a small file. Usage:
+#   python benchmarks/bench_workspace.py [calls]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from functions.get_file_content import get_file_content
+from functions.get_files_info import get_files_info
+from functions.workspace import Workspace, get_workspace
+
+PATHS = ["main.py", "pkg/sub/module.py", "alias/sub/module.py", "pkg/../main.py"]
+
+
+def legacy_resolve(working_directory, file_path):
+    # What each tool did on every call before the Workspace
+    if not os.path.isabs(working_directory):
+        if not os.path.exists(os.path.abspath(working_directory)):
+            project_root = ROOT
+            potential_path = os.path.join(project_root, working_directory)
+            if os.path.exists(potential_path):
+                working_directory = potential_path
+
+    working_directory = os.path.abspath(working_directory)
+    target_file = os.path.normpath(os.path.join(working_directory, file_path))
+    if os.path.commonpath([working_directory, target_file]) != working_directory:
+        return None
+    return target_file
+
+
+def make_tree(root):
+    os.makedirs(os.path.join(root, "pkg", "sub"))
+    for path in ("main.py", "pkg/sub/module.py"):
+        with open(os.path.join(root, path), "w") as f:
+            f.write("print('hello')\n")
+    os.symlink("pkg", os.path.join(root, "alias"))
+
+
+def per_call_us(func, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        func(PATHS[i % len(PATHS)])
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    with tempfile.TemporaryDirectory() as root:
+        make_tree(root)
+        # A relative working directory, as the agent passes it, goes through
+        # the exists() probing in the legacy code
+        relative = os.path.relpath(root)
+        workspace = get_workspace(relative)
+
+        print(f"{calls} calls, per call:\n")
+        rows = [
+            ("legacy lexical resolve", lambda p: legacy_resolve(relative, p)),
+            ("Workspace per call", lambda p: Workspace(relative).close()),
+            ("Workspace.resolve (cached)", workspace.resolve),
+            ("get_file_content", lambda p: get_file_content(relative, "main.py")),
+            ("get_files_info", lambda p: get_files_info(relative, "pkg")),
+        ]
+        for name, func in rows:
+            print(f"{name:<28} {per_call_us(func, calls):8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
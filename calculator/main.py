@@ -2,7 +2,74 @@
 
 import sys
 from pkg.calculator import Calculator
-from pkg.render import format_json_output
+from pkg.render import NDJSONWriter, format_json_output
+
+# Bytes read at a time in server mode
+READ_SIZE = 64 * 1024
+
+
+def answer(calculator, lines):
+    # Yields (expression, result, error) for every input line, blank lines
+    # included so replies can be matched to requests by position
+    for line in lines:
+        expression = line.decode("utf-8", errors="replace").strip()
+        try:
+            result = calculator.evaluate(expression)
+        except Exception as e:
+            yield expression, None, str(e)
+            continue
+        if result is None:
+            yield expression, None, "Expression is empty"
+        else:
+            yield expression, result, None
+
+
+def serve_stream(calculator, infile, outfile):
+    # Everything received so far is answered before one flush, so clients
+    # can send many requests without waiting for each reply
+    writer = NDJSONWriter(outfile)
+    pending = b""
+    while True:
+        chunk = infile.read1(READ_SIZE)
+        if not chunk:
+            break
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        if lines:
+            writer.write_results(answer(calculator, lines))
+            writer.flush()
+    if pending.strip():
+        writer.write_results(answer(calculator, [pending]))
+        writer.flush()
+
+
+def serve_socket(calculator, path):
+    import os
+    import stat
+    import socketserver
+
+    class Handler(socketserver.StreamRequestHandler):
+        # Buffer replies, they are flushed once per batch of requests
+        wbufsize = READ_SIZE
+
+        def handle(self):
+            serve_stream(calculator, self.rfile, self.wfile)
+
+    # Only a stale socket from an earlier run is replaced, never another file
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        pass
+    else:
+        if not stat.S_ISSOCK(mode):
+            sys.exit(f"Error: {path} exists and is not a socket")
+        os.unlink(path)
+    with socketserver.ThreadingUnixStreamServer(path, Handler) as server:
+        server.daemon_threads = True
+        try:
+            server.serve_forever()
+        finally:
+            os.unlink(path)
 
 
 def main():
@@ -10,9 +77,21 @@ def main():
     if len(sys.argv) <= 1:
         print("Calculator App")
         print('Usage: python main.py "<expression>"')
+        print("       python main.py --serve [--socket PATH]")
         print('Example: python main.py "3 + 5"')
         return
 
+    if sys.argv[1] == "--serve":
+        # One expression per line from stdin, or from each client of a Unix
+        # socket, one JSON result per line back
+        if len(sys.argv) == 4 and sys.argv[2] == "--socket":
+            serve_socket(calculator, sys.argv[3])
+        elif len(sys.argv) == 2:
+            serve_stream(calculator, sys.stdin.buffer, sys.stdout.buffer)
+        else:
+            print("Usage: python main.py --serve [--socket PATH]")
+        return
+
     expression = " ".join(sys.argv[1:])
     try:
         result = calculator.evaluate(expression)
@@ -26,4 +105,7 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
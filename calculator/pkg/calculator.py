@@ -1,62 +1,257 @@
 # calculator/pkg/calculator.py
 
+import re
+import operator
+from functools import lru_cache
+
+# Opcodes of a compiled program
+PUSH = 0
+LOAD = 1
+ADD = 2
+SUB = 3
+MUL = 4
+DIV = 5
+NEG = 6
+
+# Used to fold constant operands while compiling
+FOLD = {
+    ADD: operator.add,
+    SUB: operator.sub,
+    MUL: operator.mul,
+    DIV: operator.truediv,
+}
+
+# Token kinds, the group numbers in TOKEN_PATTERN
+NUMBER = 1
+NAME = 2
+SYMBOL = 3
+INVALID = 4
+
+TOKEN_PATTERN = re.compile(
+    r"""\s*(?:
+        ((?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?)
+        |([A-Za-z_][A-Za-z0-9_]*)
+        |([-+*/()])
+        |(\S)
+    )""",
+    re.VERBOSE,
+)
+
+
+@lru_cache(maxsize=None)
+def _numpy():
+    # Imported on first use, a single evaluation never pays for it
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def tokenize(expression):
+    # Yields (kind, text, position) one token at a time, no token list is built
+    for match in TOKEN_PATTERN.finditer(expression):
+        kind = match.lastindex
+        yield kind, match[kind], match.start(kind)
+
+
+def _emit(code, opcode):
+    # Appends an operator, folding it away when its operands are constants
+    b = code[-1]
+    if opcode == NEG:
+        if b[0] == PUSH:
+            code[-1] = (PUSH, -b[1])
+        else:
+            code.append((NEG, None))
+        return
+
+    a = code[-2]
+    if a[0] == PUSH and b[0] == PUSH:
+        try:
+            code[-2] = (PUSH, FOLD[opcode](a[1], b[1]))
+        except ArithmeticError:
+            # Keep the operation so every run raises the error
+            code.append((opcode, None))
+        else:
+            code.pop()
+    else:
+        code.append((opcode, None))
+
+
+class Program:
+    # An expression compiled to postfix: a tuple of (opcode, argument) pairs
+    def __init__(self, expression, code, variables):
+        self.expression = expression
+        self.code = code
+        self.variables = variables
+        # Fully folded programs are a single constant
+        self.constant = None
+        if len(code) == 1 and code[0][0] == PUSH:
+            self.constant = code[0][1]
+
+    def run(self, bindings=None):
+        if self.constant is not None:
+            return self.constant
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        for op, arg in self.code:
+            if op == PUSH:
+                push(arg)
+            elif op == LOAD:
+                try:
+                    push(bindings[arg])
+                except (KeyError, TypeError):
+                    raise ValueError(f"unknown variable: {arg}")
+            elif op == NEG:
+                stack[-1] = -stack[-1]
+            else:
+                b = pop()
+                if op == ADD:
+                    stack[-1] = stack[-1] + b
+                elif op == SUB:
+                    stack[-1] = stack[-1] - b
+                elif op == MUL:
+                    stack[-1] = stack[-1] * b
+                else:
+                    stack[-1] = stack[-1] / b
+        return stack[0]
+
 
 class Calculator:
-    def __init__(self):
+    def __init__(self, cache_size=1024):
         self.operators = {
-            "+": lambda a, b: a + b,
-            "-": lambda a, b: a - b,
-            "*": lambda a, b: a * b,
-            "/": lambda a, b: a / b,
+            "+": ADD,
+            "-": SUB,
+            "*": MUL,
+            "/": DIV,
+            "neg": NEG,
         }
         self.precedence = {
             "+": 1,
             "-": 1,
             "*": 2,
             "/": 2,
+            # Unary minus
+            "neg": 3,
         }
+        # Compiled programs for recently seen expressions
+        self.compile = lru_cache(maxsize=cache_size)(self._compile)
 
-    def evaluate(self, expression):
+    def evaluate(self, expression, variables=None):
         if not expression or expression.isspace():
             return None
-        tokens = expression.strip().split()
-        return self._evaluate_infix(tokens)
+        return self.compile(expression).run(variables)
+
+    def evaluate_many(self, expression, bindings):
+        # Runs one program over arrays of variable values, one result per row
+        program = self.compile(expression)
+        np = _numpy()
+        if np is not None:
+            arrays = {
+                name: np.asarray(bindings[name], dtype=float)
+                for name in program.variables
+                if name in bindings
+            }
+            try:
+                with np.errstate(divide="raise", invalid="raise", over="ignore"):
+                    result = program.run(arrays)
+            except FloatingPointError:
+                # Division by zero or 0/0 somewhere: the runs per row below
+                # raise the same errors evaluate() does
+                pass
+            else:
+                if np.ndim(result) == 0:
+                    rows = max((len(a) for a in arrays.values()), default=1)
+                    result = np.full(rows, result, dtype=float)
+                return result
 
-    def _evaluate_infix(self, tokens):
-        values = []
+        # Without NumPy fall back to one run per row
+        names = [name for name in program.variables if name in bindings]
+        columns = [bindings[name] for name in names]
+        rows = zip(*columns) if columns else [()]
+        results = [program.run(dict(zip(names, row))) for row in rows]
+        return results if np is None else np.asarray(results, dtype=float)
+
+    def evaluate_expressions(self, expressions, variables=None):
+        # Yields (expression, result, error) for each expression, e.g. lines of a file
+        for expression in expressions:
+            expression = expression.strip()
+            if not expression:
+                continue
+            try:
+                yield expression, self.compile(expression).run(variables), None
+            except Exception as e:
+                yield expression, None, str(e)
+
+    def _compile(self, expression):
+        code = []
+        variables = []
+        # (operator, position) pairs waiting for their right operand
         operators = []
+        opcodes = self.operators
+        precedence = self.precedence
+        expect_operand = True
+        position = 0
 
-        for token in tokens:
-            if token in self.operators:
+        for kind, text, position in tokenize(expression):
+            if kind == NUMBER or kind == NAME:
+                if not expect_operand:
+                    raise ValueError(
+                        f"unexpected operand {text} at position {position}"
+                    )
+                if kind == NUMBER:
+                    code.append((PUSH, float(text)))
+                else:
+                    code.append((LOAD, text))
+                    if text not in variables:
+                        variables.append(text)
+                expect_operand = False
+            elif kind == INVALID:
+                raise ValueError(f"invalid token: {text} at position {position}")
+            elif text == "(":
+                if not expect_operand:
+                    raise ValueError(f"unexpected ( at position {position}")
+                operators.append(("(", position))
+            elif text == ")":
+                if expect_operand:
+                    raise ValueError(f"unexpected ) at position {position}")
+                while operators and operators[-1][0] != "(":
+                    _emit(code, opcodes[operators.pop()[0]])
+                if not operators:
+                    raise ValueError(f"unmatched ) at position {position}")
+                operators.pop()
+            elif expect_operand:
+                if text != "-":
+                    raise ValueError(
+                        f"not enough operands for operator {text} at position {position}"
+                    )
+                operators.append(("neg", position))
+            else:
+                token_precedence = precedence[text]
                 while (
                     operators
-                    and operators[-1] in self.operators
-                    and self.precedence[operators[-1]] >= self.precedence[token]
+                    and operators[-1][0] != "("
+                    and precedence[operators[-1][0]] >= token_precedence
                 ):
-                    self._apply_operator(operators, values)
-                operators.append(token)
-            else:
-                try:
-                    values.append(float(token))
-                except ValueError:
-                    raise ValueError(f"invalid token: {token}")
-
-        while operators:
-            self._apply_operator(operators, values)
+                    _emit(code, opcodes[operators.pop()[0]])
+                operators.append((text, position))
+                expect_operand = True
 
-        if len(values) != 1:
-            raise ValueError("invalid expression")
+        if expect_operand:
+            if operators:
+                operator, position = operators[-1]
+                if operator != "(":
+                    operator = "-" if operator == "neg" else operator
+                    raise ValueError(
+                        f"not enough operands for operator {operator} at position {position}"
+                    )
+            raise ValueError(f"invalid expression at position {position}")
 
-        return values[0]
-
-    def _apply_operator(self, operators, values):
-        if not operators:
-            return
-
-        operator = operators.pop()
-        if len(values) < 2:
-            raise ValueError(f"not enough operands for operator {operator}")
+        while operators:
+            operator, position = operators.pop()
+            if operator == "(":
+                raise ValueError(f"unmatched ( at position {position}")
+            _emit(code, opcodes[operator])
 
-        b = values.pop()
-        a = values.pop()
-        values.append(self.operators[operator](a, b))
\ No newline at end of file
+        return Program(expression, tuple(code), tuple(variables))
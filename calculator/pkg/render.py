@@ -1,6 +1,13 @@
 # calculator/pkg/render.py
 
 import json
+import math
+from json.encoder import encode_basestring_ascii
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 def format_json_output(expression: str, result: float, indent: int = 2) -> str:
@@ -14,3 +21,72 @@ def format_json_output(expression: str, result: float, indent: int = 2) -> str:
         "result": result_to_dump,
     }
     return json.dumps(output_data, indent=indent)
+
+
+# Streaming output: one compact JSON record per line, assembled from
+# pre-encoded pieces and written straight to a binary stream, with no dict
+# per record. Strings are encoded with orjson when it is installed.
+
+EXPRESSION = b'{"expression":'
+RESULT = b',"result":'
+ERROR = b',"error":'
+END = b"}\n"
+
+# Spelled the way json.dumps spells them
+NON_FINITE = {
+    float("inf"): b"Infinity",
+    float("-inf"): b"-Infinity",
+}
+
+
+def _encode_string_stdlib(text: str) -> bytes:
+    return encode_basestring_ascii(text).encode("ascii")
+
+
+encode_string = orjson.dumps if orjson is not None else _encode_string_stdlib
+
+
+def encode_number(value) -> bytes:
+    # Whole floats collapse to integers, like format_json_output
+    if isinstance(value, float):
+        if value.is_integer():
+            return str(int(value)).encode("ascii")
+        if math.isnan(value):
+            return b"NaN"
+        special = NON_FINITE.get(value)
+        if special is not None:
+            return special
+        return repr(value).encode("ascii")
+    return str(value).encode("ascii")
+
+
+class NDJSONWriter:
+    def __init__(self, stream, encode=None):
+        # stream takes bytes and should be buffered, e.g. sys.stdout.buffer
+        self.stream = stream
+        self.encode = encode or encode_string
+        self.records = 0
+
+    def write_result(self, expression: str, result: float) -> None:
+        self.write_results(((expression, result, None),))
+
+    def write_error(self, expression: str, error: str) -> None:
+        self.write_results(((expression, None, error),))
+
+    def write_results(self, results) -> None:
+        # (expression, result, error) triples, e.g. Calculator.evaluate_expressions
+        encode = self.encode
+        write = self.stream.write
+        join = b"".join
+        count = 0
+        for expression, result, error in results:
+            if error is None:
+                value = (RESULT, encode_number(result))
+            else:
+                value = (ERROR, encode(error))
+            write(join((EXPRESSION, encode(expression), *value, END)))
+            count += 1
+        self.records += count
+
+    def flush(self) -> None:
+        self.stream.flush()
@@ -1,7 +1,13 @@
 # calculator/tests.py
 
+import io
+import os
+import json
+import tempfile
 import unittest
+from main import serve_socket, serve_stream
 from pkg.calculator import Calculator
+from pkg.render import NDJSONWriter, encode_string, _encode_string_stdlib
 
 
 class TestCalculator(unittest.TestCase):
@@ -44,6 +50,114 @@ class TestCalculator(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.calculator.evaluate("+ 3")
 
+    def test_without_spaces(self):
+        result = self.calculator.evaluate("3+5*2")
+        self.assertEqual(result, 13)
+
+    def test_parentheses(self):
+        result = self.calculator.evaluate("(2 + 3) * (4 - 1)")
+        self.assertEqual(result, 15)
+
+    def test_unary_minus(self):
+        result = self.calculator.evaluate("-2 * -(3 + 1)")
+        self.assertEqual(result, 8)
+
+    def test_scientific_notation(self):
+        result = self.calculator.evaluate("1.5e3 / 3 + 2E-1")
+        self.assertEqual(result, 500.2)
+
+    def test_error_position(self):
+        with self.assertRaisesRegex(ValueError, "position 4"):
+            self.calculator.evaluate("3 + $")
+
+    def test_unmatched_parenthesis(self):
+        with self.assertRaises(ValueError):
+            self.calculator.evaluate("(2 + 3")
+        with self.assertRaises(ValueError):
+            self.calculator.evaluate("2 + 3)")
+
+    def test_long_expression(self):
+        result = self.calculator.evaluate(" + ".join(["(1 * 2)"] * 5000))
+        self.assertEqual(result, 10000)
+
+    def test_compile_is_cached(self):
+        program = self.calculator.compile("2 * 3 + 1")
+        self.assertIs(self.calculator.compile("2 * 3 + 1"), program)
+        self.assertEqual(program.run(), 7)
+
+    def test_variables(self):
+        result = self.calculator.evaluate("x * 2 + y", {"x": 3, "y": 1})
+        self.assertEqual(result, 7)
+
+    def test_unknown_variable(self):
+        with self.assertRaises(ValueError):
+            self.calculator.evaluate("x + 1")
+
+    def test_evaluate_many(self):
+        result = self.calculator.evaluate_many("x * x - 1", {"x": [1, 2, 3]})
+        self.assertEqual(list(result), [0, 3, 8])
+
+    def test_evaluate_many_division_by_zero(self):
+        with self.assertRaises(ZeroDivisionError):
+            self.calculator.evaluate("1 / x", {"x": 0})
+        with self.assertRaises(ZeroDivisionError):
+            self.calculator.evaluate_many("1 / x", {"x": [1, 0, 2]})
+
+    def test_evaluate_expressions(self):
+        results = list(self.calculator.evaluate_expressions(["3 + 5", "", "1 / 0"]))
+        self.assertEqual(results[0], ("3 + 5", 8, None))
+        self.assertEqual(len(results), 2)
+        self.assertIsNone(results[1][1])
+        self.assertIsNotNone(results[1][2])
+
+
+class TestServer(unittest.TestCase):
+    def test_one_reply_per_line(self):
+        requests = io.BytesIO(b"3 + 5\n10 / 4\n\n1 / 0\n2 * 3")
+        replies = io.BytesIO()
+        serve_stream(Calculator(), requests, replies)
+        lines = [json.loads(line) for line in replies.getvalue().splitlines()]
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(lines[0], {"expression": "3 + 5", "result": 8})
+        self.assertEqual(lines[1]["result"], 2.5)
+        self.assertIn("error", lines[2])
+        self.assertIn("error", lines[3])
+        self.assertEqual(lines[4], {"expression": "2 * 3", "result": 6})
+
+    def test_socket_path_is_not_replaced(self):
+        with tempfile.NamedTemporaryFile() as f:
+            with self.assertRaises(SystemExit):
+                serve_socket(Calculator(), f.name)
+            self.assertTrue(os.path.isfile(f.name))
+
+
+class TestRender(unittest.TestCase):
+    def render(self, results, encode=None):
+        stream = io.BytesIO()
+        writer = NDJSONWriter(stream, encode)
+        writer.write_results(results)
+        self.assertEqual(writer.records, len(results))
+        return stream.getvalue()
+
+    def test_ndjson_records(self):
+        results = [("3 + 5", 8.0, None), ("10 / 4", 2.5, None), ("1 / 0", None, "x")]
+        for encode in (encode_string, _encode_string_stdlib):
+            lines = self.render(results, encode).splitlines()
+            self.assertEqual(lines[0], b'{"expression":"3 + 5","result":8}')
+            self.assertEqual(json.loads(lines[1])["result"], 2.5)
+            self.assertEqual(json.loads(lines[2])["error"], "x")
+
+    def test_strings_are_escaped(self):
+        output = self.render([('"q" \\ é\n', None, "bad\ttoken")])
+        record = json.loads(output)
+        self.assertEqual(record, {"expression": '"q" \\ é\n', "error": "bad\ttoken"})
+
+    def test_non_finite_results(self):
+        results = [("a", float("inf"), None), ("b", float("nan"), None)]
+        lines = self.render(results, _encode_string_stdlib).splitlines()
+        self.assertEqual(lines[0], b'{"expression":"a","result":Infinity}')
+        self.assertEqual(lines[1], b'{"expression":"b","result":NaN}')
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1 +1,50 @@
 MAX_CHARS = 10000
+MAX_PARALLEL_TOOLS = 4
+MODEL_NAME = "gemini-2.5-flash"
+MAX_TURNS = 20
+RETRY_MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+# Seconds for one model request including its retries, and for each attempt
+REQUEST_DEADLINE = 300
+REQUEST_ATTEMPT_TIMEOUT = 120
+# Send a second copy of requests slower than the recent p95 latency
+HEDGE_REQUESTS = False
+HEDGE_PERCENTILE = 0.95
+HEDGE_MIN_SAMPLES = 20
+WORKING_DIRECTORY = "./calculator"
+BATCH_CONCURRENCY = 4
+# Shared by every session of a batch, 0 disables the limit
+BATCH_REQUESTS_PER_MINUTE = 0
+BATCH_TOKENS_PER_MINUTE = 0
+RUN_PYTHON_TIMEOUT = 30
+RUN_PYTHON_MAX_OUTPUT_BYTES = 16 * 1024
+RUN_PYTHON_ECHO_OUTPUT = False
+WARM_POOL_ENABLED = True
+WARM_POOL_SIZE = 2
+WARM_POOL_MAX_RUNS = 50
+WARM_POOL_MAX_RSS_MB = 200
+TOOL_CACHE_MAX_BYTES = 8 * 1024 * 1024
+TOOL_CACHE_UNCHANGED_MARKER = True
+HISTORY_TOKEN_BUDGET = 100000
+HISTORY_KEEP_RECENT_TURNS = 2
+HISTORY_STUB_MIN_CHARS = 200
+MAX_LIST_ENTRIES = 500
+MAX_SEARCH_RESULTS = 50
+RESPONSE_CACHE_DIR = ".cache/responses"
+RESPONSE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Sessions are only logged with --session-log or --resume
+SESSION_LOG = False
+SESSION_DIR = ".sessions"
+SESSION_BLOB_MIN_BYTES = 1024
+# Shared by all files of one read_files call
+READ_FILES_MAX_CHARS = 30000
+READ_FILES_MAX_FILES = 50
+READ_FILES_WORKERS = 8
+# Tool responses in estimated tokens, per tool where the default does not fit
+TOOL_RESPONSE_MAX_TOKENS = 8000
+TOOL_RESPONSE_TOOL_TOKENS = {"run_python_file": 4000, "run_tests": 4000}
+# Shared by all tool responses of one model turn, 0 disables the limit
+TURN_RESPONSE_MAX_TOKENS = 20000
+# Identical lines in a row before command output collapses them
+COLLAPSE_REPEATS_MIN = 3
@@ -0,0 +1,113 @@
+import time
+import asyncio
+import threading
+
+from google.genai import types
+
+# Local stand-in for genai.Client that replays a scripted conversation.
+# A script is a list of turns, each turn a list of chunks, each chunk a list
+# of parts. The sync API returns a whole turn at once, the async streaming
+# API yields it chunk by chunk. A chunk that is an exception is raised
+# in its place, like a stream that breaks off.
+# failures injects trouble into requests in order: an exception is raised
+# instead of answering (the turn stays queued), a number is extra latency in
+# seconds, None is a normal request.
+
+
+def text_part(text):
+    return types.Part(text=text)
+
+
+def call_part(name, **args):
+    return types.Part(function_call=types.FunctionCall(name=name, args=args))
+
+
+def _estimate_tokens(contents):
+    size = 0
+    for content in contents or []:
+        for part in content.parts or []:
+            if part.text:
+                size += len(part.text)
+            elif part.function_response is not None:
+                size += len(str(part.function_response.response))
+            elif part.function_call is not None:
+                size += len(str(part.function_call.args))
+    return size // 4
+
+
+def _response(parts, contents, final):
+    usage = None
+    if final:
+        usage = types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=_estimate_tokens(contents),
+            candidates_token_count=_estimate_tokens(
+                [types.Content(role="model", parts=parts)]
+            ),
+        )
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=parts))],
+        usage_metadata=usage,
+    )
+
+
+class FakeClient:
+    def __init__(self, script, latency=0.0, chunk_delay=0.0, failures=None):
+        self.script = list(script)
+        self.failures = list(failures or [])
+        self.lock = threading.Lock()
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        # Every request's contents, for inspecting what the loop sent
+        self.requests = []
+        self.models = _FakeModels(self)
+        self.aio = _FakeAio(self)
+
+    def _next_turn(self, contents):
+        # Returns (turn, extra latency), or raises the injected failure
+        with self.lock:
+            self.requests.append(list(contents))
+            failure = self.failures.pop(0) if self.failures else None
+            if isinstance(failure, BaseException):
+                raise failure
+            turn = self.script.pop(0) if self.script else [[text_part("Done.")]]
+        return turn, failure or 0.0
+
+
+class _FakeModels:
+    def __init__(self, client):
+        self.client = client
+
+    def generate_content(self, *, model, contents, config=None):
+        turn, delay = self.client._next_turn(contents)
+        if self.client.latency or delay:
+            time.sleep(self.client.latency + delay)
+        for chunk in turn:
+            if isinstance(chunk, BaseException):
+                raise chunk
+        parts = [part for chunk in turn for part in chunk]
+        return _response(parts, contents, final=True)
+
+
+class _FakeAsyncModels:
+    def __init__(self, client):
+        self.client = client
+
+    async def generate_content_stream(self, *, model, contents, config=None):
+        turn, delay = self.client._next_turn(contents)
+
+        async def stream():
+            if self.client.latency or delay:
+                await asyncio.sleep(self.client.latency + delay)
+            for index, chunk in enumerate(turn):
+                if index and self.client.chunk_delay:
+                    await asyncio.sleep(self.client.chunk_delay)
+                if isinstance(chunk, BaseException):
+                    raise chunk
+                yield _response(chunk, contents, final=index == len(turn) - 1)
+
+        return stream()
+
+
+class _FakeAio:
+    def __init__(self, client):
+        self.models = _FakeAsyncModels(client)
@@ -1,28 +1,31 @@
 import google.genai.types as types
-from functions.get_files_info import schema_get_files_info
-from functions.get_file_content import schema_get_file_content
-from functions.run_python_file import schema_run_python_file
-from functions.write_file import schema_write_file
-
-available_functions = types.Tool(
-    function_declarations=[
-        schema_get_files_info,
-        schema_get_file_content,
-        schema_run_python_file,
-        schema_write_file,
-    ],
+from functions.registry import FUNCTION_MAP, READ_ONLY_FUNCTIONS, get_function
+from functions.result_cache import WRITE_FUNCTIONS, ToolResultCache
+from config import (
+    TOOL_CACHE_MAX_BYTES,
+    TOOL_CACHE_UNCHANGED_MARKER,
+    WORKING_DIRECTORY,
 )
+import tracing
+
+
+def new_tool_cache():
+    # One per session, entries and "already seen" markers are per conversation
+    return ToolResultCache(
+        max_bytes=TOOL_CACHE_MAX_BYTES,
+        use_unchanged_marker=TOOL_CACHE_UNCHANGED_MARKER,
+        read_only=READ_ONLY_FUNCTIONS,
+    )
 
-# Mapping of function names to their module and function
-FUNCTION_MAP = {
-    "get_files_info": ("functions.get_files_info", "get_files_info"),
-    "get_file_content": ("functions.get_file_content", "get_file_content"),
-    "run_python_file": ("functions.run_python_file", "run_python_file"),
-    "write_file": ("functions.write_file", "write_file"),
-}
 
+# Cache of file reads and directory listings for the default session
+tool_cache = new_tool_cache()
+
+
+def call_function(function_call, verbose=False, cache=None, working_directory=None):
+    if cache is None:
+        cache = tool_cache
 
-def call_function(function_call, verbose=False):
     try:
         if verbose:
             print(f"Calling function: {function_call.name}({function_call.args})")
@@ -33,13 +36,12 @@ def call_function(function_call, verbose=False):
 
     function_result = ""
 
-    # Dynamically import and call the function
+    # Look up the function, its module is imported on the first call only
     try:
         if function_call.name in FUNCTION_MAP:
             try:
-                module_path, function_name = FUNCTION_MAP[function_call.name]
-                module = __import__(module_path, fromlist=[function_name])
-                func = getattr(module, function_name)
+                with tracing.span("tool.import", tool=function_call.name):
+                    func = get_function(function_call.name)
             except ImportError as e:
                 return types.Content(
                     role="tool",
@@ -56,7 +58,9 @@ def call_function(function_call, verbose=False):
                     parts=[
                         types.Part.from_function_response(
                             name=function_call.name,
-                            response={"error": f"Function not found in module: {str(e)}"},
+                            response={
+                                "error": f"Function not found in module: {str(e)}"
+                            },
                         )
                     ],
                 )
@@ -66,10 +70,35 @@ def call_function(function_call, verbose=False):
             try:
                 if isinstance(function_call.args, dict):
                     args_dict = dict(function_call.args)
-                    # Inject working_directory if not present (for security, default to ".")
-                    if "working_directory" not in args_dict:
-                        args_dict["working_directory"] = "./calculator"
-                    function_result = func(**args_dict)
+                    # A session's own working directory always wins, otherwise
+                    # inject the default if the call does not name one
+                    if working_directory is not None:
+                        args_dict["working_directory"] = working_directory
+                    elif "working_directory" not in args_dict:
+                        args_dict["working_directory"] = WORKING_DIRECTORY
+                    # Served from the cache when the path is unchanged on disk
+                    with tracing.span("tool.execute", tool=function_call.name) as span:
+                        hits = cache.hits
+                        function_result = cache.call(
+                            function_call.name, args_dict, func
+                        )
+                        span.set(
+                            result_chars=len(str(function_result)),
+                            cached=cache.hits > hits,
+                        )
+                    if function_call.name in WRITE_FUNCTIONS:
+                        from functions.search_files import notify_write
+
+                        # Keep the search index in step with our own writes
+                        notify_write(
+                            args_dict["working_directory"],
+                            args_dict.get("file_path", ""),
+                        )
+                    elif function_call.name not in READ_ONLY_FUNCTIONS:
+                        from functions.search_files import invalidate_index
+
+                        # Running code may have changed any file
+                        invalidate_index(args_dict["working_directory"])
                 else:
                     # If args is not a dict, treat it as working_directory
                     function_result = func(function_call.args)
@@ -115,15 +144,19 @@ def call_function(function_call, verbose=False):
         )
 
     try:
-        return types.Content(
-            role="user",
-            parts=[
-                types.Part.from_function_response(
-                    name=function_call.name,
-                    response={"result": function_result},
-                )
-            ],
-        )
+        with tracing.span("tool.serialize", tool=function_call.name) as span:
+            content = types.Content(
+                role="user",
+                parts=[
+                    types.Part.from_function_response(
+                        name=function_call.name,
+                        response={"result": function_result},
+                    )
+                ],
+            )
+            if tracing.enabled():
+                span.set(response_bytes=tracing.content_bytes([content]))
+        return content
     except Exception as e:
         # Fallback error response if we can't create the proper response
         return types.Content(
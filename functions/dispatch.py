@@ -0,0 +1,155 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import google.genai.types as types
+from config import MAX_PARALLEL_TOOLS
+from functions.call_function import READ_ONLY_FUNCTIONS, call_function, tool_cache
+from functions.shaping import shape_turn
+import tracing
+
+# Argument that names the path each tool touches
+PATH_ARGS = {
+    "get_files_info": "directory",
+    "get_file_content": "file_path",
+    "write_file": "file_path",
+    "edit_file": "file_path",
+}
+
+
+def _call_path(function_call):
+    # Returns the normalized path a call touches, or None if it may touch anything
+    arg_name = PATH_ARGS.get(function_call.name)
+    if arg_name is None:
+        return None
+    args = function_call.args if isinstance(function_call.args, dict) else {}
+    path = args.get(arg_name) or "."
+    return os.path.normpath(str(path))
+
+
+def _paths_overlap(a, b):
+    # None means "unknown", which conflicts with everything
+    if a is None or b is None:
+        return True
+    if a == b or a == "." or b == ".":
+        return True
+    return a.startswith(b + os.sep) or b.startswith(a + os.sep)
+
+
+def _error_content(function_call, e):
+    return types.Content(
+        role="tool",
+        parts=[
+            types.Part.from_function_response(
+                name=function_call.name,
+                response={"error": f"Function execution failed: {str(e)}"},
+            )
+        ],
+    )
+
+
+def _run_call(function_call, verbose, depends_on, parent=None, session=None):
+    with tracing.span("tool.dispatch", parent=parent, tool=function_call.name) as span:
+        # Wait for earlier calls that touch the same paths before running
+        if depends_on:
+            start = time.perf_counter()
+            wait(depends_on)
+            span.set(wait_ms=round((time.perf_counter() - start) * 1000, 3))
+        try:
+            # Execute the tool and build the tool response for the transcript
+            return call_function(function_call, verbose=verbose, **(session or {}))
+        except Exception as e:
+            print(f"Error calling function {function_call.name}: {e}")
+            # Return an error response so the model knows what went wrong
+            return _error_content(function_call, e)
+
+
+class ToolDispatcher:
+    # Runs the function calls of one turn, submitted one at a time in call order
+    def __init__(
+        self, verbose=False, max_workers=None, cache=None, working_directory=None
+    ):
+        if max_workers is None:
+            max_workers = MAX_PARALLEL_TOOLS
+        self.verbose = verbose
+        # Passed on to call_function, each batch session has its own
+        self.session = {"cache": cache, "working_directory": working_directory}
+        self.executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+        # (path, is_read_only, future) for every call submitted so far
+        self.submitted = []
+        self.cancelled = False
+
+    def submit(self, function_call):
+        # Tools that only read the working directory can run side by side
+        read_only = function_call.name in READ_ONLY_FUNCTIONS
+        path = _call_path(function_call)
+
+        # Reads only wait for earlier writes; writes and runs wait for
+        # everything earlier that touches an overlapping path.
+        # Earlier futures are always queued first, so waiting on them
+        # from inside a worker cannot deadlock the pool.
+        depends_on = [
+            future
+            for other_path, other_read_only, future in self.submitted
+            if not (read_only and other_read_only) and _paths_overlap(path, other_path)
+        ]
+
+        # Worker threads don't see our span stack, pass the parent along
+        future = self.executor.submit(
+            _run_call,
+            function_call,
+            self.verbose,
+            depends_on,
+            tracing.get_tracer().current_id(),
+            self.session,
+        )
+        self.submitted.append((path, read_only, future))
+        return future
+
+    def cancel(self):
+        # Drops calls that have not started and returns without waiting for
+        # the running ones, e.g. when the turn they belong to is discarded
+        self.cancelled = True
+        for _, _, future in self.submitted:
+            future.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def close(self):
+        if not self.cancelled:
+            self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def dispatch_function_calls(
+    function_calls, verbose=False, max_workers=None, cache=None, working_directory=None
+):
+    function_calls = list(function_calls or [])
+    session = {"cache": cache, "working_directory": working_directory}
+    # Results cut to fit the budget are not marked as seen in the cache
+    seen_cache = tool_cache if cache is None else cache
+
+    # A single call gains nothing from the pool
+    if len(function_calls) <= 1:
+        return shape_turn(
+            [
+                _run_call(call, verbose, None, session=session)
+                for call in function_calls
+            ],
+            cache=seen_cache,
+        )
+
+    with ToolDispatcher(
+        verbose=verbose,
+        max_workers=max_workers,
+        cache=cache,
+        working_directory=working_directory,
+    ) as dispatcher:
+        futures = [dispatcher.submit(call) for call in function_calls]
+
+    # Results come back in the original call order, within the turn's budget
+    return shape_turn([future.result() for future in futures], cache=seen_cache)
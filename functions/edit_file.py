@@ -0,0 +1,243 @@
+import os
+import re
+import difflib
+import hashlib
+from google.genai import types
+
+from functions.workspace import WorkspaceEscape, get_workspace
+from functions.write_file import atomic_write
+
+# Lines of the resulting diff shown back to the model
+MAX_DIFF_LINES = 60
+
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+class EditError(Exception):
+    pass
+
+
+def _sha256(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _apply_edits(text, edits):
+    # Each search string must match exactly once in the file as it is by then
+    for number, edit in enumerate(edits, 1):
+        if not isinstance(edit, dict) or "search" not in edit:
+            raise EditError(f"edit {number} needs a search and a replace string")
+        search = edit["search"]
+        replace = edit.get("replace", "")
+        if not search:
+            raise EditError(f"edit {number} has an empty search string")
+        count = text.count(search)
+        if count == 0:
+            raise EditError(f"edit {number}: search text not found")
+        if count > 1:
+            raise EditError(
+                f"edit {number}: search text matches {count} times, include more context"
+            )
+        text = text.replace(search, replace, 1)
+    return text
+
+
+def _parse_hunks(diff):
+    # Returns [(old_start, old_lines, new_lines)], file headers are skipped
+    hunks = []
+    current = None
+    for line in diff.removesuffix("\n").split("\n"):
+        line = line.removesuffix("\r")
+        match = HUNK_HEADER.match(line)
+        if match:
+            old_start = int(match.group(1))
+            if match.group(2) == "0":
+                # Pure insertion, the new lines go after old_start
+                old_start += 1
+            current = (old_start, [], [])
+            hunks.append(current)
+        elif current is None or line.startswith("\\"):
+            # "--- a/file", "+++ b/file" or "\ No newline at end of file"
+            continue
+        elif line.startswith("-"):
+            current[1].append(line[1:])
+        elif line.startswith("+"):
+            current[2].append(line[1:])
+        else:
+            # Context, some tools drop the space on empty lines
+            current[1].append(line[1:])
+            current[2].append(line[1:])
+    if not hunks:
+        raise EditError("diff has no @@ hunks")
+    return hunks
+
+
+def _find_hunk(lines, old, expected):
+    # The stated line first, then the nearest position where the hunk matches
+    size = len(old)
+    last = len(lines) - size
+    for distance in range(max(expected, last - expected) + 1):
+        for start in (expected - distance, expected + distance):
+            if 0 <= start <= last and lines[start : start + size] == old:
+                return start
+    return None
+
+
+def _split_lines(text):
+    # [(line, ending)], only "\n" ends a line: form feeds and other
+    # separators stay part of the text, and mixed endings are kept as they are
+    parts = text.split("\n")
+    last = parts.pop()
+    lines = [
+        (part[:-1], "\r\n") if part.endswith("\r") else (part, "\n") for part in parts
+    ]
+    if last:
+        lines.append((last, ""))
+    return lines
+
+
+def _apply_diff(text, diff):
+    newline = "\r\n" if "\r\n" in text else "\n"
+    lines = _split_lines(text)
+    offset = 0
+    for number, (old_start, old, new) in enumerate(_parse_hunks(diff), 1):
+        expected = max(old_start - 1, 0) + offset
+        contents = [line for line, _ in lines]
+        start = _find_hunk(contents, old, min(expected, len(lines)))
+        if start is None:
+            raise EditError(f"hunk {number} (line {old_start}) does not match the file")
+        # New lines take the endings of the lines they replace
+        endings = [ending for _, ending in lines[start : start + len(old)]]
+        default = endings[-1] if endings and endings[-1] else newline
+        lines[start : start + len(old)] = [
+            (line, endings[i] if i < len(endings) and endings[i] else default)
+            for i, line in enumerate(new)
+        ]
+        offset += len(new) - len(old)
+    for i, (line, ending) in enumerate(lines[:-1]):
+        if not ending:
+            lines[i] = (line, newline)
+    if lines and text and not text.endswith("\n"):
+        lines[-1] = (lines[-1][0], "")
+    return "".join(line + ending for line, ending in lines)
+
+
+def _summary(file_path, before, after):
+    diff = list(
+        difflib.unified_diff(
+            before.splitlines(),
+            after.splitlines(),
+            f"a/{file_path}",
+            f"b/{file_path}",
+            n=1,
+            lineterm="",
+        )
+    )
+    added = sum(
+        1 for line in diff if line.startswith("+") and not line.startswith("+++")
+    )
+    removed = sum(
+        1 for line in diff if line.startswith("-") and not line.startswith("---")
+    )
+    hunks = sum(1 for line in diff if line.startswith("@@"))
+    shown = diff[2:]
+    if len(shown) > MAX_DIFF_LINES:
+        more = len(shown) - MAX_DIFF_LINES
+        shown = shown[:MAX_DIFF_LINES] + [f"[...{more} more diff lines]"]
+    header = (
+        f'Successfully edited "{file_path}": {hunks} hunk(s), +{added} -{removed} lines '
+        f"(sha256 {_sha256(after)})"
+    )
+    return "\n".join([header] + shown)
+
+
+def edit_file(
+    working_directory, file_path, edits=None, diff=None, expected_sha256=None
+):
+    workspace = get_workspace(working_directory)
+    try:
+        target_file = workspace.resolve(file_path)
+    except WorkspaceEscape:
+        return f'Error: Cannot edit "{file_path}" as it is outside the permitted working directory'
+
+    if not os.path.isfile(target_file):
+        return f'Error: File not found or is not a regular file: "{file_path}"'
+
+    if (edits is None) == (diff is None):
+        return "Error: Provide exactly one of edits or diff"
+
+    try:
+        with os.fdopen(workspace.open(file_path), "rb") as f:
+            before_stat = os.fstat(f.fileno())
+            before = f.read().decode("utf-8")
+    except UnicodeDecodeError:
+        return f'Error: "{file_path}" is not a UTF-8 text file'
+    except Exception as e:
+        return f'Error: Could not read file "{file_path}": {str(e)}'
+
+    if expected_sha256 and expected_sha256 != _sha256(before):
+        return f'Error: "{file_path}" has changed since you read it, read it again before editing'
+
+    try:
+        if edits is not None:
+            after = _apply_edits(before, list(edits))
+        else:
+            after = _apply_diff(before, diff)
+    except EditError as e:
+        return f'Error: Could not edit "{file_path}": {e}'
+
+    if after == before:
+        return f'No changes made to "{file_path}"'
+
+    try:
+        # Refuse to overwrite a change made while we were editing
+        now = os.stat(target_file)
+        if (now.st_mtime_ns, now.st_size) != (
+            before_stat.st_mtime_ns,
+            before_stat.st_size,
+        ):
+            return f'Error: "{file_path}" changed while it was being edited, try again'
+        atomic_write(target_file, after)
+    except Exception as e:
+        return f'Error: Could not write file "{file_path}": {str(e)}'
+
+    return _summary(file_path, before, after)
+
+
+schema_edit_file = types.FunctionDeclaration(
+    name="edit_file",
+    description="Edits an existing file relative to the working directory with search/replace blocks or a unified diff, without resending the whole file. Returns a short diff of the change and the new sha256 of the file",
+    parameters=types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            "file_path": types.Schema(
+                type=types.Type.STRING,
+                description="File path to edit, relative to the working directory",
+            ),
+            "edits": types.Schema(
+                type=types.Type.ARRAY,
+                description="Search/replace blocks applied in order; each search text must occur exactly once in the file",
+                items=types.Schema(
+                    type=types.Type.OBJECT,
+                    properties={
+                        "search": types.Schema(
+                            type=types.Type.STRING,
+                            description="Exact text to find, including enough context to be unique",
+                        ),
+                        "replace": types.Schema(
+                            type=types.Type.STRING,
+                            description="Text to put in its place",
+                        ),
+                    },
+                ),
+            ),
+            "diff": types.Schema(
+                type=types.Type.STRING,
+                description="A unified diff with @@ hunks to apply instead of edits",
+            ),
+            "expected_sha256": types.Schema(
+                type=types.Type.STRING,
+                description="Optional sha256 from an earlier edit; the edit is refused if the file has changed since",
+            ),
+        },
+    ),
+)
@@ -1,50 +1,180 @@
 import os
-import sys
+import mmap
+import stat
+import codecs
 import google.genai.types as types
 
-# Add parent directory to path to allow importing config
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 from config import MAX_CHARS
+from functions.shaping import SNIFF_BYTES, looks_binary
+from functions.workspace import WorkspaceEscape, get_workspace
 
+# Chunk size used when scanning for line breaks without decoding
+SCAN_CHUNK = 1024 * 1024
+# Non-blocking so opening a FIFO returns at once and is refused by the
+# regular file check instead of waiting for a writer
+OPEN_FLAGS = os.O_RDONLY | getattr(os, "O_NONBLOCK", 0) | getattr(os, "O_CLOEXEC", 0)
 
-def get_file_content(working_directory, file_path):
-    if not os.path.isabs(working_directory):
-        if not os.path.exists(os.path.abspath(working_directory)):
-            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            potential_path = os.path.join(project_root, working_directory)
-            if os.path.exists(potential_path):
-                working_directory = potential_path
 
-    working_directory = os.path.abspath(working_directory)
-    target_file = os.path.normpath(os.path.join(working_directory, file_path))
+def _line_offset(mm, line):
+    # Byte offset where the 1-based line starts, or None if the file is shorter
+    if line <= 1:
+        return 0
+    remaining = line - 1
+    pos = 0
+    while pos < len(mm):
+        chunk = mm[pos : pos + SCAN_CHUNK]
+        count = chunk.count(b"\n")
+        if count >= remaining:
+            index = -1
+            for _ in range(remaining):
+                index = chunk.index(b"\n", index + 1)
+            return pos + index + 1
+        remaining -= count
+        pos += len(chunk)
+    return None
 
-    # Will be True or False
-    valid_target_file = (
-        os.path.commonpath([working_directory, target_file]) == working_directory
-    )
 
-    if not valid_target_file:
-        return f'Error: Cannot read "{file_path}" as it is outside the permitted working directory'
+def _count_lines(mm):
+    lines = 0
+    for pos in range(0, len(mm), SCAN_CHUNK):
+        lines += mm[pos : pos + SCAN_CHUNK].count(b"\n")
+    if len(mm) and mm[len(mm) - 1 : len(mm)] != b"\n":
+        lines += 1
+    return lines
+
+
+def _char_start(mm, pos):
+    # Move forward past UTF-8 continuation bytes so decoding starts on a character
+    while pos < len(mm) and 0x80 <= mm[pos] < 0xC0:
+        pos += 1
+    return pos
+
+
+def _decode(mm, start, end, errors="strict"):
+    # Decodes at most MAX_CHARS characters, returns (text, end offset reached)
+    decoder = codecs.getincrementaldecoder("utf-8")(errors)
+    # UTF-8 needs at most 4 bytes per character
+    stop = min(end, start + MAX_CHARS * 4)
+    text = decoder.decode(mm[start:stop], final=stop == end)
+    if len(text) > MAX_CHARS:
+        text = text[:MAX_CHARS]
+        stop = start + len(text.encode("utf-8", errors))
+    return text, stop
+
+
+def _decode_text(mm, start, end):
+    # Bytes that are not UTF-8, e.g. in a Latin-1 file, are shown as U+FFFD.
+    # They are decoded to surrogates first so the offset reached stays exact.
+    try:
+        return _decode(mm, start, end)
+    except UnicodeDecodeError:
+        text, reached = _decode(mm, start, end, "surrogateescape")
+        text = text.encode("utf-8", "surrogateescape").decode("utf-8", "replace")
+        return text, reached
+
+
+def _as_int(value, name):
+    if value is None:
+        return None
+    value = int(value)
+    if value < 0:
+        raise ValueError(f"{name} must not be negative")
+    return value
+
 
-    if not os.path.isfile(target_file):
+def get_file_content(
+    working_directory,
+    file_path,
+    offset=None,
+    length=None,
+    start_line=None,
+    end_line=None,
+):
+    try:
+        offset = _as_int(offset, "offset")
+        length = _as_int(length, "length")
+        start_line = _as_int(start_line, "start_line")
+        end_line = _as_int(end_line, "end_line")
+    except (TypeError, ValueError) as e:
+        return f'Error: Invalid range for "{file_path}": {e}'
+
+    line_range = start_line is not None or end_line is not None
+    ranged = line_range or offset is not None or length is not None
+
+    # Resolved and opened in one go through the workspace, relative to the
+    # parent directory's fd, so a symlink swapped in is refused
+    try:
+        workspace = get_workspace(working_directory)
+        f = os.fdopen(workspace.open(file_path, OPEN_FLAGS), "rb")
+    except WorkspaceEscape:
+        return f'Error: Cannot read "{file_path}" as it is outside the permitted working directory'
+    except OSError:
         return f'Error: File not found or is not a regular file: "{file_path}"'
 
     try:
-        with open(target_file, "r", encoding="utf-8") as f:
-            content = f.read(MAX_CHARS)  # Limit to first 10,000 characters
-            if f.read(1):
-                content += (
-                    f'[...File "{file_path}" truncated at {MAX_CHARS} characters]'
-                )
-        return content
+        with f:
+            st = os.fstat(f.fileno())
+            if not stat.S_ISREG(st.st_mode):
+                return f'Error: File not found or is not a regular file: "{file_path}"'
+            size = st.st_size
+            if size == 0:
+                return ""
+            # Map the file so skipped parts are never read or decoded
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if looks_binary(mm[: min(size, SNIFF_BYTES)]):
+                    return f'Error: "{file_path}" is a binary file ({size} bytes), its content is not shown'
+                if line_range:
+                    first_line = max(start_line or 1, 1)
+                    start = _line_offset(mm, first_line)
+                    if start is None:
+                        return f'Error: "{file_path}" has fewer than {first_line} lines ({_count_lines(mm)} lines total)'
+                    end = size
+                    if end_line is not None:
+                        end = _line_offset(mm, end_line + 1)
+                        end = size if end is None else max(end, start)
+                else:
+                    start = min(offset or 0, size)
+                    end = size if length is None else min(size, start + length)
+                    start = _char_start(mm, start)
+
+                content, reached = _decode_text(mm, start, end)
+
+                if not ranged:
+                    if reached < size:
+                        content += (
+                            f'[...File "{file_path}" truncated at {MAX_CHARS} characters; '
+                            f"{size} bytes, {_count_lines(mm)} lines total. "
+                            "Use offset/length or start_line/end_line to read more]"
+                        )
+                    return content
+
+                total_lines = _count_lines(mm)
+                if line_range:
+                    last_line = first_line + content.count("\n")
+                    if content.endswith("\n"):
+                        last_line -= 1
+                    header = (
+                        f"[{file_path}: lines {first_line}-{last_line} of {total_lines} "
+                        f"(bytes {start}-{reached} of {size})]\n"
+                    )
+                else:
+                    header = (
+                        f"[{file_path}: bytes {start}-{reached} of {size}, "
+                        f"{total_lines} lines total]\n"
+                    )
+                if reached < end:
+                    content += (
+                        f"\n[...Range truncated at {MAX_CHARS} characters, "
+                        f"continue from offset {reached}]"
+                    )
+                return header + content
     except Exception as e:
         return f'Error: Could not read file "{file_path}": {str(e)}'
 
 
 schema_get_file_content = types.FunctionDeclaration(
     name="get_file_content",
-    description="Gets the content of a specified file relative to the working directory, limited to the first 10,000 characters",
+    description="Gets the content of a specified file relative to the working directory, limited to 10,000 characters per call. Use offset/length or start_line/end_line to page through larger files",
     parameters=types.Schema(
         type=types.Type.OBJECT,
         properties={
@@ -52,6 +182,22 @@ schema_get_file_content = types.FunctionDeclaration(
                 type=types.Type.STRING,
                 description="File path to get content from, relative to the working directory",
             ),
+            "offset": types.Schema(
+                type=types.Type.INTEGER,
+                description="Optional byte offset to start reading from",
+            ),
+            "length": types.Schema(
+                type=types.Type.INTEGER,
+                description="Optional number of bytes to read from the offset",
+            ),
+            "start_line": types.Schema(
+                type=types.Type.INTEGER,
+                description="Optional first line to read, starting at 1",
+            ),
+            "end_line": types.Schema(
+                type=types.Type.INTEGER,
+                description="Optional last line to read, inclusive",
+            ),
         },
     ),
 )
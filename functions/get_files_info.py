@@ -1,47 +1,100 @@
 import os
+from fnmatch import fnmatch
+from itertools import islice
 from google.genai import types
 
+from config import MAX_LIST_ENTRIES
+from functions.workspace import WorkspaceEscape, get_workspace
 
-def get_files_info(working_directory, directory="."):
-    if not os.path.isabs(working_directory):
-        if not os.path.exists(os.path.abspath(working_directory)):
-            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            potential_path = os.path.join(project_root, working_directory)
-            if os.path.exists(potential_path):
-                working_directory = potential_path
+# Skipped at every level unless listed directly
+DEFAULT_IGNORES = [".git", "__pycache__", ".venv"]
 
-    working_directory = os.path.abspath(working_directory)
-    target_dir = os.path.normpath(os.path.join(working_directory, directory))
 
-    # Will be True or False
-    valid_target_dir = (
-        os.path.commonpath([working_directory, target_dir]) == working_directory
-    )
+def _matches(rel_path, name, patterns):
+    return any(fnmatch(rel_path, p) or fnmatch(name, p) for p in patterns)
 
-    if not valid_target_dir:
+
+def _walk(target_dir, prefix, depth, max_depth, include, exclude):
+    # Yields one line per entry, depth first in name order
+    try:
+        with os.scandir(target_dir) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+    except OSError as e:
+        yield f"Error: {prefix or '.'}: could not list directory: {e.strerror}"
+        return
+
+    for entry in entries:
+        rel_path = prefix + entry.name
+        if _matches(rel_path, entry.name, exclude):
+            continue
+        try:
+            # DirEntry answers is_dir from the directory listing itself,
+            # only files need a stat call for their size
+            if entry.is_dir():
+                yield f"{rel_path}/"
+                if depth < max_depth and not entry.is_symlink():
+                    yield from _walk(
+                        entry.path,
+                        rel_path + "/",
+                        depth + 1,
+                        max_depth,
+                        include,
+                        exclude,
+                    )
+            elif not include or _matches(rel_path, entry.name, include):
+                yield f"{rel_path} {entry.stat().st_size}"
+        except OSError:
+            yield f"Error: {rel_path}: could not retrieve info"
+
+
+def get_files_info(
+    working_directory,
+    directory=".",
+    max_depth=1,
+    include=None,
+    exclude=None,
+    cursor=None,
+    limit=None,
+):
+    workspace = get_workspace(working_directory)
+    try:
+        target_dir = workspace.resolve(directory)
+    except WorkspaceEscape:
         return f'Error: Cannot list "{directory}" as it is outside the permitted working directory'
 
     if not os.path.isdir(target_dir):
         return f'Error: "{directory}" is not a directory'
 
-    list_of_entries = sorted(os.listdir(target_dir))
-    results = []
+    try:
+        max_depth = max(int(max_depth or 1), 1)
+        start = int(cursor or 0)
+        limit = min(int(limit or MAX_LIST_ENTRIES), MAX_LIST_ENTRIES)
+    except (TypeError, ValueError) as e:
+        return f"Error: Invalid listing arguments: {e}"
 
-    for entry in list_of_entries:
-        try:
-            entry_path = os.path.join(target_dir, entry)
-            is_dir = os.path.isdir(entry_path)
-            file_size = os.path.getsize(entry_path)
-            results.append(f"- {entry}: file_size={file_size} bytes, is_dir={is_dir}")
-        except Exception:
-            results.append(f"Error: {entry}: could not retrieve info")
+    exclude = DEFAULT_IGNORES + list(exclude or [])
+    include = list(include or [])
+
+    # One entry past the page is enough to know there are more, the rest of
+    # a large tree is never walked
+    lines = _walk(target_dir, "", 1, max_depth, include, exclude)
+    results = list(islice(lines, start, start + limit + 1))
+    more = len(results) > limit
+    del results[limit:]
 
+    if not results and start == 0:
+        return f'"{directory}" is empty'
+
+    if more:
+        results.append(
+            f'[...more entries, call again with cursor="{start + len(results)}"]'
+        )
     return "\n".join(results)
 
 
 schema_get_files_info = types.FunctionDeclaration(
     name="get_files_info",
-    description="Lists files in a specified directory relative to the working directory, providing file size and directory status",
+    description="Lists files in a specified directory relative to the working directory, one entry per line: directories end with '/', files are followed by their size in bytes. Can list nested directories in one call",
     parameters=types.Schema(
         type=types.Type.OBJECT,
         properties={
@@ -49,6 +102,28 @@ schema_get_files_info = types.FunctionDeclaration(
                 type=types.Type.STRING,
                 description="Directory path to list files from, relative to the working directory (default is the working directory itself)",
             ),
+            "max_depth": types.Schema(
+                type=types.Type.INTEGER,
+                description="How many directory levels to list (default 1, only the directory itself)",
+            ),
+            "include": types.Schema(
+                type=types.Type.ARRAY,
+                description="Optional glob patterns, only files matching one of them are listed (e.g. '*.py')",
+                items=types.Schema(type=types.Type.STRING),
+            ),
+            "exclude": types.Schema(
+                type=types.Type.ARRAY,
+                description="Optional glob patterns for files and directories to skip, in addition to .git, __pycache__ and .venv",
+                items=types.Schema(type=types.Type.STRING),
+            ),
+            "cursor": types.Schema(
+                type=types.Type.STRING,
+                description="Cursor from a previous truncated listing to continue from",
+            ),
+            "limit": types.Schema(
+                type=types.Type.INTEGER,
+                description=f"Maximum number of entries to return (at most {MAX_LIST_ENTRIES})",
+            ),
         },
     ),
 )
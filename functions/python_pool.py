@@ -0,0 +1,391 @@
+import json
+import os
+import runpy
+import selectors
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+
+# Forkserver-style pool of warm interpreters for run_python_file.
+# Each worker is a long-lived "python python_pool.py" server that has the
+# preload modules imported already. For every run it forks a child which
+# gets the caller's pipes as stdout/stderr, changes into the working
+# directory and runs the target file as __main__, like "python file.py".
+# The caller reads both pipes into bounded head+tail buffers, so a chatty
+# script costs a fixed amount of memory.
+# This module only imports the standard library so the server starts fast.
+
+PRELOAD_MODULES = [
+    "argparse",
+    "collections",
+    "dataclasses",
+    "functools",
+    "itertools",
+    "json",
+    "math",
+    "re",
+    "typing",
+    "unittest",
+]
+
+MAX_MESSAGE_SIZE = 65536
+
+
+def is_supported():
+    return hasattr(os, "fork") and hasattr(socket, "send_fds")
+
+
+def _send(sock, message, fds=None):
+    data = json.dumps(message).encode("utf-8")
+    if fds:
+        socket.send_fds(sock, [data], fds)
+    else:
+        sock.sendall(data)
+
+
+def _exit_code(e):
+    # Same rules the interpreter uses for an uncaught SystemExit
+    if e.code is None:
+        return 0
+    if isinstance(e.code, int):
+        return e.code
+    print(e.code, file=sys.stderr)
+    return 1
+
+
+def _run_child(sock, fds, request):
+    code = 1
+    try:
+        sock.close()
+        out_fd, err_fd = fds
+        os.dup2(out_fd, 1)
+        os.dup2(err_fd, 2)
+        os.close(out_fd)
+        os.close(err_fd)
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.close(devnull)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+
+        target = request["file"]
+        os.chdir(request["cwd"])
+        sys.argv = [target] + request["args"]
+        sys.path[0] = os.path.dirname(target)
+        try:
+            runpy.run_path(target, run_name="__main__")
+            code = 0
+        except SystemExit as e:
+            code = _exit_code(e)
+        except BaseException as e:
+            # Hide the pool's own frames, like a plain "python file.py" run
+            tb = e.__traceback__
+            while tb is not None and tb.tb_frame.f_code.co_filename != target:
+                tb = tb.tb_next
+            traceback.print_exception(type(e), e, tb or e.__traceback__)
+            code = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+def _serve(sock_fd, preload):
+    for name in preload:
+        try:
+            __import__(name)
+        except Exception:
+            pass
+    # Ctrl+C in the terminal should only stop the agent, which closes us
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    sock = socket.socket(fileno=sock_fd)
+    while True:
+        try:
+            data, fds, _, _ = socket.recv_fds(sock, MAX_MESSAGE_SIZE, 2)
+        except OSError:
+            break
+        if not data:
+            break
+
+        request = json.loads(data)
+        pid = os.fork()
+        if pid == 0:
+            _run_child(sock, fds, request)
+        for fd in fds:
+            os.close(fd)
+
+        _send(sock, {"pid": pid})
+        # Peak memory of the child itself, the server only holds the preloads
+        _, status, usage = os.wait4(pid, 0)
+        _send(
+            sock,
+            {
+                "returncode": os.waitstatus_to_exitcode(status),
+                "rss_kb": usage.ru_maxrss,
+            },
+        )
+
+
+class OutputBuffer:
+    # Keeps the first and last bytes of a stream within a fixed budget,
+    # everything in between is only counted
+    def __init__(self, max_bytes):
+        self.head_size = max_bytes // 2
+        self.tail_size = max_bytes - self.head_size
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+
+    def write(self, data):
+        self.total += len(data)
+        room = self.head_size - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if not data or not self.tail_size:
+            return
+        if len(data) >= self.tail_size:
+            self.tail[:] = data[-self.tail_size :]
+        else:
+            self.tail += data
+            excess = len(self.tail) - self.tail_size
+            if excess > 0:
+                del self.tail[:excess]
+
+    @property
+    def truncated(self):
+        return self.total - len(self.head) - len(self.tail)
+
+    def getvalue(self):
+        if not self.truncated:
+            return bytes(self.head + self.tail)
+        marker = f"\n[... {self.truncated:,} bytes truncated ...]\n".encode()
+        return bytes(self.head) + marker + bytes(self.tail)
+
+
+@dataclass
+class RunResult:
+    returncode: int
+    stdout: OutputBuffer
+    stderr: OutputBuffer
+    elapsed: float
+    # Killed at the deadline, the buffers hold whatever was written until then
+    timed_out: bool = False
+
+
+def capture_pipes(out_r, err_r, stdout, stderr, deadline, echo=None):
+    # Copies both pipes into their buffers until EOF, optionally echoing each
+    # chunk to (stdout, stderr) binary files. Returns False on the deadline.
+    targets = {out_r: (stdout, echo and echo[0]), err_r: (stderr, echo and echo[1])}
+    selector = selectors.DefaultSelector()
+    selector.register(out_r, selectors.EVENT_READ)
+    selector.register(err_r, selectors.EVENT_READ)
+    try:
+        while selector.get_map():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            for key, _ in selector.select(remaining):
+                data = os.read(key.fd, 65536)
+                if not data:
+                    selector.unregister(key.fd)
+                    continue
+                buffer, echo_file = targets[key.fd]
+                buffer.write(data)
+                if echo_file is not None:
+                    echo_file.write(data)
+                    echo_file.flush()
+    finally:
+        selector.close()
+    return True
+
+
+# How long to keep reading after a kill for output already in the pipes
+DRAIN_SECONDS = 1
+
+
+class PoolUnavailable(Exception):
+    # The run failed before the script was started, it is safe to run it
+    # again some other way
+    pass
+
+
+class _Worker:
+    def __init__(self, preload):
+        parent_sock, child_sock = socket.socketpair(
+            socket.AF_UNIX, socket.SOCK_SEQPACKET
+        )
+        try:
+            self.process = subprocess.Popen(
+                ["python", os.path.abspath(__file__), str(child_sock.fileno())]
+                + list(preload),
+                pass_fds=[child_sock.fileno()],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        finally:
+            child_sock.close()
+        self.sock = parent_sock
+        self.runs = 0
+        self.rss_kb = 0
+
+    def _receive(self, timeout=None):
+        self.sock.settimeout(timeout)
+        data = self.sock.recv(MAX_MESSAGE_SIZE)
+        if not data:
+            raise RuntimeError("warm worker exited unexpectedly")
+        return json.loads(data)
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def run(self, target_file, args, cwd, timeout, max_output_bytes, echo=None):
+        start = time.monotonic()
+        stdout = OutputBuffer(max_output_bytes)
+        stderr = OutputBuffer(max_output_bytes)
+        out_r, out_w = os.pipe()
+        err_r, err_w = os.pipe()
+        try:
+            try:
+                _send(
+                    self.sock,
+                    {"file": target_file, "args": list(args), "cwd": cwd},
+                    [out_w, err_w],
+                )
+            except OSError as e:
+                raise PoolUnavailable(f"could not reach warm worker: {e}") from e
+            finally:
+                os.close(out_w)
+                os.close(err_w)
+            pid = self._receive(timeout)["pid"]
+
+            deadline = start + timeout
+            finished = capture_pipes(out_r, err_r, stdout, stderr, deadline, echo)
+            if not finished:
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                capture_pipes(
+                    out_r, err_r, stdout, stderr, time.monotonic() + DRAIN_SECONDS, echo
+                )
+
+            try:
+                reply = self._receive(max(deadline - time.monotonic(), 0.01))
+            except TimeoutError:
+                # Closed its pipes but kept running past the deadline
+                finished = False
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                reply = self._receive(DRAIN_SECONDS)
+        finally:
+            os.close(out_r)
+            os.close(err_r)
+
+        self.runs += 1
+        self.rss_kb = reply["rss_kb"]
+        return RunResult(
+            reply["returncode"],
+            stdout,
+            stderr,
+            time.monotonic() - start,
+            timed_out=not finished,
+        )
+
+    def close(self):
+        try:
+            self.sock.close()
+        finally:
+            try:
+                self.process.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+
+
+class WarmPythonPool:
+    def __init__(self, size=2, max_runs=50, max_rss_mb=200, preload=None):
+        self.size = size
+        self.max_runs = max_runs
+        self.max_rss_kb = max_rss_mb * 1024
+        self.preload = PRELOAD_MODULES if preload is None else preload
+        self.idle = []
+        self.lock = threading.Lock()
+        self.slots = threading.Semaphore(size)
+
+    def _acquire(self):
+        with self.lock:
+            while self.idle:
+                worker = self.idle.pop()
+                if worker.alive():
+                    return worker
+                worker.close()
+        return _Worker(self.preload)
+
+    def _release(self, worker):
+        # Recycle workers that ran too often or whose last run used too much
+        # memory
+        if (
+            not worker.alive()
+            or worker.runs >= self.max_runs
+            or worker.rss_kb >= self.max_rss_kb
+        ):
+            worker.close()
+            return
+        with self.lock:
+            self.idle.append(worker)
+
+    def warm_up(self):
+        workers = [self._acquire() for _ in range(self.size)]
+        for worker in workers:
+            self._release(worker)
+
+    def run(
+        self,
+        target_file,
+        args=None,
+        cwd=None,
+        timeout=30,
+        max_output_bytes=64 * 1024,
+        echo=None,
+    ):
+        with self.slots:
+            try:
+                worker = self._acquire()
+            except OSError as e:
+                raise PoolUnavailable(f"could not start warm worker: {e}") from e
+            try:
+                result = worker.run(
+                    target_file,
+                    args or [],
+                    cwd or os.getcwd(),
+                    timeout,
+                    max_output_bytes,
+                    echo,
+                )
+            except BaseException:
+                # The worker may be out of sync after a failure, start fresh
+                worker.close()
+                raise
+            self._release(worker)
+            return result
+
+    def close(self):
+        with self.lock:
+            workers, self.idle = self.idle, []
+        for worker in workers:
+            worker.close()
+
+
+if __name__ == "__main__":
+    _serve(int(sys.argv[1]), sys.argv[2:])
@@ -0,0 +1,139 @@
+import os
+import glob
+import codecs
+from concurrent.futures import ThreadPoolExecutor
+from google.genai import types
+
+from config import READ_FILES_MAX_CHARS, READ_FILES_MAX_FILES, READ_FILES_WORKERS
+from functions.get_file_content import OPEN_FLAGS
+from functions.get_files_info import DEFAULT_IGNORES
+from functions.shaping import SNIFF_BYTES, fair_shares, looks_binary
+from functions.workspace import WorkspaceEscape, get_workspace
+
+# Reads many files in one call. Paths and glob patterns are expanded, every
+# file is stat'ed, and one character budget is split between them: files
+# smaller than an equal share are read whole and what they leave over goes
+# to the larger ones. The reads then run concurrently, each reading only the
+# bytes its share can use. The result is one dict with an entry per file.
+
+GLOB_CHARS = set("*?[")
+
+
+def _expand(root, paths):
+    # Returns the file paths in the order given, globs sorted, no duplicates
+    found = []
+    for path in paths:
+        if GLOB_CHARS & set(path):
+            matches = sorted(glob.glob(path, root_dir=root, recursive=True))
+            for match in matches:
+                if set(match.split(os.sep)) & set(DEFAULT_IGNORES):
+                    continue
+                if os.path.isfile(os.path.join(root, match)):
+                    found.append(match.replace(os.sep, "/"))
+        else:
+            found.append(path)
+    return list(dict.fromkeys(found))
+
+
+def _read(workspace, path, size, share):
+    entry = {"path": path, "size": size}
+    try:
+        with os.fdopen(workspace.open(path, OPEN_FLAGS), "rb") as f:
+            # UTF-8 needs at most 4 bytes per character
+            data = f.read(min(size, max(share * 4, SNIFF_BYTES)))
+    except OSError as e:
+        entry["error"] = f"Could not read file: {e.strerror or e}"
+        return entry
+
+    if looks_binary(data):
+        entry["binary"] = True
+        return entry
+
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    text = decoder.decode(data, final=len(data) == size)
+    if len(text) > share:
+        text = text[:share]
+    end = len(text.encode("utf-8", errors="replace"))
+    entry["content"] = text
+    if end < size:
+        entry["truncated"] = (
+            f"[...showing {len(text)} characters, bytes 0-{end} of {size}; "
+            f'read more with get_file_content file_path="{path}" offset={end}]'
+        )
+    return entry
+
+
+def read_files(working_directory, paths, max_chars=None):
+    if isinstance(paths, str):
+        paths = [paths]
+    if not paths:
+        return "Error: No paths given"
+    try:
+        budget = min(int(max_chars or READ_FILES_MAX_CHARS), READ_FILES_MAX_CHARS)
+    except (TypeError, ValueError) as e:
+        return f"Error: Invalid max_chars: {e}"
+
+    workspace = get_workspace(working_directory)
+    files = _expand(workspace.root, [str(path) for path in paths])
+    if not files:
+        return f"Error: No files match {', '.join(paths)}"
+    omitted = files[READ_FILES_MAX_FILES:]
+    files = files[:READ_FILES_MAX_FILES]
+
+    entries = {}
+    sizes = {}
+    for path in files:
+        try:
+            target = workspace.resolve(path)
+        except WorkspaceEscape:
+            entries[path] = {
+                "path": path,
+                "error": "Outside the permitted working directory",
+            }
+            continue
+        if not os.path.isfile(target):
+            entries[path] = {
+                "path": path,
+                "error": "File not found or not a regular file",
+            }
+            continue
+        sizes[path] = os.path.getsize(target)
+
+    shares = fair_shares(sizes, budget)
+    if sizes:
+        workers = min(READ_FILES_WORKERS, len(sizes))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                path: executor.submit(_read, workspace, path, size, shares[path])
+                for path, size in sizes.items()
+            }
+        for path, future in futures.items():
+            entries[path] = future.result()
+
+    result = {"files": [entries[path] for path in files], "max_chars": budget}
+    if omitted:
+        result["omitted"] = (
+            f"[...{len(omitted)} more files matched, at most {READ_FILES_MAX_FILES} "
+            f"are read per call: {', '.join(omitted[:20])}]"
+        )
+    return result
+
+
+schema_read_files = types.FunctionDeclaration(
+    name="read_files",
+    description=f"Reads several files relative to the working directory in one call. Takes paths and glob patterns (e.g. 'pkg/*.py', '**/*.md'). One budget of {READ_FILES_MAX_CHARS} characters is shared fairly between the files; a file that does not fit is cut off with a marker saying where to continue. Prefer this over several get_file_content calls",
+    parameters=types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            "paths": types.Schema(
+                type=types.Type.ARRAY,
+                description="File paths or glob patterns, relative to the working directory",
+                items=types.Schema(type=types.Type.STRING),
+            ),
+            "max_chars": types.Schema(
+                type=types.Type.INTEGER,
+                description=f"Optional smaller total character budget (at most {READ_FILES_MAX_CHARS})",
+            ),
+        },
+    ),
+)
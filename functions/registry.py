@@ -0,0 +1,54 @@
+import threading
+from functools import cache
+from importlib import import_module
+
+# Tool modules are only imported when a tool is first called or the schema is
+# first needed, and each callable is resolved once per process.
+
+# Mapping of function names to their module and function; each module also
+# defines schema_<name>
+FUNCTION_MAP = {
+    "get_files_info": ("functions.get_files_info", "get_files_info"),
+    "get_file_content": ("functions.get_file_content", "get_file_content"),
+    "read_files": ("functions.read_files", "read_files"),
+    "run_python_file": ("functions.run_python_file", "run_python_file"),
+    "write_file": ("functions.write_file", "write_file"),
+    "edit_file": ("functions.edit_file", "edit_file"),
+    "search_files": ("functions.search_files", "search_files"),
+    "run_tests": ("functions.run_tests", "run_tests"),
+}
+
+# Tools that never change files in the working directory
+READ_ONLY_FUNCTIONS = {
+    "get_files_info",
+    "get_file_content",
+    "read_files",
+    "search_files",
+}
+
+_functions = {}
+_lock = threading.Lock()
+
+
+def get_function(name):
+    # Raises KeyError for unknown tools, ImportError / AttributeError if broken
+    func = _functions.get(name)
+    if func is None:
+        module_path, function_name = FUNCTION_MAP[name]
+        with _lock:
+            func = _functions.get(name)
+            if func is None:
+                func = getattr(import_module(module_path), function_name)
+                _functions[name] = func
+    return func
+
+
+@cache
+def get_tool():
+    # The types.Tool sent with every request, built on first use
+    from google.genai import types
+
+    declarations = []
+    for name, (module_path, _) in FUNCTION_MAP.items():
+        declarations.append(getattr(import_module(module_path), f"schema_{name}"))
+    return types.Tool(function_declarations=declarations)
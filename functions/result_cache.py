@@ -0,0 +1,187 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+from functions.workspace import WorkspaceEscape, get_workspace
+
+# Caches get_file_content / get_files_info results for one session.
+# Entries are keyed on the resolved path and the call's other arguments and
+# stay valid while the path's (mtime_ns, size, inode) is unchanged. Writes
+# through write_file / edit_file invalidate the path and its parents, and
+# run_python_file clears everything since the script may touch any file.
+# Tools passed as read_only leave the cache alone.
+# Listings show nested entries and file sizes that no single stat covers, so
+# they always run and are only compared with the last listing the model saw.
+
+# Argument that names the path each cached tool reads
+CACHED_FUNCTIONS = {
+    "get_file_content": "file_path",
+    "get_files_info": "directory",
+}
+
+# Cached tools validated by comparing their result instead of a stat
+COMPARED_FUNCTIONS = {"get_files_info"}
+
+# Tools that change exactly the file named by their file_path argument
+WRITE_FUNCTIONS = {"write_file", "edit_file"}
+
+
+def resolve_path(working_directory, path):
+    # Same resolution the tools do; a path outside the working directory is
+    # refused by the tool, so its key only has to be stable
+    workspace = get_workspace(working_directory)
+    try:
+        return workspace.resolve(path or ".")
+    except WorkspaceEscape:
+        return os.path.normpath(os.path.join(workspace.root, path or "."))
+
+
+def _validator(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def unchanged_marker(name, path):
+    if name == "get_files_info":
+        return f'[Directory "{path}" unchanged since your last listing, see the earlier result]'
+    return f'[File "{path}" unchanged since your last read, see the earlier result]'
+
+
+class ToolResultCache:
+    def __init__(
+        self, max_bytes=8 * 1024 * 1024, use_unchanged_marker=True, read_only=()
+    ):
+        self.max_bytes = max_bytes
+        self.use_unchanged_marker = use_unchanged_marker
+        # Uncached tools that are known not to change any files
+        self.read_only = set(read_only)
+        # key -> (validator, result, size), oldest first
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        # key -> validator of the last full result handed to the model
+        self.seen = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def _key(self, name, args_dict):
+        arg_name = CACHED_FUNCTIONS[name]
+        resolved = resolve_path(args_dict["working_directory"], args_dict.get(arg_name))
+        extra = tuple(
+            sorted(
+                (key, repr(value))
+                for key, value in args_dict.items()
+                if key not in ("working_directory", arg_name)
+            )
+        )
+        return (name, resolved, extra)
+
+    def call(self, name, args_dict, func):
+        if name not in CACHED_FUNCTIONS:
+            result = func(**args_dict)
+            self.after_call(name, args_dict)
+            return result
+
+        key = self._key(name, args_dict)
+        if name in COMPARED_FUNCTIONS:
+            return self._call_compared(name, key, args_dict, func)
+        validator = _validator(key[1])
+        if validator is None:
+            # Missing paths produce an error message, nothing to cache
+            return func(**args_dict)
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == validator:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                if self.use_unchanged_marker and self.seen.get(key) == validator:
+                    path = args_dict.get(CACHED_FUNCTIONS[name]) or "."
+                    return unchanged_marker(name, path)
+                self.seen[key] = validator
+                return entry[1]
+            self.misses += 1
+
+        result = func(**args_dict)
+        if isinstance(result, str) and not result.startswith("Error:"):
+            self._store(key, validator, result)
+        return result
+
+    def _call_compared(self, name, key, args_dict, func):
+        result = func(**args_dict)
+        if not isinstance(result, str) or result.startswith("Error:"):
+            return result
+        validator = hashlib.sha256(result.encode("utf-8")).digest()
+        with self.lock:
+            unchanged = self.seen.get(key) == validator
+            self.seen[key] = validator
+            if unchanged:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if unchanged and self.use_unchanged_marker:
+            path = args_dict.get(CACHED_FUNCTIONS[name]) or "."
+            return unchanged_marker(name, path)
+        return result
+
+    def _store(self, key, validator, result):
+        size = len(result.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[2]
+            self.entries[key] = (validator, result, size)
+            self.total_bytes += size
+            self.seen[key] = validator
+            # Evict least recently used entries until we fit the budget
+            while self.total_bytes > self.max_bytes:
+                _, (_, _, old_size) = self.entries.popitem(last=False)
+                self.total_bytes -= old_size
+
+    def after_call(self, name, args_dict):
+        if name in WRITE_FUNCTIONS:
+            path = resolve_path(
+                args_dict.get("working_directory", "."), args_dict.get("file_path")
+            )
+            self.invalidate(path)
+        elif name not in CACHED_FUNCTIONS and name not in self.read_only:
+            # Anything else may have changed files we know nothing about
+            self.clear()
+
+    def invalidate(self, path):
+        # Drop the path itself and every directory above it
+        parents = set()
+        parent = os.path.dirname(path)
+        while parent and parent not in parents:
+            parents.add(parent)
+            parent = os.path.dirname(parent)
+
+        with self.lock:
+            for key in list(self.entries):
+                if key[1] == path or key[1] in parents:
+                    _, _, size = self.entries.pop(key)
+                    self.total_bytes -= size
+            for key in list(self.seen):
+                if key[1] == path or key[1] in parents:
+                    del self.seen[key]
+
+    def forget_seen(self, name=None, path=None):
+        # The model no longer has the earlier result, e.g. after compaction
+        with self.lock:
+            for key in list(self.seen):
+                if (name is None or key[0] == name) and (
+                    path is None or key[1] == path
+                ):
+                    del self.seen[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.seen.clear()
+            self.total_bytes = 0
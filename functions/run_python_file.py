@@ -1,25 +1,152 @@
 import os
+import sys
+import time
+import atexit
+import threading
 import subprocess
 from google.genai import types
 
+from config import (
+    RUN_PYTHON_ECHO_OUTPUT,
+    RUN_PYTHON_MAX_OUTPUT_BYTES,
+    RUN_PYTHON_TIMEOUT,
+    WARM_POOL_ENABLED,
+    WARM_POOL_MAX_RSS_MB,
+    WARM_POOL_MAX_RUNS,
+    WARM_POOL_SIZE,
+)
+from functions.python_pool import (
+    DRAIN_SECONDS,
+    OutputBuffer,
+    PoolUnavailable,
+    RunResult,
+    WarmPythonPool,
+    capture_pipes,
+    is_supported,
+)
+from functions.workspace import WorkspaceEscape, get_workspace
+import tracing
 
-def run_python_file(working_directory, file_path, args=None):
-    if not os.path.isabs(working_directory):
-        if not os.path.exists(os.path.abspath(working_directory)):
-            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            potential_path = os.path.join(project_root, working_directory)
-            if os.path.exists(potential_path):
-                working_directory = potential_path
-
-    working_directory = os.path.abspath(working_directory)
-    target_file = os.path.normpath(os.path.join(working_directory, file_path))
-
-    # Will be True or False
-    valid_target_file = (
-        os.path.commonpath([working_directory, target_file]) == working_directory
+_warm_pool = None
+_warm_pool_lock = threading.Lock()
+_echo_output = RUN_PYTHON_ECHO_OUTPUT
+
+
+def set_echo_output(enabled):
+    # Mirror the output of every run to our own terminal as it is produced
+    global _echo_output
+    _echo_output = enabled
+
+
+def _echo_files():
+    if not _echo_output:
+        return None
+    return (sys.stdout.buffer, sys.stderr.buffer)
+
+
+def get_warm_pool():
+    global _warm_pool
+    if not WARM_POOL_ENABLED or not is_supported():
+        return None
+    with _warm_pool_lock:
+        if _warm_pool is None:
+            _warm_pool = WarmPythonPool(
+                size=WARM_POOL_SIZE,
+                max_runs=WARM_POOL_MAX_RUNS,
+                max_rss_mb=WARM_POOL_MAX_RSS_MB,
+            )
+            atexit.register(_warm_pool.close)
+        return _warm_pool
+
+
+def _run_cold(command, working_directory, echo):
+    start = time.monotonic()
+    stdout = OutputBuffer(RUN_PYTHON_MAX_OUTPUT_BYTES)
+    stderr = OutputBuffer(RUN_PYTHON_MAX_OUTPUT_BYTES)
+    with subprocess.Popen(
+        command,
+        cwd=working_directory,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    ) as process:
+        out_r, err_r = process.stdout.fileno(), process.stderr.fileno()
+        deadline = start + RUN_PYTHON_TIMEOUT
+        finished = capture_pipes(out_r, err_r, stdout, stderr, deadline, echo)
+        if finished:
+            # The pipes can close while the script keeps running
+            try:
+                process.wait(max(deadline - time.monotonic(), 0))
+            except subprocess.TimeoutExpired:
+                finished = False
+                process.kill()
+        else:
+            # Keep what was written so far, the model sees where it got stuck
+            process.kill()
+            capture_pipes(
+                out_r, err_r, stdout, stderr, time.monotonic() + DRAIN_SECONDS, echo
+            )
+        returncode = process.wait()
+    return RunResult(
+        returncode, stdout, stderr, time.monotonic() - start, timed_out=not finished
     )
 
-    if not valid_target_file:
+
+def _execute(command, target_file, args, working_directory):
+    echo = _echo_files()
+    pool = get_warm_pool()
+    if pool is not None:
+        try:
+            with tracing.span("tool.subprocess.warm"):
+                return pool.run(
+                    target_file,
+                    args,
+                    working_directory,
+                    timeout=RUN_PYTHON_TIMEOUT,
+                    max_output_bytes=RUN_PYTHON_MAX_OUTPUT_BYTES,
+                    echo=echo,
+                )
+        except PoolUnavailable:
+            # Fall back to a fresh interpreter only if the script never
+            # started, anything later would run it twice
+            pass
+
+    with tracing.span("tool.subprocess.cold"):
+        return _run_cold(command, working_directory, echo)
+
+
+def _format_result(result):
+    stdout = result.stdout.getvalue().decode("utf-8", errors="replace")
+    stderr = result.stderr.getvalue().decode("utf-8", errors="replace")
+
+    lines = []
+    if result.timed_out:
+        lines.append(
+            f"Process timed out after {RUN_PYTHON_TIMEOUT}s and was killed, partial output follows"
+        )
+    elif result.returncode != 0:
+        lines.append(f"Process exited with code {result.returncode}")
+
+    if stdout or stderr:
+        lines.append(f"STDOUT:\n{stdout}\nSTDERR:\n{stderr}")
+    else:
+        lines.append("No output produced")
+
+    summary = f"[exit code {result.returncode}, {result.elapsed:.2f}s"
+    for name, buffer in (("stdout", result.stdout), ("stderr", result.stderr)):
+        if buffer.truncated:
+            summary += (
+                f", {buffer.truncated:,} of {buffer.total:,} {name} bytes truncated"
+            )
+    lines.append(summary + "]")
+    return "\n".join(lines)
+
+
+def run_python_file(working_directory, file_path, args=None):
+    workspace = get_workspace(working_directory)
+    try:
+        target_file = workspace.resolve(file_path)
+    except WorkspaceEscape:
         return f'Error: Cannot execute "{file_path}" as it is outside the permitted working directory'
 
     if not os.path.isfile(target_file):
@@ -33,31 +160,26 @@ def run_python_file(working_directory, file_path, args=None):
     command.extend(args or [])
 
     try:
-        result = subprocess.run(
-            command,
-            cwd=working_directory,
-            capture_output=True,
-            text=True,
-            timeout=30,
-        )
-        if result.returncode != 0:
-            return f"Process exited with code {result.returncode}"
-
-        if not result.stdout and not result.stderr:
-            return "No output produced"
-
-        if result.stdout and result.stderr:
-            return f"STDOUT:\n{result.stdout}\nSTDERR:\n{result.stderr}"
-
-        if result.stdout or result.stderr:
-            return f"STDOUT:\n{result.stdout}\nSTDERR:\n{result.stderr}"
+        with tracing.span("tool.subprocess", file=file_path) as span:
+            result = _execute(command, target_file, args or [], workspace.root)
+            span.set(
+                returncode=result.returncode,
+                timed_out=result.timed_out,
+                stdout_bytes=result.stdout.total,
+                stderr_bytes=result.stderr.total,
+                truncated_bytes=result.stdout.truncated + result.stderr.truncated,
+            )
+        return _format_result(result)
     except Exception as e:
         return f"Error: executing Python file: {e}"
+    finally:
+        # The script may have moved directories or replaced them with symlinks
+        workspace.invalidate()
 
 
 schema_run_python_file = types.FunctionDeclaration(
     name="run_python_file",
-    description="Runs a specified Python file relative to the working directory with optional arguments and captures its output",
+    description="Runs a specified Python file relative to the working directory with optional arguments and captures its output. Long output keeps its beginning and end; the exit code and run time are always reported",
     parameters=types.Schema(
         type=types.Type.OBJECT,
         properties={
@@ -0,0 +1,289 @@
+import os
+import ast
+import json
+import tempfile
+import threading
+from fnmatch import fnmatch
+from google.genai import types
+
+from functions.get_files_info import DEFAULT_IGNORES
+from functions.run_python_file import _execute
+from functions.workspace import get_workspace
+
+# Runs the unittest tests under the working directory in a child interpreter
+# (the warm pool when available) and reports every test. Each test module is
+# mapped to the workspace files it imports, followed transitively through
+# their import statements. A module's results are kept until one of those
+# files changes on disk, so after a write only the affected modules run
+# again. Files the tests read without importing them are not tracked, pass
+# rerun_all to run everything.
+
+RUNNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "unittest_runner.py")
+DEFAULT_PATTERN = "test*.py"
+# Lines of each traceback shown, counted from the end
+MAX_TRACEBACK_LINES = 12
+# Failures shown in full, the rest are only listed by id
+MAX_FAILURES_SHOWN = 10
+SLOWEST_TESTS = 5
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _module_name(rel_path):
+    name = rel_path[: -len(".py")].replace("/", ".")
+    return name[: -len(".__init__")] if name.endswith(".__init__") else name
+
+
+class ImportGraph:
+    # Workspace files each Python file imports, parsed again when it changes
+    def __init__(self, root):
+        self.root = root
+        # rel path -> (stamp, imported rel paths)
+        self.files = {}
+
+    def _module_files(self, name):
+        # Files that importing the dotted name runs, packages on the way
+        # included; empty if it is not a module in the workspace
+        found = []
+        parts = name.split(".")
+        for i in range(1, len(parts) + 1):
+            base = os.path.join(self.root, *parts[:i])
+            rel_base = "/".join(parts[:i])
+            if os.path.isfile(os.path.join(base, "__init__.py")):
+                found.append(f"{rel_base}/__init__.py")
+            elif os.path.isfile(base + ".py"):
+                found.append(f"{rel_base}.py")
+                # A plain module has no submodules
+                return found if i == len(parts) else []
+            elif not os.path.isdir(base):
+                # Not ours, e.g. the standard library
+                return []
+        return found
+
+    def _parse(self, rel_path):
+        try:
+            with open(os.path.join(self.root, rel_path), "rb") as f:
+                tree = ast.parse(f.read(), rel_path)
+        except (OSError, SyntaxError, ValueError):
+            return set()
+        package = _module_name(rel_path).split(".")
+        if not rel_path.endswith("__init__.py"):
+            package = package[:-1]
+        imported = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    imported.update(self._module_files(alias.name))
+            elif isinstance(node, ast.ImportFrom):
+                if node.level:
+                    if node.level - 1 > len(package):
+                        continue
+                    base = package[: len(package) - node.level + 1]
+                    module = ".".join(base + ([node.module] if node.module else []))
+                else:
+                    module = node.module or ""
+                if module:
+                    imported.update(self._module_files(module))
+                # "from pkg import module" imports a submodule
+                for alias in node.names:
+                    name = f"{module}.{alias.name}" if module else alias.name
+                    imported.update(self._module_files(name))
+        imported.discard(rel_path)
+        return imported
+
+    def imports(self, rel_path):
+        stamp = _stamp(os.path.join(self.root, rel_path))
+        known = self.files.get(rel_path)
+        if known is None or known[0] != stamp:
+            known = (stamp, self._parse(rel_path) if stamp else set())
+            self.files[rel_path] = known
+        return known[1]
+
+    def closure(self, rel_path):
+        seen = {rel_path}
+        pending = [rel_path]
+        while pending:
+            for imported in self.imports(pending.pop()):
+                if imported not in seen:
+                    seen.add(imported)
+                    pending.append(imported)
+        return seen
+
+
+class TestState:
+    # Import graph and last results of one working directory
+    def __init__(self, root):
+        self.root = root
+        self.graph = ImportGraph(root)
+        # module -> (fingerprint, {"import_error", "tests"})
+        self.results = {}
+        self.lock = threading.Lock()
+
+    def fingerprint(self, rel_path):
+        files = sorted(self.graph.closure(rel_path))
+        return tuple((path, self.graph.files[path][0]) for path in files)
+
+
+_states = {}
+_states_lock = threading.Lock()
+
+
+def get_state(root):
+    with _states_lock:
+        state = _states.get(root)
+        if state is None:
+            state = TestState(root)
+            _states[root] = state
+        return state
+
+
+def discover(root, pattern):
+    # Test files under root, as root relative paths, in name order
+    found = []
+    for directory, dirs, names in os.walk(root):
+        dirs[:] = sorted(
+            d for d in dirs if d not in DEFAULT_IGNORES and not d.startswith(".")
+        )
+        for name in sorted(names):
+            if name.endswith(".py") and fnmatch(name, pattern):
+                rel_path = os.path.relpath(os.path.join(directory, name), root)
+                found.append(rel_path.replace(os.sep, "/"))
+    return found
+
+
+def _run(root, modules):
+    # Returns ({module: result}, None) or (None, error text)
+    fd, results_path = tempfile.mkstemp(prefix="run_tests.", suffix=".json")
+    os.close(fd)
+    try:
+        args = [results_path] + modules
+        run = _execute(["python", RUNNER] + args, RUNNER, args, root)
+        try:
+            with open(results_path, encoding="utf-8") as f:
+                return json.load(f), None
+        except (OSError, ValueError):
+            pass
+        stderr = run.stderr.getvalue().decode("utf-8", errors="replace")
+        if run.timed_out:
+            return None, f"Error: Tests timed out and were killed\n{stderr[-2000:]}"
+        return None, f"Error: Test runner failed ({run.returncode})\n{stderr[-2000:]}"
+    finally:
+        os.unlink(results_path)
+
+
+def _short_traceback(text):
+    lines = text.rstrip().splitlines()
+    if len(lines) > MAX_TRACEBACK_LINES:
+        lines = ["  ..."] + lines[-MAX_TRACEBACK_LINES:]
+    return "\n".join("  " + line for line in lines)
+
+
+def _format(results, ran, reused):
+    tests = [test for result in results.values() for test in result["tests"]]
+    counts = {"pass": 0, "fail": 0, "error": 0, "skip": 0}
+    for test in tests:
+        counts[test["status"]] += 1
+    import_errors = {
+        module: result["import_error"]
+        for module, result in results.items()
+        if result["import_error"]
+    }
+
+    # A module that fails to import is one error, its tests are unknown
+    errors = counts["error"] + len(import_errors)
+    lines = [
+        f"{len(tests)} tests in {len(results)} modules: {counts['pass']} passed, "
+        f"{counts['fail']} failed, {errors} errors, {counts['skip']} skipped "
+        f"({len(ran)} modules run, {len(reused)} unchanged and reused)"
+    ]
+    if import_errors:
+        lines.append(f"Failed to import: {', '.join(import_errors)}")
+    if ran:
+        lines.append(f"Run: {', '.join(ran)}")
+    for module, text in import_errors.items():
+        lines.append(f"IMPORT ERROR {module}\n{_short_traceback(text)}")
+
+    failed = [test for test in tests if test["status"] in ("fail", "error")]
+    for test in failed[:MAX_FAILURES_SHOWN]:
+        lines.append(f"{test['status'].upper()} {test['id']} ({test['time']:.3f}s)")
+        if test.get("traceback"):
+            lines.append(_short_traceback(test["traceback"]))
+    if len(failed) > MAX_FAILURES_SHOWN:
+        rest = ", ".join(test["id"] for test in failed[MAX_FAILURES_SHOWN:])
+        lines.append(f"[...{len(failed) - MAX_FAILURES_SHOWN} more failed: {rest}]")
+
+    slowest = sorted(tests, key=lambda test: test["time"], reverse=True)
+    if slowest:
+        lines.append("Slowest:")
+        lines.extend(
+            f"  {test['time']:.3f}s {test['id']}" for test in slowest[:SLOWEST_TESTS]
+        )
+    return "\n".join(lines)
+
+
+def run_tests(working_directory, pattern=None, rerun_all=False):
+    root = get_workspace(working_directory).root
+    files = discover(root, pattern or DEFAULT_PATTERN)
+    if not files:
+        return f'No test files matching "{pattern or DEFAULT_PATTERN}" found'
+
+    state = get_state(root)
+    with state.lock:
+        fingerprints = {}
+        results = {}
+        stale = []
+        reused = []
+        for rel_path in files:
+            module = _module_name(rel_path)
+            fingerprints[module] = (rel_path, state.fingerprint(rel_path))
+            known = state.results.get(module)
+            if rerun_all or known is None or known[0] != fingerprints[module][1]:
+                stale.append(module)
+            else:
+                results[module] = known[1]
+                reused.append(module)
+
+        if stale:
+            ran, error = _run(root, stale)
+            if error is not None:
+                return error
+            for module in stale:
+                results[module] = ran[module]
+                rel_path, fingerprint = fingerprints[module]
+                # Only keep results of code the tests did not change themselves.
+                # An import error may be a module still to be written, which
+                # the fingerprint cannot see, so those modules always run again
+                if ran[module]["import_error"]:
+                    state.results.pop(module, None)
+                elif state.fingerprint(rel_path) == fingerprint:
+                    state.results[module] = (fingerprint, ran[module])
+                else:
+                    state.results.pop(module, None)
+
+        results = {module: results[module] for module in fingerprints}
+    return _format(results, stale, reused)
+
+
+schema_run_tests = types.FunctionDeclaration(
+    name="run_tests",
+    description="Discovers and runs the unittest tests under the working directory and reports passed, failed and errored tests with short tracebacks and the slowest tests. Only test modules affected by changes since the last run are run again, the others reuse their results",
+    parameters=types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            "pattern": types.Schema(
+                type=types.Type.STRING,
+                description=f"Glob for test file names (default {DEFAULT_PATTERN})",
+            ),
+            "rerun_all": types.Schema(
+                type=types.Type.BOOLEAN,
+                description="Run every test module even if nothing it imports changed, e.g. after changing data files the tests read",
+            ),
+        },
+    ),
+)
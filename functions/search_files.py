@@ -0,0 +1,396 @@
+import os
+import re
+import threading
+from google.genai import types
+
+from config import MAX_SEARCH_RESULTS
+from functions.get_files_info import DEFAULT_IGNORES
+from functions.workspace import WorkspaceEscape, get_workspace
+
+# Files larger than this are not indexed or searched
+MAX_INDEXED_FILE_SIZE = 1024 * 1024
+MAX_SNIPPET_CHARS = 200
+
+
+def _trigrams(text):
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def _read_text(path):
+    with open(path, "rb") as f:
+        data = f.read(MAX_INDEXED_FILE_SIZE + 1)
+    # Skip binary files
+    if b"\0" in data[:8192]:
+        return None
+    return data.decode("utf-8", errors="replace")
+
+
+# Characters that end a literal run in a regular expression
+REGEX_SPECIAL = set(".^$*+?{}[]()|\\")
+# Quantifiers that make the character before them optional
+OPTIONAL_QUANTIFIERS = set("*?{")
+# Escapes followed by a fixed number of hex digits
+ESCAPE_DIGITS = {"x": 2, "u": 4, "U": 8}
+# Inline flags that change how the rest of the pattern reads, e.g. (?x)
+INLINE_VERBOSE = re.compile(r"\(\?[a-zA-Z]*x")
+
+
+def _skip_class(pattern, i):
+    # Returns the index after the [...] set starting at pattern[i]
+    i += 1
+    if i < len(pattern) and pattern[i] == "^":
+        i += 1
+    if i < len(pattern) and pattern[i] == "]":
+        i += 1
+    while i < len(pattern) and pattern[i] != "]":
+        i += 2 if pattern[i] == "\\" else 1
+    return i + 1
+
+
+def _skip_group(pattern, i):
+    # Returns the index after the (...) group starting at pattern[i]
+    depth = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            i += 2
+            continue
+        if char == "[":
+            i = _skip_class(pattern, i)
+            continue
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return i
+
+
+def _skip_escape(pattern, i):
+    # Index just past the letter or digit escape starting at pattern[i]:
+    # \xhh, \uXXXX, \UXXXXXXXX, \N{name}, octal or group numbers, \d etc.
+    kind = pattern[i + 1]
+    if kind == "N" and pattern.startswith("{", i + 2):
+        end = pattern.find("}", i)
+        return len(pattern) if end == -1 else end + 1
+    if kind in ESCAPE_DIGITS:
+        return i + 2 + ESCAPE_DIGITS[kind]
+    if kind.isdigit():
+        end = i + 2
+        while end < min(i + 4, len(pattern)) and pattern[end].isdigit():
+            end += 1
+        return end
+    return i + 2
+
+
+def _regex_literals(pattern):
+    # Literal runs every match must contain, used to narrow the candidate
+    # files. Anything unclear only ends a run: groups and sets are skipped,
+    # a character made optional by a quantifier is dropped, and a top-level
+    # alternation means nothing is guaranteed.
+    if INLINE_VERBOSE.search(pattern):
+        return []
+    runs = []
+    current = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\" and i + 1 < len(pattern) and not pattern[i + 1].isalnum():
+            current.append(pattern[i + 1])
+            i += 2
+            continue
+        if char not in REGEX_SPECIAL:
+            current.append(char)
+            i += 1
+            continue
+        if char == "|":
+            return []
+        if char in OPTIONAL_QUANTIFIERS and current:
+            current.pop()
+        runs.append("".join(current))
+        current = []
+        if char == "\\":
+            # A class such as \d or an escape such as \n or \x20
+            i = _skip_escape(pattern, i)
+        elif char == "[":
+            i = _skip_class(pattern, i)
+        elif char == "(":
+            i = _skip_group(pattern, i)
+        elif char == "{":
+            end = pattern.find("}", i)
+            i = len(pattern) if end == -1 else end + 1
+        else:
+            i += 1
+    runs.append("".join(current))
+    return [run for run in runs if len(run) >= 3]
+
+
+class TrigramIndex:
+    # Maps lowercase trigrams to the files under root that contain them
+    def __init__(self, root):
+        self.root = root
+        # relative path -> (mtime_ns, size, trigrams)
+        self.files = {}
+        self.postings = {}
+        self.dirty = set()
+        # Set until the first scan, and again when files may have changed
+        # in ways we were not told about
+        self.stale = True
+        self.lock = threading.Lock()
+
+    def _walk(self, directory, prefix):
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            return
+        for entry in entries:
+            if entry.name in DEFAULT_IGNORES:
+                continue
+            rel_path = prefix + entry.name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from self._walk(entry.path, rel_path + "/")
+                elif entry.is_file(follow_symlinks=False):
+                    st = entry.stat()
+                    if st.st_size <= MAX_INDEXED_FILE_SIZE:
+                        yield rel_path, (st.st_mtime_ns, st.st_size)
+            except OSError:
+                continue
+
+    def _add(self, rel_path, stamp):
+        try:
+            text = _read_text(os.path.join(self.root, rel_path))
+        except OSError:
+            text = None
+        grams = _trigrams(text.lower()) if text is not None else set()
+        self.files[rel_path] = (stamp, grams)
+        for gram in grams:
+            self.postings.setdefault(gram, set()).add(rel_path)
+
+    def _remove(self, rel_path):
+        _, grams = self.files.pop(rel_path)
+        for gram in grams:
+            paths = self.postings.get(gram)
+            if paths is not None:
+                paths.discard(rel_path)
+                if not paths:
+                    del self.postings[gram]
+
+    def _stamp(self, rel_path):
+        try:
+            st = os.stat(os.path.join(self.root, rel_path))
+        except OSError:
+            return None
+        if st.st_size > MAX_INDEXED_FILE_SIZE:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def refresh(self):
+        with self.lock:
+            if self.stale:
+                # Compare every file's mtime and size with what we indexed
+                current = dict(self._walk(self.root, ""))
+                for rel_path in list(self.files):
+                    if rel_path not in current:
+                        self._remove(rel_path)
+                for rel_path, stamp in current.items():
+                    known = self.files.get(rel_path)
+                    if known is None or known[0] != stamp:
+                        if known is not None:
+                            self._remove(rel_path)
+                        self._add(rel_path, stamp)
+                self.dirty.clear()
+                self.stale = False
+                return
+
+            # Otherwise only re-index files we were told about
+            for rel_path in self.dirty:
+                if rel_path in self.files:
+                    self._remove(rel_path)
+                stamp = self._stamp(rel_path)
+                if stamp is not None:
+                    self._add(rel_path, stamp)
+            self.dirty.clear()
+
+    def notify_write(self, rel_path):
+        with self.lock:
+            self.dirty.add(os.path.normpath(rel_path))
+
+    def invalidate(self):
+        with self.lock:
+            self.stale = True
+
+    def candidates(self, literals):
+        with self.lock:
+            if not literals:
+                return sorted(self.files)
+            result = None
+            for literal in literals:
+                for gram in _trigrams(literal.lower()):
+                    paths = self.postings.get(gram, set())
+                    result = set(paths) if result is None else result & paths
+                    if not result:
+                        return []
+            return sorted(result)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(root):
+    with _indexes_lock:
+        index = _indexes.get(root)
+        if index is None:
+            index = TrigramIndex(root)
+            _indexes[root] = index
+        return index
+
+
+def notify_write(working_directory, file_path):
+    # Called after write_file / edit_file so the next search sees the new content
+    workspace = get_workspace(working_directory)
+    with _indexes_lock:
+        index = _indexes.get(workspace.root)
+    if index is not None:
+        try:
+            index.notify_write(workspace.relpath(file_path))
+        except WorkspaceEscape:
+            pass
+
+
+def invalidate_index(working_directory):
+    # Called after run_python_file and other tools that may change any file,
+    # the next search rescans the tree
+    workspace = get_workspace(working_directory)
+    with _indexes_lock:
+        index = _indexes.get(workspace.root)
+    if index is not None:
+        index.invalidate()
+
+
+def _format_match(rel_path, lines, index, context):
+    out = []
+    for i in range(max(0, index - context), min(len(lines), index + context + 1)):
+        sep = ":" if i == index else "-"
+        out.append(f"{rel_path}{sep}{i + 1}{sep}{lines[i][:MAX_SNIPPET_CHARS]}")
+    return out
+
+
+def search_files(
+    working_directory,
+    pattern,
+    regex=False,
+    ignore_case=False,
+    directory=".",
+    context=1,
+    max_results=None,
+):
+    workspace = get_workspace(working_directory)
+    working_directory = workspace.root
+    try:
+        target_dir = workspace.resolve(directory)
+    except WorkspaceEscape:
+        return f'Error: Cannot search "{directory}" as it is outside the permitted working directory'
+
+    if not os.path.isdir(target_dir):
+        return f'Error: "{directory}" is not a directory'
+
+    if not pattern:
+        return "Error: Search pattern is empty"
+
+    flags = re.IGNORECASE if ignore_case else 0
+    try:
+        matcher = re.compile(pattern if regex else re.escape(pattern), flags)
+    except re.error as e:
+        return f'Error: Invalid regular expression "{pattern}": {e}'
+
+    try:
+        context = max(int(context), 0)
+        max_results = min(int(max_results or MAX_SEARCH_RESULTS), MAX_SEARCH_RESULTS)
+    except (TypeError, ValueError) as e:
+        return f"Error: Invalid search arguments: {e}"
+
+    literals = _regex_literals(pattern) if regex else [pattern]
+
+    index = get_index(working_directory)
+    index.refresh()
+
+    prefix = os.path.relpath(target_dir, working_directory)
+    prefix = "" if prefix == "." else prefix + "/"
+
+    results = []
+    matches = 0
+    files_matched = 0
+    truncated = False
+    for rel_path in index.candidates(literals):
+        if not rel_path.startswith(prefix):
+            continue
+        try:
+            text = _read_text(os.path.join(working_directory, rel_path))
+        except OSError:
+            continue
+        if text is None or not matcher.search(text):
+            continue
+
+        files_matched += 1
+        lines = text.splitlines()
+        for line_index, line in enumerate(lines):
+            if not matcher.search(line):
+                continue
+            if matches >= max_results:
+                truncated = True
+                break
+            if context and results:
+                results.append("--")
+            results.extend(_format_match(rel_path, lines, line_index, context))
+            matches += 1
+        if truncated:
+            break
+
+    if not matches:
+        return f'No matches for "{pattern}"'
+
+    if truncated:
+        results.append(
+            f"[...Stopped after {max_results} matches in {files_matched} files, narrow the search]"
+        )
+    return "\n".join(results)
+
+
+schema_search_files = types.FunctionDeclaration(
+    name="search_files",
+    description="Searches file contents under the working directory for a substring or regular expression and returns matching lines as path:line:text with surrounding context",
+    parameters=types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            "pattern": types.Schema(
+                type=types.Type.STRING,
+                description="Text to search for, or a regular expression if regex is true",
+            ),
+            "regex": types.Schema(
+                type=types.Type.BOOLEAN,
+                description="Treat pattern as a Python regular expression (default false)",
+            ),
+            "ignore_case": types.Schema(
+                type=types.Type.BOOLEAN,
+                description="Match case-insensitively (default false)",
+            ),
+            "directory": types.Schema(
+                type=types.Type.STRING,
+                description="Directory to search in, relative to the working directory (default is the working directory itself)",
+            ),
+            "context": types.Schema(
+                type=types.Type.INTEGER,
+                description="Number of lines to show before and after each match (default 1)",
+            ),
+            "max_results": types.Schema(
+                type=types.Type.INTEGER,
+                description=f"Maximum number of matching lines to return (at most {MAX_SEARCH_RESULTS})",
+            ),
+        },
+    ),
+)
@@ -0,0 +1,282 @@
+import re
+import itertools
+from google.genai import types
+
+from config import (
+    COLLAPSE_REPEATS_MIN,
+    TOOL_RESPONSE_MAX_TOKENS,
+    TOOL_RESPONSE_TOOL_TOKENS,
+    TURN_RESPONSE_MAX_TOKENS,
+)
+from history import CHARS_PER_TOKEN
+
+# Shapes tool results on their way into the transcript. Output that looks
+# binary is replaced by a note, repeated lines in command output are
+# collapsed, and text over its token budget keeps its head and tail with a
+# marker saying how many bytes were left out. One budget per tool response,
+# and one shared by all responses of a model turn. Dict results, e.g. from
+# read_files, have their string values shaped, the budget split between them.
+
+# Output of these tools is logs, where repeated lines carry no information
+COLLAPSE_TOOLS = {"run_python_file", "run_tests"}
+# Bytes or characters sniffed to recognize binary data
+SNIFF_BYTES = 8192
+# Control characters other than these are not found in text
+TEXT_CONTROLS = set(b"\t\n\r\f\b\x1b")
+BINARY_CONTROLS = bytes(c for c in range(32) if c not in TEXT_CONTROLS)
+# Share of control characters above which data is treated as binary
+BINARY_RATIO = 0.1
+# Room kept for the marker when cutting text to a budget
+MARKER_CHARS = 200
+# Markers already in a text, counted again when the text is cut further
+MARKER_RE = re.compile(r"\[\.\.\. ([\d,]+) bytes (?:omitted|truncated)")
+
+# Header of a ranged get_file_content read, the file text follows it
+RANGE_HEADER = re.compile(
+    r"\[[^\n]*?: (?:lines (?P<line>\d+)-\d+ of \d+ \(bytes (?P<byte>\d+)-"
+    r"|bytes (?P<byte2>\d+)-)[^\n]*\]\n"
+)
+
+# How the model can get at what was left out
+HINTS = {
+    "get_file_content": "read them with offset/length or start_line/end_line",
+    "read_files": "read them with get_file_content",
+    "get_files_info": "list a subdirectory or continue from the cursor",
+    "search_files": "narrow the pattern or the directory",
+    "run_python_file": "print less or write the output to a file",
+    "run_tests": "run fewer tests with a pattern",
+}
+DEFAULT_HINT = "ask for a smaller part"
+
+
+def estimate_tokens(value):
+    # The same rough conversion as history compaction
+    text = value if isinstance(value, str) else str(value)
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def tool_budget(name):
+    return TOOL_RESPONSE_TOOL_TOKENS.get(name, TOOL_RESPONSE_MAX_TOKENS)
+
+
+def fair_shares(sizes, budget):
+    # Water-filling: the smallest first, each gets at most an equal share of
+    # what is left, so small items stay whole and the rest split the remainder
+    shares = {}
+    remaining = budget
+    order = sorted(sizes, key=sizes.get)
+    for index, key in enumerate(order):
+        share = min(sizes[key], remaining // (len(order) - index))
+        shares[key] = share
+        remaining -= share
+    return shares
+
+
+def looks_binary(data):
+    # Takes bytes or str; a NUL, or many other control characters, near the start
+    sample = data[:SNIFF_BYTES]
+    if isinstance(sample, str):
+        sample = sample.encode("utf-8", errors="replace")
+    if b"\0" in sample:
+        return True
+    controls = len(sample) - len(sample.translate(None, BINARY_CONTROLS))
+    return bool(sample) and controls / len(sample) > BINARY_RATIO
+
+
+def collapse_repeats(text, min_repeats=COLLAPSE_REPEATS_MIN):
+    # Runs of at least min_repeats identical lines are kept once with a count
+    if text.count("\n") < min_repeats:
+        return text
+    out = []
+    # Split on "\n" only, other line breaks such as form feeds are text
+    lines = text.split("\n")
+    last = lines.pop()
+    lines = [line + "\n" for line in lines]
+    if last:
+        lines.append(last)
+    for line, group in itertools.groupby(lines):
+        count = sum(1 for _ in group)
+        if count < min_repeats:
+            out.append(line * count)
+            continue
+        out.append(line if line.endswith("\n") else line + "\n")
+        marker = f"[... previous line repeated {count - 1:,} more times ...]"
+        # A last line without a newline keeps the text's missing newline
+        out.append(marker + "\n" if line.endswith("\n") else marker)
+    return "".join(out)
+
+
+def _omitted_bytes(text):
+    # Bytes of text, plus those markers in it say were already left out
+    total = len(text.encode("utf-8", errors="replace"))
+    for match in MARKER_RE.finditer(text):
+        total += int(match.group(1).replace(",", ""))
+    return total
+
+
+def elide(text, max_chars, hint=DEFAULT_HINT, origin=None):
+    # Keeps the head and tail of text within max_chars, cut at line breaks
+    # where one is close, and reports what was left out in between. origin
+    # is (line, byte) of the text's start in the file it was read from, the
+    # line None if unknown; without it lines are counted in the text itself.
+    if len(text) <= max_chars:
+        return text
+    keep = max(max_chars - MARKER_CHARS, 0)
+    head_end = keep // 2
+    tail_start = len(text) - (keep - head_end)
+    newline = text.rfind("\n", head_end // 2, head_end)
+    if newline != -1:
+        head_end = newline + 1
+    newline = text.find("\n", tail_start, tail_start + (keep - head_end) // 2)
+    if newline != -1:
+        tail_start = newline + 1
+    middle = text[head_end:tail_start]
+    omitted = _omitted_bytes(middle)
+    first_line = text.count("\n", 0, head_end) + 1
+    last_line = first_line + middle.count("\n") - middle.endswith("\n")
+    if origin is None:
+        where = f"lines {first_line}-{last_line} of this output"
+    else:
+        line, byte = origin
+        start = byte + len(text[:head_end].encode("utf-8", errors="replace"))
+        where = f"file bytes {start}-{start + omitted}"
+        if line is not None:
+            where = (
+                f"file lines {line + first_line - 1}-{line + last_line - 1}, {where}"
+            )
+    marker = (
+        f"\n[... {omitted:,} bytes omitted ({where}) to fit the response "
+        f"budget; {hint} ...]\n"
+    )
+    return text[:head_end] + marker + text[tail_start:]
+
+
+def _file_origin(name, text):
+    # Splits a get_file_content result into its range header and the file
+    # text, and returns where that text starts in the file
+    if name != "get_file_content" or text.startswith("Error:"):
+        return "", text, None
+    match = RANGE_HEADER.match(text)
+    if match is None:
+        return "", text, (1, 0)
+    line = match["line"] and int(match["line"])
+    byte = int(match["byte"] or match["byte2"])
+    return match[0], text[match.end() :], (line, byte)
+
+
+def _shape_text(name, text, max_chars, origin=None):
+    if looks_binary(text):
+        size = len(text.encode("utf-8", errors="replace"))
+        return f"[... {size:,} bytes omitted: binary data, not shown ...]"
+    if name in COLLAPSE_TOOLS:
+        text = collapse_repeats(text)
+    hint = HINTS.get(name, DEFAULT_HINT)
+    if origin is None:
+        header, text, origin = _file_origin(name, text)
+        if header:
+            return header + elide(text, max_chars - len(header), hint, origin)
+    return elide(text, max_chars, hint, origin)
+
+
+def _strings(value, path=()):
+    # Yields (path, text) for every string in nested dicts and lists
+    if isinstance(value, str):
+        yield path, value
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            yield from _strings(item, path + (key,))
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            yield from _strings(item, path + (index,))
+
+
+def _replace(value, path, text):
+    if not path:
+        return text
+    value[path[0]] = _replace(value[path[0]], path[1:], text)
+    return value
+
+
+def _copy(value):
+    if isinstance(value, dict):
+        return {key: _copy(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    return value
+
+
+def _leaf_origin(name, path):
+    # read_files contents start at the beginning of their file
+    if name == "read_files" and path and path[-1] == "content":
+        return (1, 0)
+    return None
+
+
+def shape_result(name, result, max_tokens=None):
+    # Returns the result as it should go into the transcript
+    if max_tokens is None:
+        max_tokens = tool_budget(name)
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if isinstance(result, str):
+        return _shape_text(name, result, max_chars)
+    if not isinstance(result, (dict, list)):
+        return result
+
+    strings = dict(_strings(result))
+    shaped = {
+        path: _shape_text(name, text, len(text)) for path, text in strings.items()
+    }
+    sizes = {path: len(text) for path, text in shaped.items()}
+    if sum(sizes.values()) > max_chars:
+        shares = fair_shares(sizes, max_chars)
+        hint = HINTS.get(name, DEFAULT_HINT)
+        shaped = {
+            path: elide(
+                text, max(shares[path], MARKER_CHARS), hint, _leaf_origin(name, path)
+            )
+            for path, text in shaped.items()
+        }
+    if all(shaped[path] == strings[path] for path in strings):
+        return result
+    # Rebuilt on a copy, the tool cache may hold the original
+    result = _copy(result)
+    for path, text in shaped.items():
+        result = _replace(result, path, text)
+    return result
+
+
+def shape_turn(contents, max_tokens=None, cache=None):
+    # Shapes the tool responses of one model turn, each within its tool's
+    # budget, together within the turn's budget. Small responses stay whole,
+    # the large ones split what is left. Each result is cut only once, so
+    # the line and byte numbers in its marker are exact. A tool cache is told
+    # which tools had results cut, the model has not seen those in full.
+    if max_tokens is None:
+        max_tokens = TURN_RESPONSE_MAX_TOKENS
+    budgets = {}
+    for index, content in enumerate(contents):
+        for part_index, part in enumerate(content.parts or []):
+            response = part.function_response
+            if response is not None and "result" in (response.response or {}):
+                tokens = estimate_tokens(response.response["result"])
+                budgets[index, part_index] = min(tokens, tool_budget(response.name))
+    if max_tokens and sum(budgets.values()) > max_tokens:
+        budgets = fair_shares(budgets, max_tokens)
+
+    contents = list(contents)
+    for (index, part_index), budget in budgets.items():
+        content = contents[index]
+        response = content.parts[part_index].function_response
+        result = response.response["result"]
+        shaped = shape_result(response.name, result, budget)
+        if shaped == result:
+            continue
+        if cache is not None:
+            # A read again must not be answered with an "unchanged" marker
+            cache.forget_seen(response.name)
+        parts = list(content.parts)
+        parts[part_index] = types.Part.from_function_response(
+            name=response.name, response={"result": shaped}
+        )
+        contents[index] = types.Content(role=content.role, parts=parts)
+    return contents
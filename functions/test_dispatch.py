@@ -0,0 +1,18 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.genai import types
+from dispatch import dispatch_function_calls
+
+calls = [
+    types.FunctionCall(name="get_files_info", args={"directory": "."}),
+    types.FunctionCall(name="get_file_content", args={"file_path": "main.py"}),
+    types.FunctionCall(name="get_file_content", args={"file_path": "pkg/render.py"}),
+    types.FunctionCall(name="get_files_info", args={"directory": "pkg"}),
+]
+
+for content in dispatch_function_calls(calls, max_workers=4):
+    part = content.parts[0].function_response
+    print(part.name, str(part.response)[:80])
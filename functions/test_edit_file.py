@@ -0,0 +1,53 @@
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from edit_file import edit_file
+
+with tempfile.TemporaryDirectory() as scratch:
+    with open(os.path.join(scratch, "app.py"), "w") as f:
+        f.write(
+            "def add(a, b):\n    return a + b\n\n\ndef sub(a, b):\n    return a - b\n"
+        )
+
+    print(edit_file(scratch, "app.py", edits=[{"search": "a + b", "replace": "b + a"}]))
+    print(
+        edit_file(scratch, "app.py", edits=[{"search": "(a, b)", "replace": "(x, y)"}])
+    )
+    print(edit_file(scratch, "app.py", edits=[{"search": "not there", "replace": ""}]))
+    print(
+        edit_file(
+            scratch,
+            "app.py",
+            diff="--- a/app.py\n+++ b/app.py\n@@ -5,2 +5,3 @@\n def sub(a, b):\n-    return a - b\n+    # Subtract b from a\n+    return a - b\n",
+        )
+    )
+    print(
+        edit_file(
+            scratch,
+            "app.py",
+            diff="@@ -1,1 +1,1 @@\n-def mul(a, b):\n+def times(a, b):\n",
+        )
+    )
+    print(
+        edit_file(
+            scratch,
+            "app.py",
+            edits=[{"search": "sub", "replace": "minus"}],
+            expected_sha256="0" * 64,
+        )
+    )
+    print(edit_file(scratch, "app.py"))
+    print(edit_file(scratch, "../app.py", edits=[]))
+    print(edit_file(scratch, "missing.py", edits=[]))
+    with open(os.path.join(scratch, "app.py")) as f:
+        print(f.read())
+
+    # Only "\n" ends a line, form feeds and mixed line endings are kept
+    with open(os.path.join(scratch, "mixed.txt"), "wb") as f:
+        f.write(b"a\r\n\x0cb\nc\r\nd")
+    print(edit_file(scratch, "mixed.txt", diff="@@ -3,2 +3,3 @@\n-c\n+C\n+C2\n d\n"))
+    with open(os.path.join(scratch, "mixed.txt"), "rb") as f:
+        print(f.read())
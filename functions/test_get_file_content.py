@@ -1,3 +1,8 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 from get_file_content import get_file_content
 
 print(get_file_content("calculator", "lorem.txt"))
@@ -5,3 +10,6 @@ print(get_file_content("calculator", "main.py"))
 print(get_file_content("calculator", "pkg/calculator.py"))
 print(get_file_content("calculator", "/bin/cat"))
 print(get_file_content("calculator", "pkg/does_not_exist.py"))
+print(get_file_content("calculator", "pkg/calculator.py", start_line=4, end_line=9))
+print(get_file_content("calculator", "pkg/calculator.py", offset=100, length=80))
+print(get_file_content("calculator", "tests.py", start_line=1000))
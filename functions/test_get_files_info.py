@@ -1,6 +1,16 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 from get_files_info import get_files_info
 
 print(get_files_info("calculator", "."))
 print(get_files_info("calculator", "pkg"))
 print(get_files_info("calculator", "/bin"))
 print(get_files_info("calculator", "../"))
+print(get_files_info("calculator", ".", max_depth=3))
+print(get_files_info("calculator", ".", max_depth=3, include=["*.py"]))
+print(get_files_info("calculator", ".", max_depth=3, exclude=["pkg"]))
+print(get_files_info("calculator", ".", max_depth=3, limit=3))
+print(get_files_info("calculator", ".", max_depth=3, limit=3, cursor="3"))
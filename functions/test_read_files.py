@@ -0,0 +1,36 @@
+import os
+import sys
+import json
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from read_files import read_files
+
+
+def show(result):
+    if isinstance(result, str):
+        print(result)
+        return
+    for entry in result["files"]:
+        content = entry.pop("content", None)
+        if content is not None:
+            entry["chars"] = len(content)
+        print(json.dumps(entry))
+    if "omitted" in result:
+        print(result["omitted"])
+
+
+show(read_files("calculator", ["main.py", "pkg/*.py"]))
+# The small files are read whole, the large one gets what is left
+show(
+    read_files(
+        "calculator", ["lorem.txt", "main.py", "pkg/calculator.py"], max_chars=3000
+    )
+)
+show(read_files("calculator", ["**/*.txt", "main.py", "main.py"]))
+show(read_files("calculator", ["/bin/cat", "../main.py", "missing.py", "pkg"]))
+show(read_files("calculator", ["*.nothing"]))
+show(read_files("calculator", []))
+
+result = read_files("calculator", ["pkg/calculator.py"], max_chars=100)
+print(result["files"][0]["content"])
@@ -0,0 +1,46 @@
+import os
+import sys
+import time
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.genai import types
+from get_file_content import get_file_content
+from result_cache import ToolResultCache
+from shaping import shape_turn
+
+
+def read(cache, directory, file_path):
+    args = {"working_directory": directory, "file_path": file_path}
+    return cache.call("get_file_content", args, get_file_content)
+
+
+with tempfile.TemporaryDirectory() as scratch:
+    with open(os.path.join(scratch, "notes.txt"), "w") as f:
+        f.write("first version\n")
+
+    cache = ToolResultCache()
+    print(read(cache, scratch, "notes.txt"))
+    # Read again unchanged, the model is pointed to its earlier result
+    print(read(cache, scratch, "notes.txt"))
+
+    # A new mtime and size invalidate the entry
+    time.sleep(0.01)
+    with open(os.path.join(scratch, "notes.txt"), "w") as f:
+        f.write("second, longer version\n")
+    print(read(cache, scratch, "notes.txt"))
+    print(f"hits={cache.hits} misses={cache.misses}")
+
+    # A result cut to fit the response budget was only partly seen, reading
+    # it again returns the file rather than the "unchanged" marker
+    with open(os.path.join(scratch, "log.txt"), "w") as f:
+        f.write("".join(f"line {i}\n" for i in range(500)))
+    result = read(cache, scratch, "log.txt")
+    response = types.Part.from_function_response(
+        name="get_file_content", response={"result": result}
+    )
+    contents = [types.Content(role="tool", parts=[response])]
+    shaped = shape_turn(contents, max_tokens=200, cache=cache)
+    print(len(shaped[0].parts[0].function_response.response["result"]), "chars shown")
+    print(read(cache, scratch, "log.txt") == result)
@@ -1,3 +1,8 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 from run_python_file import run_python_file
 
 print(run_python_file("calculator", "main.py"))
@@ -6,3 +11,14 @@ print(run_python_file("calculator", "tests.py"))
 print(run_python_file("calculator", "../main.py"))
 print(run_python_file("calculator", "nonexistent.py"))
 print(run_python_file("calculator", "lorem.txt"))
+
+# Long output keeps its head and tail, failures keep their output
+import tempfile
+
+with tempfile.TemporaryDirectory() as scratch:
+    with open(os.path.join(scratch, "chatty.py"), "w") as f:
+        f.write("for i in range(100000):\n    print('line', i)\n")
+    with open(os.path.join(scratch, "fails.py"), "w") as f:
+        f.write("print('before the error')\nraise ValueError('boom')\n")
+    print(run_python_file(scratch, "chatty.py"))
+    print(run_python_file(scratch, "fails.py"))
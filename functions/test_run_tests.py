@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from run_tests import run_tests
+
+
+def write(root, path, text):
+    os.makedirs(os.path.dirname(os.path.join(root, path)), exist_ok=True)
+    with open(os.path.join(root, path), "w") as f:
+        f.write(text)
+    # Make sure the change is visible in the mtime even on coarse clocks
+    time.sleep(0.01)
+
+
+root = tempfile.mkdtemp()
+write(root, "shapes/__init__.py", "")
+write(root, "shapes/area.py", "def square(x):\n    return x * x\n")
+write(root, "shapes/names.py", "def title(s):\n    return s.title()\n")
+write(
+    root,
+    "test_area.py",
+    "import unittest\nfrom shapes.area import square\n\n\n"
+    "class TestArea(unittest.TestCase):\n"
+    "    def test_square(self):\n        self.assertEqual(square(3), 9)\n\n"
+    "    def test_zero(self):\n        self.assertEqual(square(0), 0)\n",
+)
+write(
+    root,
+    "test_names.py",
+    "import unittest\nfrom shapes import names\n\n\n"
+    "class TestNames(unittest.TestCase):\n"
+    "    def test_title(self):\n        self.assertEqual(names.title('ab'), 'Ab')\n",
+)
+
+print(run_tests(root))
+# Nothing changed, every module is reused
+print(run_tests(root))
+# Only test_area imports area.py
+write(root, "shapes/area.py", "def square(x):\n    return x * x + 1\n")
+print(run_tests(root))
+write(root, "shapes/names.py", "def title(s)\n    return s\n")
+print(run_tests(root))
+print(run_tests(root, rerun_all=True))
+# A module imported before it exists is picked up once it is written
+write(
+    root,
+    "test_volume.py",
+    "import unittest\nfrom shapes.volume import cube\n\n\n"
+    "class TestVolume(unittest.TestCase):\n"
+    "    def test_cube(self):\n        self.assertEqual(cube(2), 8)\n",
+)
+print(run_tests(root, pattern="test_volume.py"))
+write(root, "shapes/volume.py", "def cube(x):\n    return x**3\n")
+print(run_tests(root, pattern="test_volume.py"))
+
+print(run_tests("calculator"))
+print(run_tests("calculator", pattern="nothing_*.py"))
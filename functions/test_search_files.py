@@ -0,0 +1,20 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search_files import search_files
+
+print(search_files("calculator", "def evaluate"))
+print(search_files("calculator", "import", directory="pkg", context=0))
+print(
+    search_files("calculator", r"self\.assert\w+\(result, 1\d\)", regex=True, context=0)
+)
+print(
+    search_files("calculator", "CALCULATOR", ignore_case=True, context=0, max_results=2)
+)
+print(search_files("calculator", r"colou?r|evaluate_m\w+\(", regex=True, context=0))
+print(search_files("calculator", "no such text anywhere"))
+print(search_files("calculator", r"def\x20evaluate", regex=True, context=0))
+print(search_files("calculator", "(", regex=True))
+print(search_files("calculator", "import", directory="../"))
@@ -0,0 +1,52 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.genai import types
+from shaping import collapse_repeats, estimate_tokens, shape_result, shape_turn
+from read_files import read_files
+
+# Repeated log lines collapse, the rest is kept as is
+log = "start\n" + "retrying connection\n" * 500 + "done\n"
+print(collapse_repeats(log))
+# Output without a final newline keeps its last line whole
+print(repr(collapse_repeats("x\ny\nz\nresult: 42")))
+print(repr(collapse_repeats("a\n" + "b\n" * 9 + "b")))
+
+# Over the budget: head and tail kept, the marker says what was left out
+lines = "".join(f"line {i}\n" for i in range(1, 5001))
+shaped = shape_result("get_file_content", lines, max_tokens=200)
+print(f"{estimate_tokens(lines)} tokens shaped to {estimate_tokens(shaped)}")
+print(shaped)
+
+# A ranged read reports file lines, not lines of the output with its header
+ranged = "[big.txt: lines 100-5099 of 9000 (bytes 783-48000 of 90000)]\n" + lines
+for line in shape_result("get_file_content", ranged, max_tokens=200).splitlines():
+    if line.startswith("["):
+        print(line)
+
+# Binary output is not shown
+print(shape_result("run_python_file", "PK\x03\x04\x00\x00" + "\x01\x02" * 100))
+
+# A dict result shares its budget between its strings
+result = read_files("calculator", ["*.py", "pkg/*.py"])
+shaped = shape_result("read_files", result, max_tokens=2000)
+for entry in shaped["files"]:
+    print(entry["path"], len(entry.get("content", "")), "chars")
+
+# One turn's responses split the turn budget, small ones stay whole
+contents = [
+    types.Content(
+        role="user",
+        parts=[types.Part.from_function_response(name=name, response={"result": text})],
+    )
+    for name, text in [
+        ("get_file_content", lines),
+        ("get_files_info", "- main.py: file_size=1 bytes, is_dir=False"),
+        ("run_python_file", lines),
+    ]
+]
+for content in shape_turn(contents, max_tokens=1000):
+    response = content.parts[0].function_response
+    print(response.name, estimate_tokens(response.response["result"]), "tokens")
@@ -0,0 +1,46 @@
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from functions.workspace import Workspace, WorkspaceEscape
+from get_file_content import get_file_content
+from get_files_info import get_files_info
+from write_file import write_file
+
+outside = tempfile.mkdtemp()
+with open(os.path.join(outside, "secret.txt"), "w") as f:
+    f.write("secret")
+
+root = tempfile.mkdtemp()
+os.makedirs(os.path.join(root, "pkg"))
+with open(os.path.join(root, "pkg", "module.py"), "w") as f:
+    f.write("print('inside')\n")
+# Links that stay inside, and links that lead out of the workspace
+os.symlink("pkg", os.path.join(root, "alias"))
+os.symlink("../pkg/module.py", os.path.join(root, "pkg", "self.py"))
+os.symlink(outside, os.path.join(root, "escape"))
+os.symlink("../../" + os.path.basename(outside), os.path.join(root, "pkg", "up"))
+
+workspace = Workspace(root)
+for path in ["pkg/module.py", "alias/module.py", "pkg/self.py", "new/dir/file.txt"]:
+    print(f"{path} -> {os.path.relpath(workspace.resolve(path), workspace.root)}")
+for path in ["escape/secret.txt", "pkg/up/secret.txt", "../x", "/etc/passwd"]:
+    try:
+        workspace.resolve(path)
+        print(f"{path} was not refused")
+    except WorkspaceEscape:
+        print(f"{path} refused")
+
+print(get_file_content(root, "alias/module.py"))
+print(get_file_content(root, "escape/secret.txt"))
+print(get_files_info(root, "escape"))
+print(write_file(root, "pkg/up/secret.txt", "overwritten"))
+
+# A directory swapped for a symlink after it was looked up: the cached fd
+# still points at the moved directory, never at the link's target
+print(get_file_content(root, "pkg/module.py"))
+os.rename(os.path.join(root, "pkg"), os.path.join(root, "moved"))
+os.symlink(outside, os.path.join(root, "pkg"))
+print(get_file_content(root, "pkg/secret.txt"))
@@ -1,3 +1,8 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 from write_file import write_file
 
 print(write_file("calculator", "lorem.txt", "wait, this isn't lorem ipsum"))
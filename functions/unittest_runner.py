@@ -0,0 +1,97 @@
+import os
+import sys
+import json
+import time
+import unittest
+import traceback
+
+# Child side of run_tests: loads the named test modules from the current
+# directory, runs them and writes one record per test to a JSON file.
+# Usage: python unittest_runner.py RESULTS_PATH MODULE...
+# Output of the tests themselves goes to stdout/stderr as usual.
+
+
+class RecordingResult(unittest.TestResult):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self.started = None
+
+    def startTest(self, test):
+        super().startTest(test)
+        self.started = time.perf_counter()
+
+    def _record(self, test, status, err=None):
+        elapsed = time.perf_counter() - self.started if self.started else 0.0
+        record = {"id": test.id(), "status": status, "time": round(elapsed, 6)}
+        if err is not None:
+            record["traceback"] = self._exc_info_to_string(err, test)
+        self.records.append(record)
+
+    def addSuccess(self, test):
+        super().addSuccess(test)
+        self._record(test, "pass")
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self._record(test, "fail", err)
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        # setUpClass / setUpModule errors are reported on a placeholder
+        self._record(test, "error", err)
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        self._record(test, "skip")
+
+    def addExpectedFailure(self, test, err):
+        super().addExpectedFailure(test, err)
+        self._record(test, "pass")
+
+    def addUnexpectedSuccess(self, test):
+        super().addUnexpectedSuccess(test)
+        self._record(test, "fail")
+
+    def addSubTest(self, test, subtest, err):
+        super().addSubTest(test, subtest, err)
+        if err is not None:
+            failed = issubclass(err[0], test.failureException)
+            self._record(subtest, "fail" if failed else "error", err)
+
+
+def main():
+    results_path, modules = sys.argv[1], sys.argv[2:]
+    root = os.getcwd()
+    sys.path.insert(0, root)
+    loader = unittest.TestLoader()
+    output = {}
+    for module in modules:
+        result = RecordingResult()
+        errors = len(loader.errors)
+        try:
+            suite = loader.loadTestsFromName(module)
+        except Exception as e:
+            # Start at the first frame in the working directory
+            tb = e.__traceback__
+            while tb is not None:
+                if tb.tb_frame.f_code.co_filename.startswith(root):
+                    break
+                tb = tb.tb_next
+            text = "".join(
+                traceback.format_exception(type(e), e, tb or e.__traceback__)
+            )
+            output[module] = {"import_error": text, "tests": []}
+            continue
+        if len(loader.errors) > errors:
+            # A module that fails to import comes back as a placeholder test
+            output[module] = {"import_error": loader.errors[-1], "tests": []}
+            continue
+        suite.run(result)
+        output[module] = {"import_error": None, "tests": result.records}
+    with open(results_path, "w", encoding="utf-8") as f:
+        json.dump(output, f)
+
+
+if __name__ == "__main__":
+    main()
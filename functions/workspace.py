@@ -0,0 +1,177 @@
+import os
+import stat
+import threading
+
+# The directory tree a session's tools work in. The root is found and opened
+# once; paths are then resolved one component at a time relative to open
+# directory fds (stat/readlink/open with dir_fd), so a symlink anywhere in a
+# path is followed only while it stays inside the root. Directory fds and the
+# resolution of each directory part seen are cached. Only run_python_file can
+# change the tree under us in a way that matters (a directory swapped for a
+# symlink), and it calls invalidate() after every run.
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Same limit as the kernel's ELOOP
+MAX_SYMLINKS = 40
+# Open directory fds kept per workspace, the cache is dropped once it is full
+MAX_CACHED_DIRS = 256
+
+DIR_FLAGS = os.O_RDONLY | getattr(os, "O_DIRECTORY", 0) | getattr(os, "O_CLOEXEC", 0)
+NOFOLLOW = getattr(os, "O_NOFOLLOW", 0)
+DIR_FD_SUPPORTED = {os.open, os.stat, os.readlink} <= os.supports_dir_fd
+
+
+class WorkspaceEscape(Exception):
+    pass
+
+
+def find_root(working_directory):
+    # Relative working directories that do not exist from the current
+    # directory are looked up from the project root
+    if not os.path.isabs(working_directory):
+        if not os.path.exists(os.path.abspath(working_directory)):
+            potential_path = os.path.join(PROJECT_ROOT, working_directory)
+            if os.path.exists(potential_path):
+                working_directory = potential_path
+    return os.path.realpath(working_directory)
+
+
+class Workspace:
+    def __init__(self, root):
+        self.root = find_root(root)
+        self.fd = os.open(self.root, DIR_FLAGS) if DIR_FD_SUPPORTED else None
+        # canonical relative directory -> open fd
+        self.dir_fds = {}
+        # directory part of a requested path -> its canonical parts
+        self.lookups = {}
+        self.lock = threading.Lock()
+
+    def _dir_fd(self, parts):
+        # Fd of an existing canonical directory, opened from its parent
+        if not parts or self.fd is None:
+            return self.fd
+        key = "/".join(parts)
+        fd = self.dir_fds.get(key)
+        if fd is None:
+            parent = self._dir_fd(parts[:-1])
+            fd = os.open(parts[-1], DIR_FLAGS | NOFOLLOW, dir_fd=parent)
+            if len(self.dir_fds) >= MAX_CACHED_DIRS:
+                self._drop_cache()
+            self.dir_fds[key] = fd
+        return fd
+
+    def _at(self, parts, name):
+        # (name, dir_fd) for syscalls, or a full path without dir_fd support
+        if self.fd is None:
+            return os.path.join(self.root, *parts, name), None
+        return name, self._dir_fd(parts)
+
+    def _walk(self, path, resolved):
+        # Canonical parts of path below resolved, and whether all of it exists
+        resolved = list(resolved)
+        if os.path.isabs(path):
+            if os.path.commonpath([self.root, path]) != self.root:
+                raise WorkspaceEscape(path)
+            path = os.path.relpath(path, self.root)
+            resolved = []
+        pending = path.split("/")[::-1]
+        hops = 0
+        exists = True
+        while pending:
+            name = pending.pop()
+            if name in ("", "."):
+                continue
+            if name == "..":
+                if not resolved:
+                    raise WorkspaceEscape(path)
+                resolved.pop()
+                continue
+            if not exists:
+                resolved.append(name)
+                continue
+            try:
+                target, dir_fd = self._at(resolved, name)
+                st = os.stat(target, dir_fd=dir_fd, follow_symlinks=False)
+            except (FileNotFoundError, NotADirectoryError):
+                # The rest is created by the caller, nothing there to follow
+                exists = False
+                resolved.append(name)
+                continue
+            if not stat.S_ISLNK(st.st_mode):
+                resolved.append(name)
+                continue
+            hops += 1
+            if hops > MAX_SYMLINKS:
+                raise OSError(f'too many levels of symbolic links in "{path}"')
+            link = os.readlink(target, dir_fd=dir_fd)
+            if os.path.isabs(link):
+                if os.path.commonpath([self.root, link]) != self.root:
+                    raise WorkspaceEscape(path)
+                link = os.path.relpath(link, self.root)
+                resolved = []
+            pending.extend(link.split("/")[::-1])
+        return resolved, exists
+
+    def _parts(self, path):
+        head, tail = os.path.split(path or ".")
+        with self.lock:
+            parts = self.lookups.get(head)
+            if parts is None:
+                parts, exists = self._walk(head, ())
+                if exists:
+                    self.lookups[head] = parts
+            parts, _ = self._walk(tail, parts)
+            return parts
+
+    def resolve(self, path):
+        # Absolute path of path inside the workspace, with symlinks resolved;
+        # raises WorkspaceEscape if it leads outside
+        return os.path.join(self.root, *self._parts(path))
+
+    def relpath(self, path):
+        return "/".join(self._parts(path))
+
+    def open(self, path, flags=os.O_RDONLY, mode=0o666):
+        # Opens relative to the cached parent fd; the last component was
+        # resolved already, so a symlink put there since is refused
+        parts = self._parts(path)
+        if not parts:
+            return os.open(self.root, flags, mode)
+        with self.lock:
+            name, dir_fd = self._at(parts[:-1], parts[-1])
+            return os.open(name, flags | NOFOLLOW, mode, dir_fd=dir_fd)
+
+    def _drop_cache(self):
+        for fd in self.dir_fds.values():
+            os.close(fd)
+        self.dir_fds.clear()
+        self.lookups.clear()
+
+    def invalidate(self):
+        with self.lock:
+            self._drop_cache()
+
+    def close(self):
+        with self.lock:
+            self._drop_cache()
+            if self.fd is not None:
+                os.close(self.fd)
+                self.fd = None
+
+
+_workspaces = {}
+_workspaces_lock = threading.Lock()
+
+
+def get_workspace(working_directory):
+    # One Workspace per working directory, shared by every tool call
+    key = os.path.abspath(working_directory)
+    workspace = _workspaces.get(key)
+    if workspace is None:
+        with _workspaces_lock:
+            workspace = _workspaces.get(key)
+            if workspace is None:
+                workspace = Workspace(working_directory)
+                _workspaces[key] = workspace
+    return workspace
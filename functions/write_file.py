@@ -1,24 +1,55 @@
 import os
+import secrets
 from google.genai import types
 
+from functions.workspace import WorkspaceEscape, get_workspace
+
+# Temp files are created with 0666 and the kernel applies the umask, so new
+# files get the usual permissions without reading the process-wide umask
+TEMP_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_CLOEXEC", 0)
+TEMP_ATTEMPTS = 100
+
+
+def _create_temp(target_file):
+    directory = os.path.dirname(target_file)
+    prefix = f".{os.path.basename(target_file)}."
+    for _ in range(TEMP_ATTEMPTS):
+        temp_path = os.path.join(directory, f"{prefix}{secrets.token_hex(4)}.tmp")
+        try:
+            return os.open(temp_path, TEMP_FLAGS, 0o666), temp_path
+        except FileExistsError:
+            continue
+    raise FileExistsError(f"no free temporary file name in {directory}")
+
+
+def atomic_write(target_file, content):
+    # Write a temp file next to the target and rename it into place, so a
+    # crash leaves either the old or the new file, never half of one
+    fd, temp_path = _create_temp(target_file)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            # Keep the permissions of the file we replace
+            os.chmod(temp_path, os.stat(target_file).st_mode & 0o7777)
+        except FileNotFoundError:
+            pass
+        os.replace(temp_path, target_file)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
 
 def write_file(working_directory, file_path, content):
-    if not os.path.isabs(working_directory):
-        if not os.path.exists(os.path.abspath(working_directory)):
-            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            potential_path = os.path.join(project_root, working_directory)
-            if os.path.exists(potential_path):
-                working_directory = potential_path
-
-    working_directory = os.path.abspath(working_directory)
-    target_file = os.path.normpath(os.path.join(working_directory, file_path))
-
-    # Will be True or False
-    valid_target_file = (
-        os.path.commonpath([working_directory, target_file]) == working_directory
-    )
-
-    if not valid_target_file:
+    workspace = get_workspace(working_directory)
+    try:
+        target_file = workspace.resolve(file_path)
+    except WorkspaceEscape:
         return f'Error: Cannot read "{file_path}" as it is outside the permitted working directory'
 
     if os.path.isdir(target_file):
@@ -27,8 +58,7 @@ def write_file(working_directory, file_path, content):
     os.makedirs(os.path.dirname(target_file), exist_ok=True)
 
     try:
-        with open(target_file, "w", encoding="utf-8") as f:
-            f.write(content)
+        atomic_write(target_file, content)
         return (
             f'Successfully wrote to "{file_path}" ({len(content)} characters written)'
         )
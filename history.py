@@ -0,0 +1,281 @@
+from dataclasses import dataclass
+
+from google.genai import types
+import tracing
+from config import (
+    HISTORY_KEEP_RECENT_TURNS,
+    HISTORY_STUB_MIN_CHARS,
+    HISTORY_TOKEN_BUDGET,
+    MODEL_NAME,
+)
+
+# Rough conversion used to report savings, the API only counts whole requests
+CHARS_PER_TOKEN = 4
+
+SUMMARY_PROMPT = """
+Summarize the following agent conversation so it can replace the original turns.
+Keep file names, findings, decisions, errors and anything still left to do. Be brief.
+"""
+
+
+@dataclass
+class CompactionReport:
+    stubbed: int = 0
+    superseded: int = 0
+    summarized_turns: int = 0
+    chars_before: int = 0
+    chars_after: int = 0
+
+    @property
+    def chars_saved(self):
+        return self.chars_before - self.chars_after
+
+    @property
+    def tokens_saved(self):
+        return self.chars_saved // CHARS_PER_TOKEN
+
+    def __str__(self):
+        return (
+            f"History compacted: saved ~{self.tokens_saved} tokens "
+            f"({self.chars_saved} chars; {self.stubbed} stale tool outputs stubbed, "
+            f"{self.superseded} superseded reads dropped, "
+            f"{self.summarized_turns} turns summarized)"
+        )
+
+
+def _part_chars(part):
+    if part.text:
+        return len(part.text)
+    if part.function_response is not None:
+        return len(str(part.function_response.response))
+    if part.function_call is not None:
+        return len(str(part.function_call.args))
+    return 0
+
+
+def content_chars(contents):
+    return sum(
+        _part_chars(part) for content in contents for part in content.parts or []
+    )
+
+
+def _stub(name, response, reason):
+    size = len(str(response))
+    key = "error" if "error" in (response or {}) else "result"
+    return types.Part.from_function_response(
+        name=name,
+        response={key: f"[{reason}: {size} chars of {name} output elided]"},
+    )
+
+
+def _reread_note(name):
+    # Stands in for an "unchanged" marker whose earlier result was elided
+    return types.Part.from_function_response(
+        name=name,
+        response={"result": "[The earlier result was elided, read it again if needed]"},
+    )
+
+
+def _read_key(call):
+    return (call.name, repr(sorted((call.args or {}).items())))
+
+
+def model_summarizer(client):
+    # Summarizes old turns with one extra model request
+    def summarize(contents):
+        response = client.models.generate_content(
+            model=MODEL_NAME,
+            contents=contents
+            + [types.Content(role="user", parts=[types.Part(text=SUMMARY_PROMPT)])],
+        )
+        return response.text or ""
+
+    return summarize
+
+
+class ConversationHistory:
+    def __init__(
+        self,
+        messages,
+        token_budget=HISTORY_TOKEN_BUDGET,
+        keep_recent_turns=HISTORY_KEEP_RECENT_TURNS,
+        summarizer=None,
+        cache=None,
+        log=None,
+    ):
+        # The list is shared with the caller and updated in place
+        self.messages = messages
+        # Session log that every appended content is written to. Compaction
+        # only changes the in-memory list, the log keeps the full history.
+        self.log = log
+        if log is not None:
+            # Contents the log does not have yet, e.g. the first prompt
+            for content in messages[log.count :]:
+                log.append(content)
+        self.token_budget = token_budget
+        self.keep_recent_turns = keep_recent_turns
+        self.summarizer = summarizer
+        # Tool result cache whose "unchanged" markers refer to earlier reads
+        self.cache = cache
+        self.prompt_tokens = []
+        self.reports = []
+
+    def append(self, content):
+        self.messages.append(content)
+        if self.log is not None:
+            self.log.append(content)
+
+    def extend(self, contents):
+        for content in contents:
+            self.append(content)
+
+    def record_usage(self, usage_metadata):
+        # Returns a CompactionReport when the budget forced a compaction
+        if usage_metadata is None or usage_metadata.prompt_token_count is None:
+            return None
+        self.prompt_tokens.append(usage_metadata.prompt_token_count)
+        if (
+            not self.token_budget
+            or usage_metadata.prompt_token_count <= self.token_budget
+        ):
+            return None
+        with tracing.span("history.compact") as span:
+            report = self.compact(usage_metadata.prompt_token_count - self.token_budget)
+            span.set(
+                chars_saved=report.chars_saved,
+                tokens_saved=report.tokens_saved,
+                summarized_turns=report.summarized_turns,
+            )
+        if report.chars_saved <= 0 and not report.summarized_turns:
+            return None
+        return report
+
+    def _recent_start(self):
+        # Index of the first message of the turns that are never compacted
+        seen = 0
+        for index in range(len(self.messages) - 1, 0, -1):
+            if self.messages[index].role == "model":
+                seen += 1
+                if seen >= self.keep_recent_turns:
+                    return index
+        return 1
+
+    def _tool_responses(self):
+        # Pairs each function response with the call that produced it
+        pending = []
+        pairs = []
+        for index, content in enumerate(self.messages):
+            for part_index, part in enumerate(content.parts or []):
+                if part.function_call is not None:
+                    pending.append(part.function_call)
+                elif part.function_response is not None:
+                    name = part.function_response.name
+                    call = next((c for c in pending if c.name == name), None)
+                    if call is not None:
+                        pending.remove(call)
+                    pairs.append((index, part_index, call))
+        return pairs
+
+    def _replace_part(self, index, part_index, part):
+        content = self.messages[index]
+        parts = list(content.parts)
+        parts[part_index] = part
+        self.messages[index] = types.Content(role=content.role, parts=parts)
+
+    def _result(self, index, part_index):
+        response = self.messages[index].parts[part_index].function_response
+        return str((response.response or {}).get("result", ""))
+
+    def _stub_result(self, index, part_index, reason, markers):
+        # Stubs a result, and the "unchanged" markers that refer to it
+        response = self.messages[index].parts[part_index].function_response
+        self._replace_part(
+            index, part_index, _stub(response.name, response.response, reason)
+        )
+        for marker_index, marker_part_index in markers.get((index, part_index), ()):
+            self._replace_part(
+                marker_index, marker_part_index, _reread_note(response.name)
+            )
+
+    def compact(self, tokens_over=0):
+        report = CompactionReport(chars_before=content_chars(self.messages))
+        recent_start = self._recent_start()
+        pairs = self._tool_responses()
+
+        # "Unchanged" markers and the earlier full result each refers to
+        markers = {}
+        latest = {}
+        for index, part_index, call in pairs:
+            if call is None:
+                continue
+            if "unchanged since your last" in self._result(index, part_index):
+                target = latest.get(_read_key(call))
+                if target is not None:
+                    markers.setdefault(target, []).append((index, part_index))
+            else:
+                latest[_read_key(call)] = (index, part_index)
+        # Results a marker in the recent turns points the model to stay whole
+        pinned = {
+            target
+            for target, refs in markers.items()
+            if any(index >= recent_start for index, _ in refs)
+        }
+
+        # Earlier full reads of a file that was read again later
+        latest_read = {}
+        for index, part_index, call in pairs:
+            if call is None or call.name != "get_file_content":
+                continue
+            if "unchanged since your last read" in self._result(index, part_index):
+                continue
+            read_key = _read_key(call)
+            previous = latest_read.get(read_key)
+            if previous is not None and previous not in pinned:
+                self._stub_result(*previous, "superseded by a later read", markers)
+                report.superseded += 1
+            latest_read[read_key] = (index, part_index)
+
+        # Large tool outputs from turns before the recent ones
+        for index, part_index, call in pairs:
+            if index >= recent_start or (index, part_index) in pinned:
+                continue
+            response = self.messages[index].parts[part_index].function_response
+            result = str(response.response)
+            if len(result) < HISTORY_STUB_MIN_CHARS or "elided]" in result:
+                continue
+            self._stub_result(index, part_index, "stale output", markers)
+            report.stubbed += 1
+
+        chars_after = content_chars(self.messages)
+        still_over = (
+            tokens_over - (report.chars_before - chars_after) // CHARS_PER_TOKEN
+        )
+        if self.summarizer is not None and still_over > 0 and recent_start > 1:
+            report.summarized_turns = self._summarize(recent_start)
+
+        report.chars_after = content_chars(self.messages)
+        if self.cache is not None and (
+            report.stubbed or report.superseded or report.summarized_turns
+        ):
+            # Earlier results are gone, don't answer with "unchanged" markers
+            self.cache.forget_seen()
+        self.reports.append(report)
+        return report
+
+    def _summarize(self, recent_start):
+        old = self.messages[1:recent_start]
+        turns = sum(1 for content in old if content.role == "model")
+        try:
+            summary = self.summarizer(self.messages[:recent_start])
+        except Exception as e:
+            print(f"Error summarizing history: {e}")
+            return 0
+        if not summary:
+            return 0
+        self.messages[1:recent_start] = [
+            types.Content(
+                role="user",
+                parts=[types.Part(text=f"Summary of earlier turns:\n{summary}")],
+            )
+        ]
+        return turns
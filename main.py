@@ -1,116 +1,288 @@
 import os
+import sys
 import argparse
+import cProfile
 
-from dotenv import load_dotenv
-from google import genai
-from google.genai import types
-from prompts import system_prompt
-from functions.call_function import available_functions, call_function
+from config import (
+    BATCH_CONCURRENCY,
+    BATCH_REQUESTS_PER_MINUTE,
+    BATCH_TOKENS_PER_MINUTE,
+    HISTORY_TOKEN_BUDGET,
+    MAX_PARALLEL_TOOLS,
+    RESPONSE_CACHE_DIR,
+    SESSION_DIR,
+    SESSION_LOG,
+)
+import tracing
 
+# The SDK, dotenv and the agent loops are imported inside main() once the
+# arguments are known, so --help and argument errors return immediately.
 
-def main():
-    try:
-        load_dotenv()
-        api_key = os.environ.get("GEMINI_API_KEY")
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY environment variable is not set")
-        client = genai.Client(api_key=api_key)
-    except Exception as e:
-        print(f"Error initializing client: {e}")
-        return
 
+def main():
     try:
         parser = argparse.ArgumentParser(description="Chatbot")
-        parser.add_argument("user_prompt", type=str, help="User prompt")
+        parser.add_argument("user_prompt", type=str, nargs="?", help="User prompt")
         parser.add_argument(
             "--verbose", action="store_true", help="Enable verbose output"
         )
+        parser.add_argument(
+            "--max-parallel-tools",
+            type=int,
+            default=MAX_PARALLEL_TOOLS,
+            help="Maximum number of tool calls to run concurrently in one turn",
+        )
+        parser.add_argument(
+            "--stream",
+            action="store_true",
+            help="Use the async streaming loop and print text as it arrives",
+        )
+        parser.add_argument(
+            "--token-budget",
+            type=int,
+            default=HISTORY_TOKEN_BUDGET,
+            help="Compact older turns once a prompt exceeds this many tokens (0 disables)",
+        )
+        parser.add_argument(
+            "--summarize",
+            action="store_true",
+            help="Summarize old turns with the model when compaction is not enough",
+        )
+        parser.add_argument(
+            "--echo-output",
+            action="store_true",
+            help="Show the output of run_python_file calls live as well",
+        )
+        parser.add_argument(
+            "--trace",
+            metavar="PATH",
+            help="Append timing spans for model requests and tool calls to this JSONL file",
+        )
+        parser.add_argument(
+            "--profile",
+            metavar="PATH",
+            help="Run the session under cProfile and write the stats to this file",
+        )
+        parser.add_argument(
+            "--batch",
+            metavar="FILE",
+            help='Run every task in a JSONL file of {"id", "prompt", "working_directory"}',
+        )
+        parser.add_argument(
+            "--batch-output",
+            metavar="FILE",
+            help="Write one JSON result per finished task here (default: stdout)",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=BATCH_CONCURRENCY,
+            help="Number of batch sessions to run at the same time",
+        )
+        parser.add_argument(
+            "--rpm",
+            type=int,
+            default=BATCH_REQUESTS_PER_MINUTE,
+            help="Model requests per minute across all batch sessions (0 disables)",
+        )
+        parser.add_argument(
+            "--tpm",
+            type=int,
+            default=BATCH_TOKENS_PER_MINUTE,
+            help="Tokens per minute across all batch sessions (0 disables)",
+        )
+        parser.add_argument(
+            "--response-cache",
+            choices=["auto", "record", "replay"],
+            help="Cache model responses on disk: reuse hits (auto), always refresh "
+            "(record) or only replay and fail on a miss, no API key needed (replay)",
+        )
+        parser.add_argument(
+            "--response-cache-dir",
+            metavar="DIR",
+            default=RESPONSE_CACHE_DIR,
+            help="Where cached responses are stored",
+        )
+        parser.add_argument(
+            "--no-retry",
+            action="store_true",
+            help="Fail on the first model request error instead of retrying",
+        )
+        parser.add_argument(
+            "--hedge",
+            action="store_true",
+            help="Send a second copy of model requests slower than the recent p95",
+        )
+        parser.add_argument(
+            "--resume",
+            metavar="SESSION",
+            help="Continue a logged session; the prompt, if given, is added to it",
+        )
+        parser.add_argument(
+            "--session-dir",
+            metavar="DIR",
+            default=SESSION_DIR,
+            help="Where session logs are written",
+        )
+        parser.add_argument(
+            "--session-log",
+            action="store_true",
+            default=SESSION_LOG,
+            help="Log the session to disk so it can be continued with --resume",
+        )
         args = parser.parse_args()
+        if args.batch is not None:
+            if args.user_prompt is not None or args.resume is not None:
+                parser.error("--batch cannot be combined with a prompt or --resume")
+        elif args.user_prompt is None and args.resume is None:
+            parser.error("give a prompt, --resume SESSION or --batch FILE")
     except Exception as e:
         print(f"Error parsing arguments: {e}")
         return
 
-    messages = [types.Content(role="user", parts=[types.Part(text=args.user_prompt)])]
-
-    max_turns = 20
-    for turn in range(max_turns):
-        try:
-            response = client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=messages,
-                config=types.GenerateContentConfig(
-                    tools=[available_functions], system_instruction=system_prompt
-                ),
+    try:
+        client = None
+        retrying = None
+        # Replaying from the response cache never talks to the API
+        if args.response_cache != "replay":
+            from dotenv import load_dotenv
+            from google import genai
+
+            load_dotenv()
+            api_key = os.environ.get("GEMINI_API_KEY")
+            if not api_key:
+                raise ValueError("GEMINI_API_KEY environment variable is not set")
+            client = genai.Client(api_key=api_key)
+            if not args.no_retry:
+                from retry import RetryingClient, RetryPolicy
+
+                retrying = RetryingClient(
+                    client, RetryPolicy(hedge=args.hedge), verbose=args.verbose
+                )
+                client = retrying
+        if args.response_cache:
+            from response_cache import CachingClient, ResponseCache
+
+            client = CachingClient(
+                client, ResponseCache(args.response_cache_dir), args.response_cache
             )
-        except Exception as e:
-            print(f"Error generating content: {e}")
-            break
+    except Exception as e:
+        print(f"Error initializing client: {e}")
+        return
+
+    if args.echo_output:
+        from functions.run_python_file import set_echo_output
+
+        set_echo_output(True)
+
+    if args.trace:
+        tracing.set_tracer(tracing.Tracer(args.trace))
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler is not None:
+        profiler.enable()
+
+    log = None
+    try:
+        if args.batch:
+            run_batch_file(client, args)
+            return
+
+        from google.genai import types
+        from history import model_summarizer
+        import session_log
 
-        try:
+        messages = []
+        if args.resume:
+            try:
+                log, messages = session_log.resume(args.resume, args.session_dir)
+            except (OSError, ValueError) as e:
+                print(f"Error resuming session: {e}")
+                return
             if args.verbose:
-                if response.usage_metadata is not None:
-                    print(
-                        f"Turn {turn + 1}: Prompt tokens: {response.usage_metadata.prompt_token_count}"
-                    )
-                    print(
-                        f"Turn {turn + 1}: Response tokens: {response.usage_metadata.candidates_token_count}"
+                print(f"Resumed session {args.resume} with {len(messages)} messages")
+        elif args.session_log:
+            log = session_log.SessionLog(
+                session_log.new_session_id(), args.session_dir
+            ).open()
+        if args.user_prompt is not None:
+            messages.append(
+                types.Content(role="user", parts=[types.Part(text=args.user_prompt)])
+            )
+        if log is not None and not args.resume:
+            print(f"Session {log.session_id} (continue with --resume {log.session_id})")
+        summarizer = model_summarizer(client) if args.summarize else None
+
+        with tracing.span("session", stream=args.stream):
+            if args.stream:
+                import asyncio
+                from async_agent import run_agent_async
+
+                asyncio.run(
+                    run_agent_async(
+                        client,
+                        messages,
+                        verbose=args.verbose,
+                        max_parallel_tools=args.max_parallel_tools,
+                        token_budget=args.token_budget,
+                        summarizer=summarizer,
+                        log=log,
                     )
-                else:
-                    print("Warning: No usage metadata found in response.")
-        except Exception as e:
-            if args.verbose:
-                print(f"Error processing usage metadata: {e}")
-
-        # Add each candidate's content to the conversation history
-        try:
-            if response.candidates:  # Check if candidates is not None or empty
-                for candidate in response.candidates:
-                    if candidate.content is not None:
-                        messages.append(candidate.content)
+                )
             else:
-                print("No candidates returned in the response.")
-        except Exception as e:
-            print(f"Error processing candidates: {e}")
-            break
-
-        # Check if the model is finished (no function calls and has text response)
-        try:
-            if not response.function_calls and response.text:
-                print(response.text)
-                break
-        except Exception as e:
-            print(f"Error checking response completion: {e}")
-            break
-
-        # Process function calls if present
-        try:
-            if response.function_calls:
-                for function_call in response.function_calls:
-                    try:
-                        # Execute the tool and append the tool response to the transcript
-                        content = call_function(function_call, verbose=args.verbose)
-                        messages.append(content)
-                    except Exception as e:
-                        print(f"Error calling function {function_call.name}: {e}")
-                        # Add error response to messages so the model knows what went wrong
-                        error_content = types.Content(
-                            role="tool",
-                            parts=[
-                                types.Part.from_function_response(
-                                    name=function_call.name,
-                                    response={
-                                        "error": f"Function execution failed: {str(e)}"
-                                    },
-                                )
-                            ],
-                        )
-                        messages.append(error_content)
-            else:
-                # No function calls and no text - break to avoid infinite loop
-                break
-        except Exception as e:
-            print(f"Error processing function calls: {e}")
-            break
+                from agent import run_agent
+
+                run_agent(
+                    client,
+                    messages,
+                    verbose=args.verbose,
+                    max_parallel_tools=args.max_parallel_tools,
+                    token_budget=args.token_budget,
+                    summarizer=summarizer,
+                    log=log,
+                )
+    finally:
+        if log is not None:
+            log.close()
+        if retrying is not None:
+            retrying.close()
+            if args.verbose:
+                print(retrying.stats)
+        if args.response_cache and args.verbose:
+            cache = client.cache
+            print(f"Response cache: {cache.hits} hits, {cache.misses} misses")
+        # Keep whatever was recorded, even if the session was interrupted
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            print(f"Profile written to {args.profile}")
+        tracing.get_tracer().close()
+
+
+def run_batch_file(client, args):
+    from batch import load_tasks, run_batch
+
+    try:
+        tasks = load_tasks(args.batch)
+    except (OSError, ValueError) as e:
+        print(f"Error loading batch: {e}")
+        return
+
+    output = open(args.batch_output, "w") if args.batch_output else sys.stdout
+    try:
+        run_batch(
+            client,
+            tasks,
+            output,
+            concurrency=args.concurrency,
+            requests_per_minute=args.rpm,
+            tokens_per_minute=args.tpm,
+            max_parallel_tools=args.max_parallel_tools,
+            token_budget=args.token_budget,
+            summarize=args.summarize,
+        )
+    finally:
+        if output is not sys.stdout:
+            output.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,225 @@
+import os
+import re
+import json
+import hashlib
+import tempfile
+import threading
+
+from google.genai import types
+from config import RESPONSE_CACHE_DIR, RESPONSE_CACHE_MAX_BYTES
+
+# On-disk cache of model responses, keyed by a hash of everything that goes
+# into a request: the model, the config (system instruction, tool
+# declarations) and the conversation so far. Modes:
+#   auto   - serve hits, call the model on a miss and store the response
+#   record - always call the model and store (refresh) the response
+#   replay - serve hits only, a miss is an error; no API key needed
+# Streamed responses are stored chunk by chunk and replayed the same way.
+
+MODES = ("auto", "record", "replay")
+
+# Parts of tool results that change between otherwise identical runs
+VOLATILE = [
+    # run_python_file reports its run time
+    (re.compile(r"(\[exit code -?\d+), \d+\.\d+s"), r"\1"),
+    # unittest run by run_python_file
+    (re.compile(r"(Ran \d+ tests? in )\d+\.\d+s"), r"\1"),
+    # run_tests times failed tests, and lists the slowest last; the request is
+    # JSON here, so its line breaks are escaped
+    (re.compile(r" \(\d+\.\d+s\)"), ""),
+    (re.compile(r"(Slowest:)(?:\\n  \d+\.\d+s [^\\\"]*)+"), r"\1"),
+]
+
+
+class CacheMiss(Exception):
+    pass
+
+
+def _dump(value):
+    if value is None:
+        return None
+    if isinstance(value, list):
+        return [_dump(item) for item in value]
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", exclude_none=True)
+    return value
+
+
+def request_key(model, contents, config, stream=False):
+    request = {
+        "model": model,
+        "config": _dump(config),
+        "contents": _dump(list(contents)),
+        "stream": stream,
+    }
+    text = json.dumps(request, sort_keys=True, separators=(",", ":"))
+    for pattern, replacement in VOLATILE:
+        text = pattern.sub(replacement, text)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(
+        self, directory=RESPONSE_CACHE_DIR, max_bytes=RESPONSE_CACHE_MAX_BYTES
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        # Total size of the entries on disk, counted on the first store
+        self.total_bytes = None
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key):
+        # Returns the stored chunks as GenerateContentResponse objects, or None
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            with self.lock:
+                self.misses += 1
+            return None
+        # Mark as recently used for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self.lock:
+            self.hits += 1
+        return [types.GenerateContentResponse.model_validate(c) for c in data["chunks"]]
+
+    def put(self, key, chunks):
+        data = json.dumps({"chunks": [_dump(chunk) for chunk in chunks]})
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(data)
+            try:
+                old_size = os.path.getsize(path)
+            except OSError:
+                old_size = 0
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+
+        with self.lock:
+            if self.total_bytes is None:
+                self.total_bytes = sum(size for _, size, _ in self._entries())
+            else:
+                self.total_bytes += len(data) - old_size
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        # (path, size, last used) for every stored response
+        try:
+            shards = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return []
+        entries = []
+        for shard in shards:
+            if not shard.is_dir():
+                continue
+            with os.scandir(shard.path) as it:
+                for entry in it:
+                    if entry.name.endswith(".json"):
+                        st = entry.stat()
+                        entries.append((entry.path, st.st_size, st.st_mtime))
+        return entries
+
+    def _evict(self):
+        # Least recently used first, down to 90% of the budget
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        self.total_bytes = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for path, size, _ in entries:
+            if self.total_bytes <= target:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            self.total_bytes -= size
+
+
+class _CachingModels:
+    def __init__(self, caching_client):
+        self.caching_client = caching_client
+
+    def generate_content(self, *, model, contents, config=None):
+        owner = self.caching_client
+        key = request_key(model, contents, config)
+        chunks = owner._lookup(key)
+        if chunks is not None:
+            return chunks[0]
+        response = owner.client.models.generate_content(
+            model=model, contents=contents, config=config
+        )
+        owner.cache.put(key, [response])
+        return response
+
+
+class _CachingAsyncModels:
+    def __init__(self, caching_client):
+        self.caching_client = caching_client
+
+    async def generate_content_stream(self, *, model, contents, config=None):
+        owner = self.caching_client
+        key = request_key(model, contents, config, stream=True)
+        chunks = owner._lookup(key)
+        if chunks is not None:
+
+            async def replay():
+                for chunk in chunks:
+                    yield chunk
+
+            return replay()
+
+        stream = await owner.client.aio.models.generate_content_stream(
+            model=model, contents=contents, config=config
+        )
+
+        async def record():
+            recorded = []
+            async for chunk in stream:
+                recorded.append(chunk)
+                yield chunk
+            # Only complete streams are worth replaying
+            owner.cache.put(key, recorded)
+
+        return record()
+
+
+class _CachingAio:
+    def __init__(self, caching_client):
+        self.models = _CachingAsyncModels(caching_client)
+
+
+class CachingClient:
+    # Wraps a genai.Client; client may be None in replay mode
+    def __init__(self, client, cache, mode="auto"):
+        if mode not in MODES:
+            raise ValueError(f"unknown response cache mode: {mode}")
+        self.client = client
+        self.cache = cache
+        self.mode = mode
+        self.models = _CachingModels(self)
+        self.aio = _CachingAio(self)
+
+    def _lookup(self, key):
+        if self.mode == "record":
+            return None
+        chunks = self.cache.get(key)
+        if chunks is None and self.mode == "replay":
+            raise CacheMiss(f"no cached response for request {key[:12]} (replay mode)")
+        return chunks
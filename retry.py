@@ -0,0 +1,339 @@
+import time
+import random
+import asyncio
+import threading
+import email.utils
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from config import (
+    HEDGE_MIN_SAMPLES,
+    HEDGE_PERCENTILE,
+    HEDGE_REQUESTS,
+    REQUEST_ATTEMPT_TIMEOUT,
+    REQUEST_DEADLINE,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_ATTEMPTS,
+    RETRY_MAX_DELAY,
+)
+import tracing
+
+# Retries model requests that failed for a transient reason: rate limits,
+# server errors, timeouts and dropped connections. Waits grow exponentially
+# with full jitter and honour Retry-After / RetryInfo from the server. Each
+# request has an overall deadline and every attempt its own timeout. With
+# hedging, a second copy of a slow request is sent once it has been running
+# longer than the recent p95 latency, and the first answer wins. Streams are
+# only retried until their first chunk arrives and are never hedged.
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+def is_retryable(error):
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return code in RETRYABLE_STATUS
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    try:
+        import httpx
+    except ImportError:
+        return False
+    return isinstance(error, (httpx.TimeoutException, httpx.TransportError))
+
+
+def _parse_seconds(value):
+    # "12", "1.5s" or an HTTP date
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value.rstrip("s")))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def retry_after(error):
+    # Server requested delay in seconds, or None
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is not None:
+        value = headers.get("retry-after")
+        if value is not None:
+            return _parse_seconds(value)
+    details = getattr(error, "details", None)
+    if isinstance(details, dict):
+        for detail in details.get("error", {}).get("details", []) or []:
+            if isinstance(detail, dict) and "retryDelay" in detail:
+                return _parse_seconds(detail["retryDelay"])
+    return None
+
+
+def _describe(error):
+    code = getattr(error, "code", None)
+    if code is not None:
+        return f"{code} {getattr(error, 'status', '') or ''}".strip()
+    return type(error).__name__
+
+
+class RetryStats:
+    def __init__(self):
+        self.requests = 0
+        self.attempts = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.waited = 0.0
+        # error description -> count
+        self.errors = {}
+        self.lock = threading.Lock()
+
+    def __str__(self):
+        errors = ", ".join(
+            f"{name} x{count}" for name, count in sorted(self.errors.items())
+        )
+        return (
+            f"Model requests: {self.requests} requests, {self.attempts} attempts, "
+            f"{self.retries} retries ({self.waited:.1f}s waiting), "
+            f"{self.hedges} hedged ({self.hedge_wins} won by the hedge)"
+            + (f", errors: {errors}" if errors else "")
+        )
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_attempts=RETRY_MAX_ATTEMPTS,
+        base_delay=RETRY_BASE_DELAY,
+        max_delay=RETRY_MAX_DELAY,
+        deadline=REQUEST_DEADLINE,
+        attempt_timeout=REQUEST_ATTEMPT_TIMEOUT,
+        hedge=HEDGE_REQUESTS,
+        hedge_percentile=HEDGE_PERCENTILE,
+        hedge_min_samples=HEDGE_MIN_SAMPLES,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+
+    def backoff(self, retry, error):
+        # Full jitter, but never sooner than the server asked for; the request
+        # deadline still bounds how long we are willing to wait
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**retry))
+        requested = retry_after(error)
+        if requested is not None:
+            delay = max(delay, requested)
+        return delay
+
+
+class _RetryingModels:
+    def __init__(self, owner):
+        self.owner = owner
+
+    def generate_content(self, *, model, contents, config=None):
+        return self.owner._call(model, contents, config)
+
+
+class _RetryingAsyncModels:
+    def __init__(self, owner):
+        self.owner = owner
+
+    async def generate_content_stream(self, *, model, contents, config=None):
+        return await self.owner._call_stream(model, contents, config)
+
+
+class _RetryingAio:
+    def __init__(self, owner):
+        self.models = _RetryingAsyncModels(owner)
+
+
+class RetryingClient:
+    # Wraps a genai.Client (or anything with the same models API)
+    def __init__(self, client, policy=None, verbose=False):
+        self.client = client
+        self.policy = policy or RetryPolicy()
+        self.verbose = verbose
+        self.stats = RetryStats()
+        # Recent successful attempt latencies, for the hedging threshold
+        self.latencies = deque(maxlen=200)
+        self.executor = None
+        self.models = _RetryingModels(self)
+        self.aio = _RetryingAio(self)
+
+    def _with_timeout(self, config, timeout):
+        # The SDK's per request timeout is in milliseconds
+        if config is None or timeout is None:
+            return config
+        from google.genai import types
+
+        http_options = config.http_options or types.HttpOptions()
+        http_options = http_options.model_copy(update={"timeout": int(timeout * 1000)})
+        return config.model_copy(update={"http_options": http_options})
+
+    def _attempt_timeout(self, deadline):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(
+                f"request deadline of {self.policy.deadline}s reached"
+            )
+        if self.policy.attempt_timeout:
+            return min(self.policy.attempt_timeout, remaining)
+        return remaining
+
+    def _hedge_after(self):
+        if not self.policy.hedge or len(self.latencies) < self.policy.hedge_min_samples:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(self.policy.hedge_percentile * len(ordered)))
+        return ordered[index]
+
+    def _record_error(self, error):
+        with self.stats.lock:
+            name = _describe(error)
+            self.stats.errors[name] = self.stats.errors.get(name, 0) + 1
+
+    def _wait_before_retry(self, retry, error, deadline):
+        delay = self.policy.backoff(retry, error)
+        if time.monotonic() + delay >= deadline:
+            raise DeadlineExceeded(
+                f"request deadline of {self.policy.deadline}s reached, "
+                f"last error: {error}"
+            )
+        with self.stats.lock:
+            self.stats.retries += 1
+            self.stats.waited += delay
+        if self.verbose:
+            print(
+                f"Model request failed ({_describe(error)}), retrying in {delay:.1f}s "
+                f"(attempt {retry + 2}/{self.policy.max_attempts})"
+            )
+        return delay
+
+    def _single_attempt(self, model, contents, config, timeout, parent=None):
+        with tracing.span("model.attempt", parent=parent):
+            start = time.monotonic()
+            response = self.client.models.generate_content(
+                model=model,
+                contents=contents,
+                config=self._with_timeout(config, timeout),
+            )
+            self.latencies.append(time.monotonic() - start)
+            return response
+
+    def _hedged_attempt(self, model, contents, config, timeout, hedge_after):
+        # Runs the attempt on a thread and sends a copy if it is slow
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(thread_name_prefix="hedge")
+        parent = tracing.get_tracer().current_id()
+        args = (model, contents, config, timeout, parent)
+        futures = [self.executor.submit(self._single_attempt, *args)]
+        done, _ = wait(futures, timeout=min(hedge_after, timeout))
+        if not done:
+            with self.stats.lock:
+                self.stats.hedges += 1
+                self.stats.attempts += 1
+            futures.append(self.executor.submit(self._single_attempt, *args))
+
+        end = time.monotonic() + timeout
+        pending = set(futures)
+        error = None
+        while pending:
+            done, pending = wait(
+                pending,
+                timeout=max(0, end - time.monotonic()),
+                return_when=FIRST_COMPLETED,
+            )
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    if future is not futures[0]:
+                        with self.stats.lock:
+                            self.stats.hedge_wins += 1
+                    # The slower copy finishes in the background and is dropped
+                    return future.result()
+                error = future.exception()
+        if error is not None:
+            raise error
+        raise TimeoutError(f"model request timed out after {timeout:.0f}s")
+
+    def _call(self, model, contents, config):
+        with self.stats.lock:
+            self.stats.requests += 1
+        deadline = time.monotonic() + self.policy.deadline
+        waited = 0.0
+        with tracing.span("model.retry") as span:
+            for retry in range(self.policy.max_attempts):
+                with self.stats.lock:
+                    self.stats.attempts += 1
+                timeout = self._attempt_timeout(deadline)
+                hedge_after = self._hedge_after()
+                try:
+                    if hedge_after is not None:
+                        return self._hedged_attempt(
+                            model, contents, config, timeout, hedge_after
+                        )
+                    return self._single_attempt(model, contents, config, timeout)
+                except Exception as e:
+                    self._record_error(e)
+                    if not is_retryable(e) or retry + 1 >= self.policy.max_attempts:
+                        raise
+                    delay = self._wait_before_retry(retry, e, deadline)
+                    waited += delay
+                    span.set(retries=retry + 1, waited_s=round(waited, 3))
+                    time.sleep(delay)
+
+    async def _call_stream(self, model, contents, config):
+        with self.stats.lock:
+            self.stats.requests += 1
+        deadline = time.monotonic() + self.policy.deadline
+        waited = 0.0
+        with tracing.span("model.retry", stream=True) as span:
+            for retry in range(self.policy.max_attempts):
+                with self.stats.lock:
+                    self.stats.attempts += 1
+                timeout = self._attempt_timeout(deadline)
+                try:
+                    stream = await self.client.aio.models.generate_content_stream(
+                        model=model,
+                        contents=contents,
+                        config=self._with_timeout(config, timeout),
+                    )
+                    # Failures before the first chunk can still be retried
+                    first = await asyncio.wait_for(anext(stream), timeout)
+                except StopAsyncIteration:
+                    first, stream = None, None
+                except Exception as e:
+                    self._record_error(e)
+                    if not is_retryable(e) or retry + 1 >= self.policy.max_attempts:
+                        raise
+                    delay = self._wait_before_retry(retry, e, deadline)
+                    waited += delay
+                    span.set(retries=retry + 1, waited_s=round(waited, 3))
+                    await asyncio.sleep(delay)
+                    continue
+                return _prepend(first, stream)
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+
+
+async def _prepend(first, stream):
+    if first is None:
+        return
+    yield first
+    async for chunk in stream:
+        yield chunk
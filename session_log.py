@@ -0,0 +1,170 @@
+import os
+import json
+import time
+import struct
+import hashlib
+import secrets
+
+from google.genai import types
+from config import SESSION_BLOB_MIN_BYTES, SESSION_DIR
+
+# Append-only log of a conversation, one record per types.Content. Records
+# are a 4 byte big-endian length followed by that many bytes of JSON, and
+# every append is flushed, so a killed session loses at most the record it
+# was writing. Tool results of SESSION_BLOB_MIN_BYTES or more are stored
+# once under blobs/<sha256> and referenced as {"$blob": sha256}, so reading
+# the same file ten times costs one copy.
+#
+# <session_dir>/<session_id>/log   the records
+# <session_dir>/<session_id>/blobs large tool results by content hash
+
+HEADER = struct.Struct(">I")
+BLOB_KEY = "$blob"
+
+
+def new_session_id():
+    return time.strftime("%Y%m%d-%H%M%S-") + secrets.token_hex(3)
+
+
+class SessionLog:
+    def __init__(
+        self, session_id, directory=SESSION_DIR, blob_min_bytes=SESSION_BLOB_MIN_BYTES
+    ):
+        self.session_id = session_id
+        self.path = os.path.join(directory, session_id)
+        self.blob_dir = os.path.join(self.path, "blobs")
+        self.blob_min_bytes = blob_min_bytes
+        # Number of contents in the log
+        self.count = 0
+        # Byte offset where each record starts, to drop an unfinished tail
+        self.offsets = []
+        self.blobs_written = 0
+        self.file = None
+
+    def exists(self):
+        return os.path.exists(os.path.join(self.path, "log"))
+
+    def open(self):
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self.file = open(os.path.join(self.path, "log"), "ab")
+        return self
+
+    def _store_blob(self, data):
+        digest = hashlib.sha256(data).hexdigest()
+        path = os.path.join(self.blob_dir, digest)
+        if not os.path.exists(path):
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+            self.blobs_written += 1
+        return {BLOB_KEY: digest}
+
+    def _store_blobs(self, value):
+        # Large strings anywhere in a tool result, e.g. each file of read_files
+        if isinstance(value, str):
+            data = value.encode("utf-8")
+            if len(data) >= self.blob_min_bytes:
+                return self._store_blob(data)
+        elif isinstance(value, dict):
+            return {key: self._store_blobs(item) for key, item in value.items()}
+        elif isinstance(value, list):
+            return [self._store_blobs(item) for item in value]
+        return value
+
+    def _encode(self, content):
+        record = content.model_dump(mode="json", exclude_none=True)
+        for part in record.get("parts") or []:
+            function_response = part.get("function_response")
+            if function_response and "response" in function_response:
+                response = function_response["response"]
+                function_response["response"] = self._store_blobs(response)
+        return json.dumps(record, separators=(",", ":")).encode("utf-8")
+
+    def append(self, content):
+        payload = self._encode(content)
+        self.offsets.append(self.file.tell())
+        self.file.write(HEADER.pack(len(payload)) + payload)
+        self.file.flush()
+        self.count += 1
+
+    def _load_blobs(self, value, blobs):
+        if isinstance(value, dict):
+            if BLOB_KEY in value:
+                digest = value[BLOB_KEY]
+                if digest not in blobs:
+                    path = os.path.join(self.blob_dir, digest)
+                    with open(path, encoding="utf-8") as f:
+                        blobs[digest] = f.read()
+                return blobs[digest]
+            return {key: self._load_blobs(item, blobs) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._load_blobs(item, blobs) for item in value]
+        return value
+
+    def read(self):
+        # Returns the logged contents; a torn last record is cut off the file
+        contents = []
+        self.offsets = []
+        blobs = {}
+        path = os.path.join(self.path, "log")
+        with open(path, "rb") as f:
+            data = f.read()
+        offset = 0
+        while offset + HEADER.size <= len(data):
+            (size,) = HEADER.unpack_from(data, offset)
+            end = offset + HEADER.size + size
+            if end > len(data):
+                break
+            record = json.loads(data[offset + HEADER.size : end])
+            for part in record.get("parts") or []:
+                function_response = part.get("function_response")
+                if function_response and "response" in function_response:
+                    response = function_response["response"]
+                    function_response["response"] = self._load_blobs(response, blobs)
+            contents.append(types.Content.model_validate(record))
+            self.offsets.append(offset)
+            offset = end
+        if offset != len(data):
+            os.truncate(path, offset)
+        self.count = len(contents)
+        return contents
+
+    def drop_last(self):
+        # Removes the newest record, only ever from the end of the file
+        if self.file is not None:
+            self.file.flush()
+        os.truncate(os.path.join(self.path, "log"), self.offsets.pop())
+        self.count -= 1
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def resume(session_id, directory=SESSION_DIR):
+    # Returns (log, messages) ready to continue the conversation
+    log = SessionLog(session_id, directory)
+    if not log.exists():
+        raise FileNotFoundError(f'no session "{session_id}" in {directory}')
+    messages = log.read()
+    # If the session stopped before every call of the last model turn got its
+    # response, drop that turn and the model will make the calls again
+    for index in range(len(messages) - 1, -1, -1):
+        if messages[index].role != "model":
+            continue
+        parts = messages[index].parts or []
+        calls = sum(1 for part in parts if part.function_call is not None)
+        responses = sum(
+            1
+            for content in messages[index + 1 :]
+            for part in content.parts or []
+            if part.function_response is not None
+        )
+        if responses < calls:
+            while len(messages) > index:
+                messages.pop()
+                log.drop_last()
+        break
+    return log.open(), messages
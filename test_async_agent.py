@@ -0,0 +1,42 @@
+import os
+import asyncio
+
+from google.genai import types
+from fake_client import FakeClient, call_part, text_part
+from async_agent import run_agent_async
+
+script = [
+    [
+        [text_part("Let me ")],
+        [text_part("look around.")],
+        [call_part("get_files_info", directory=".")],
+        [call_part("get_file_content", file_path="main.py")],
+    ],
+    [[text_part("The calculator ")], [text_part("evaluates expressions.")]],
+]
+
+client = FakeClient(script, chunk_delay=0.01)
+messages = [types.Content(role="user", parts=[types.Part(text="What is this?")])]
+asyncio.run(run_agent_async(client, messages, verbose=True))
+
+for content in messages:
+    print(
+        content.role,
+        [
+            part.text or part.function_call or part.function_response.name
+            for part in content.parts
+        ],
+    )
+
+# A stream that breaks off discards its turn, file changes never run
+script = [
+    [
+        [call_part("get_files_info", directory=".")],
+        [call_part("write_file", file_path="stream_error.txt", content="x")],
+        RuntimeError("connection reset"),
+    ],
+]
+client = FakeClient(script)
+messages = [types.Content(role="user", parts=[types.Part(text="Write a file")])]
+asyncio.run(run_agent_async(client, messages))
+print("file written:", os.path.exists(os.path.join("calculator", "stream_error.txt")))
@@ -0,0 +1,60 @@
+from google.genai import types
+from fake_client import call_part, text_part
+from functions.get_file_content import get_file_content
+from functions.result_cache import ToolResultCache
+from history import ConversationHistory
+
+cache = ToolResultCache()
+args = {"working_directory": "calculator", "file_path": "main.py"}
+main_py = cache.call("get_file_content", args, get_file_content)
+marker = cache.call("get_file_content", args, get_file_content)
+
+
+def turn(name, result, **call_args):
+    return [
+        types.Content(role="model", parts=[call_part(name, **call_args)]),
+        types.Content(
+            role="user",
+            parts=[
+                types.Part.from_function_response(
+                    name=name, response={"result": result}
+                )
+            ],
+        ),
+    ]
+
+
+notes = "note\n" * 100
+messages = [types.Content(role="user", parts=[text_part("What does main.py do?")])]
+messages += turn("get_file_content", main_py, file_path="main.py")
+messages += turn("get_files_info", "- tests.py: file_size=1 bytes\n" * 20)
+messages += turn("get_file_content", notes, file_path="notes.txt")
+messages += turn("get_file_content", notes, file_path="notes.txt")
+# The last turns are kept, and so is the read their marker points to
+messages += turn("get_file_content", marker, file_path="main.py")
+messages.append(types.Content(role="model", parts=[text_part("It is a calculator.")]))
+
+history = ConversationHistory(messages, token_budget=100, cache=cache)
+report = history.record_usage(
+    types.GenerateContentResponseUsageMetadata(prompt_token_count=1000)
+)
+print(report)
+for content in messages:
+    for part in content.parts:
+        if part.function_response is not None:
+            result = part.function_response.response["result"]
+            print(f"{part.function_response.name}: {result[:70]!r}")
+
+# Earlier results are gone, so the next read is a full one again
+print(cache.call("get_file_content", args, get_file_content) == main_py)
+
+# Without a marker in the recent turns the old read is stubbed, and an old
+# marker that pointed to it asks the model to read again
+messages = [types.Content(role="user", parts=[text_part("Read main.py twice")])]
+messages += turn("get_file_content", main_py, file_path="main.py")
+messages += turn("get_file_content", marker, file_path="main.py")
+messages += turn("get_files_info", "- tests.py: file_size=1 bytes\n" * 20)
+messages.append(types.Content(role="model", parts=[text_part("Done.")]))
+print(ConversationHistory(messages, token_budget=100).compact())
+for content in messages[2:5:2]:
+    print(repr(content.parts[0].function_response.response["result"]))
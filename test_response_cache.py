@@ -0,0 +1,38 @@
+import tempfile
+
+from google.genai import types
+from fake_client import FakeClient, call_part, text_part
+from response_cache import CachingClient, ResponseCache
+from agent import run_agent
+
+directory = tempfile.mkdtemp()
+prompt = "Do the calculator tests pass?"
+
+script = [
+    [
+        [
+            call_part("run_tests", rerun_all=True),
+            call_part("run_python_file", file_path="tests.py"),
+        ]
+    ],
+    [[text_part("All tests pass.")]],
+]
+
+
+def session(client):
+    messages = [types.Content(role="user", parts=[types.Part(text=prompt)])]
+    run_agent(client, messages)
+    return messages
+
+
+# Test timings differ from run to run, the replay must still find its requests
+cache = ResponseCache(directory)
+session(CachingClient(FakeClient(script), cache, "record"))
+print(f"recorded: {cache.hits} hits, {cache.misses} misses")
+
+messages = session(CachingClient(None, cache, "replay"))
+print(f"replayed: {cache.hits} hits, final answer: {messages[-1].parts[0].text}")
+
+# A request that was never recorded is a miss
+messages = [types.Content(role="user", parts=[types.Part(text="Something new")])]
+run_agent(CachingClient(None, cache, "replay"), messages)
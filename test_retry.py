@@ -0,0 +1,68 @@
+import time
+
+from google.genai import errors, types
+from fake_client import FakeClient, call_part, text_part
+from retry import RetryingClient, RetryPolicy
+from agent import run_agent
+
+fast = dict(base_delay=0.01, max_delay=0.05)
+
+
+def server_error(code, status):
+    return errors.APIError(
+        code, {"error": {"code": code, "status": status, "message": status}}
+    )
+
+
+script = [
+    [[call_part("get_files_info", directory=".")]],
+    [[text_part("The calculator has a main.py.")]],
+]
+
+# Transient errors are retried and the session carries on
+client = FakeClient(
+    script,
+    failures=[
+        server_error(503, "UNAVAILABLE"),
+        server_error(429, "RESOURCE_EXHAUSTED"),
+    ],
+)
+retrying = RetryingClient(client, RetryPolicy(**fast), verbose=True)
+messages = [types.Content(role="user", parts=[types.Part(text="What is here?")])]
+run_agent(retrying, messages)
+print(retrying.stats)
+
+# Client errors are not retried
+client = FakeClient(script, failures=[server_error(400, "INVALID_ARGUMENT")])
+retrying = RetryingClient(client, RetryPolicy(**fast))
+messages = [types.Content(role="user", parts=[types.Part(text="What is here?")])]
+run_agent(retrying, messages)
+print(retrying.stats)
+
+# Give up after max_attempts
+client = FakeClient(script, failures=[ConnectionError("reset")] * 3)
+retrying = RetryingClient(client, RetryPolicy(max_attempts=3, **fast))
+messages = [types.Content(role="user", parts=[types.Part(text="What is here?")])]
+run_agent(retrying, messages)
+print(retrying.stats)
+
+# RetryInfo from the server sets the minimum wait
+error = errors.APIError(
+    429, {"error": {"code": 429, "details": [{"retryDelay": "0.2s"}]}}
+)
+client = FakeClient(script, failures=[error])
+retrying = RetryingClient(client, RetryPolicy(**fast))
+start = time.monotonic()
+retrying.models.generate_content(model="m", contents=[])
+print(f"waited at least 0.2s: {time.monotonic() - start >= 0.2}")
+
+# A slow request is hedged once p95 latency is known
+client = FakeClient([], failures=[None] * 5 + [1.0])
+retrying = RetryingClient(client, RetryPolicy(hedge=True, hedge_min_samples=5, **fast))
+for _ in range(5):
+    retrying.models.generate_content(model="m", contents=[])
+start = time.monotonic()
+retrying.models.generate_content(model="m", contents=[])
+print(f"hedged request took under 0.5s: {time.monotonic() - start < 0.5}")
+print(retrying.stats)
+retrying.close()
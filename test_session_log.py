@@ -0,0 +1,49 @@
+import os
+import tempfile
+
+from google.genai import errors, types
+from fake_client import FakeClient, call_part, text_part
+from session_log import SessionLog, resume
+from agent import run_agent
+
+directory = tempfile.mkdtemp()
+
+script = [
+    [[call_part("get_file_content", file_path="pkg/calculator.py")]],
+    [[call_part("get_file_content", file_path="pkg/calculator.py")]],
+    [[text_part("It is an infix calculator.")]],
+]
+
+# The session stops on the third request, before the final answer
+stop = errors.APIError(400, {"error": {"code": 400, "status": "INVALID_ARGUMENT"}})
+client = FakeClient(script, failures=[None, None, stop])
+log = SessionLog("test", directory).open()
+prompt = "What is pkg/calculator.py?"
+messages = [types.Content(role="user", parts=[types.Part(text=prompt)])]
+run_agent(client, messages, log=log)
+print(f"logged {log.count} contents, {log.blobs_written} blob(s) written")
+
+# A model turn whose calls never ran, then a record torn mid-write
+log.append(types.Content(role="model", parts=[call_part("get_files_info")]))
+log.file.write(b"\x00\x00\x01\x00{partial")
+log.close()
+size = os.path.getsize(os.path.join(directory, "test", "log"))
+
+log, messages = resume("test", directory)
+print(f"resumed {len(messages)} contents, log shrank: {log.offsets[-1] < size}")
+print(
+    f"blob restored: {len(messages[2].parts[0].function_response.response['result'])}"
+)
+
+run_agent(client, messages, log=log)
+log.close()
+print(f"final answer: {messages[-1].parts[0].text}")
+
+_, messages = resume("test", directory)
+print(f"after resuming again: {len(messages)} contents")
+print(f"blobs on disk: {len(os.listdir(os.path.join(directory, 'test', 'blobs')))}")
+
+try:
+    resume("missing", directory)
+except FileNotFoundError as e:
+    print(f"Error: {e}")
@@ -0,0 +1,130 @@
+import os
+import json
+import time
+import threading
+import itertools
+
+# Span based tracing for turns and tool calls. Spans are written as one JSON
+# object per line when they end. Without a trace file every span is a no-op,
+# so instrumented code pays almost nothing.
+
+
+class _NoopSpan:
+    id = None
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    def __init__(self, tracer, name, parent, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.id = next(tracer.ids)
+        self.parent = parent
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        if self.parent is None and stack:
+            self.parent = stack[-1].id
+        stack.append(self)
+        self.wall_start = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        self.tracer._stack().pop()
+        if exc is not None:
+            self.attrs["error"] = f"{exc_type.__name__}: {exc}"
+        self.tracer._write(
+            {
+                "name": self.name,
+                "id": self.id,
+                "parent": self.parent,
+                "start": self.wall_start,
+                "duration_ms": round(duration * 1000, 3),
+                "thread": threading.current_thread().name,
+                **self.attrs,
+            }
+        )
+        return False
+
+
+class Tracer:
+    def __init__(self, path=None):
+        self.enabled = path is not None
+        self.file = open(path, "a", encoding="utf-8") if path else None
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def _write(self, record):
+        line = json.dumps(record, default=str)
+        with self.lock:
+            self.file.write(line + "\n")
+
+    def span(self, name, parent=None, **attrs):
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, parent, attrs)
+
+    def current_id(self):
+        # Lets work handed to another thread name its parent span
+        if not self.enabled:
+            return None
+        stack = self._stack()
+        return stack[-1].id if stack else None
+
+    def close(self):
+        if self.file is not None:
+            with self.lock:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                self.file.close()
+                self.file = None
+            self.enabled = False
+
+
+_tracer = Tracer()
+
+
+def get_tracer():
+    return _tracer
+
+
+def set_tracer(tracer):
+    global _tracer
+    _tracer = tracer
+
+
+def span(name, parent=None, **attrs):
+    return _tracer.span(name, parent=parent, **attrs)
+
+
+def enabled():
+    return _tracer.enabled
+
+
+def content_bytes(contents):
+    # Size of contents as sent to the API, only worth computing when tracing
+    return sum(len(content.model_dump_json(exclude_none=True)) for content in contents)